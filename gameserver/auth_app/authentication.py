@@ -0,0 +1,111 @@
+# auth_app/authentication.py
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.permissions import BasePermission
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+USER_ACTIVE_KEY = 'auth_app:user-active:{}'
+METRICS_SCRAPER = 'metrics-scraper'
+
+
+def is_user_active(user_id):
+    """
+    Short-TTL cached check that a token's user still exists and is active.
+
+    Costs at most one indexed lookup per user every JWT_CLAIMS_USER_CHECK_TTL
+    seconds; the cache entry is dropped whenever the user row is saved or deleted.
+    """
+    key = USER_ACTIVE_KEY.format(user_id)
+    active = cache.get(key)
+    if active is None:
+        active = get_user_model().objects.filter(pk=user_id, is_active=True).exists()
+        cache.set(key, active, getattr(settings, 'JWT_CLAIMS_USER_CHECK_TTL', 60))
+    return active
+
+
+def forget_user_active(user_id):
+    cache.delete(USER_ACTIVE_KEY.format(user_id))
+
+
+class PlayerJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that loads the user's PlayerProfile in the same query,
+    so request.player resolves without another round trip.
+
+    Views that set ``requires_orm_user = False`` get a token-backed user built
+    from the signed claims instead, skipping the per-request User query.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        view = (request.parser_context or {}).get('view')
+        if not getattr(view, 'requires_orm_user', True):
+            return self.get_token_user(validated_token), validated_token
+        return self.get_user(validated_token), validated_token
+
+    def get_token_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = api_settings.TOKEN_USER_CLASS(validated_token)
+        if not is_user_active(user.id):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = self.user_model.objects.select_related('profile').get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """
+    Accepts ``Authorization: Bearer <METRICS_TOKEN>`` from metrics scrapers.
+
+    Other headers are left to the next authentication class. A matching
+    request stays anonymous with ``request.auth`` set to METRICS_SCRAPER.
+    """
+
+    def authenticate(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        if token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return AnonymousUser(), METRICS_SCRAPER
+        return None
+
+
+class IsMetricsScraper(BasePermission):
+    def has_permission(self, request, view):
+        return request.auth == METRICS_SCRAPER
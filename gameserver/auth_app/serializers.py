@@ -1,10 +1,14 @@
 # auth_app/serializers.py
+import logging
+
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from gamemodels.models import PlayerProfile # Import PlayerProfile from gamemodels_app
 
+logger = logging.getLogger(__name__)
+
 # MyTokenObtainPairSerializer (remains the same as your previous version)
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
@@ -81,11 +85,14 @@ class RegisterSerializer(serializers.ModelSerializer):
                     profile.save()
                 else:
                     # Fallback or log: PlayerProfile doesn't have a field for wizard_name
-                    print(f"Note: wizard_name '{wizard_name_from_input}' provided but no 'display_name' field on PlayerProfile for user {user.username}")
+                    logger.info(
+                        "wizard_name %r provided but PlayerProfile has no display_name field (user %s)",
+                        wizard_name_from_input, user.username,
+                    )
 
             except PlayerProfile.DoesNotExist:
                 # This should ideally not happen if the signal is working correctly.
-                print(f"Error: PlayerProfile for user {user.username} not found after creation.")
+                logger.error("PlayerProfile for user %s not found after creation", user.username)
         return user
 
 
@@ -0,0 +1,18 @@
+# auth_app/signals.py
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_user_active
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user_state(sender, instance, **kwargs):
+    """
+    Make deactivation and deletion take effect for token-backed users once committed.
+    """
+    transaction.on_commit(partial(forget_user_active, instance.pk))
@@ -2,6 +2,12 @@
 ASGI config for game project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections go to the game's realtime
+consumers in gamemodels.realtime. The Procfile serves HTTP from gunicorn
+(game.wsgi) and runs this application as the separate ``realtime`` process,
+so route /ws/ to it. Keep that process to one worker: the realtime channel
+layer is in-process, so players connected to different workers would never
+see each other.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +19,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'game.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from gamemodels.realtime import websocket_application  # noqa: E402 (needs apps loaded)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -48,11 +49,16 @@ INSTALLED_APPS = [
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'auth_app.authentication.PlayerJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated', # Default to require auth
     ),
+    'DEFAULT_PAGINATION_CLASS': 'gamemodels.pagination.GameCursorPagination',
+    'DEFAULT_FILTER_BACKENDS': (
+        'gamemodels.filters.SerializerQueryPlanFilter', # Joins/prefetches declared by each serializer
+    ),
+    'PAGE_SIZE': 50,
 }
 
 SIMPLE_JWT = {
@@ -87,7 +93,51 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1), # Not used if ROTATE_REFRESH_TOKENS is True
 }
 
+# Game settings
+GPS_TRACE_BATCH_MAX_POINTS = 500 # Upper bound on fixes accepted per batch upload
+GPS_TRACE_MAX_CLOCK_SKEW = 60    # Seconds a client timestamp may run ahead of the server
+GPS_TRACE_RAW_RETENTION_DAYS = 7 # Whole days of raw fixes kept before rollup_gps_traces folds them into segments
+GPS_TRACE_SIMPLIFY_TOLERANCE_M = 5.0 # Douglas-Peucker tolerance used by the rollup
+GPS_TRACE_HISTORY_DEFAULT_DAYS = 7 # Window returned by gps-traces/history/ when no start is given
+GPS_TRACE_HISTORY_MAX_DAYS = 31 # Longest start..end window gps-traces/history/ accepts
+DASHBOARD_CACHE_TIMEOUT = 60 # Seconds a per-player dashboard snapshot is cached; 0 disables the cache
+JWT_CLAIMS_USER_CHECK_TTL = 60 # Seconds a token-backed user's active flag is trusted before re-checking the DB
+INVENTORY_BATCH_MAX_ITEMS = 100 # Distinct item changes accepted per inventory batch
+QUEST_CATALOGUE_TIMEOUT = 3600 # Seconds cached per-cell quest catalogues live; edits to quests or locations refresh them immediately
+CATALOGUE_CACHE_TIMEOUT = 3600 if os.environ.get('REDIS_URL') else 30 # Seconds pre-serialized item/quest/location responses stay cached; short without REDIS_URL, where other workers never see version bumps
+QUEST_TRIGGER_RADIUS_M = 50 # Distance at which the nearby WebSocket announces a quest target
+REALTIME_QUEUE_SIZE = 256 # Messages buffered per nearby WebSocket; a client further behind is disconnected
+LOCATION_UPDATE_MIN_INTERVAL = 5 # Seconds between position writes for one player; fixes in between are coalesced
+LOCATION_UPDATE_MIN_DISTANCE_M = 10 # Position updates closer than this to the stored position are dropped
+PRESENCE_TTL = 120 # Seconds a heartbeat keeps a player online
+PRESENCE_FLUSH_INTERVAL = 60 # Heartbeats reach PlayerProfile.last_seen at most this often per player
+PRESENCE_FLUSH_INLINE = os.environ.get('PRESENCE_FLUSH_INLINE', '1') == '1' # Heartbeats flush last_seen once per interval; set 0 only when `flush_presence --every 60` runs against REDIS_URL
+PRESENCE_NEARBY_RADIUS_M = 500 # Default radius of presence/nearby/
+MAP_REPORT_MIN_VERIFICATIONS = 3 # Verifications needed before a report can be closed automatically
+MAP_REPORT_VERIFY_THRESHOLD = 0.8 # Weighted agreement at or above which a report becomes VERIFIED
+MAP_REPORT_REJECT_THRESHOLD = 0.2 # Weighted agreement at or below which a report becomes REJECTED
+MAP_REPORT_CLUSTER_WINDOW = 6 * 3600 # Seconds per time bucket when clustering incoming map reports
+MAP_REPORT_CLUSTER_RADIUS_M = 50 # Reports this close to a cluster's centre join it across cell edges; also the POI match radius
+PHOTO_PROCESSING_WORKERS = 2 # Threads processing map report photos in each web process; 0 processes them inline after commit
+PHOTO_THUMBNAIL_SIZE = 256 # Longest side of the JPEG thumbnail, pixels
+PHOTO_WEBP_MAX_SIZE = 1280 # Longest side of the WebP variant, pixels
+PHOTO_DUPLICATE_DISTANCE = 6 # Max differing dHash bits for a photo to count as a duplicate within its cluster
+PHOTO_SCORER = 'gamemodels.photos.quality_score' # Callable (image, report) -> float stored as ai_confidence_score
+POI_CLUSTER_MAX_ZOOM = 15 # From this map zoom on magical-locations/clusters/ returns points instead of grid clusters
+POI_POINTS_LIMIT = 2000 # Most points returned for one zoomed-in viewport
+TILE_MIN_ZOOM = 12 # Lowest zoom served by tiles/<z>/<x>/<y>.json; zoomed-out maps use magical-locations/clusters/
+TILE_MAX_ZOOM = 18
+TILE_CACHE_DIR = BASE_DIR / 'tile_cache' # Rendered tiles, removed per tile when a location in them changes
+TILE_MEMORY_CACHE_SIZE = 1024 # Tiles kept in each worker's LRU
+TILE_HTTP_MAX_AGE = 60 # Seconds browsers and CDNs may reuse a tile without revalidating
+GAME_FAST_READS = os.environ.get('GAME_FAST_READS', '1') == '1' # Views with a values_serializer_class serve GET lists from .values() rows and orjson (same bytes); False forces the regular serializers
+METRICS_ENABLED = True # Per-endpoint request metrics served on metrics/ (see gamemodels.metrics)
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '1.0')) # Fraction of requests measured; lower it on busy hosts
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '') # Bearer token for scrapers on metrics/; staff JWTs are accepted too
+GAME_ASYNC_VIEWS = os.environ.get('GAME_ASYNC_VIEWS') == '1' # Serve the read endpoints from gamemodels.async_views (run under ASGI)
+
 MIDDLEWARE = [
+    'gamemodels.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -95,6 +145,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'gamemodels.middleware.PlayerProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -137,6 +188,19 @@ DATABASES = {
 }
 
 
+# Cache
+# Local memory by default; set REDIS_URL to share caches between workers (needs the redis package).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    } if os.environ.get('REDIS_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,235 @@
+# gamemodels/async_views.py
+# Async versions of the read-heavy endpoints, mounted in place of the DRF views
+# when GAME_ASYNC_VIEWS is on (see urls.py). They use the async ORM so a worker
+# does not hold a thread while waiting on the database.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from auth_app.authentication import PlayerJWTAuthentication
+
+from . import caching, fast_reads, quest_catalogue
+from .catalogue import CATALOGUE_KEY, CatalogueCacheMixin, catalogue_timeout
+from .middleware import aresolve_token_player
+from .models import MagicalLocation, PlayerInventory, PlayerProfile, PlayerQuestProgress, Quest
+from .pagination import GameCursorPagination
+from .renderers import FastJSONRenderer
+from .serializers import (
+    apply_query_plan, DashboardSerializer, MagicalLocationSerializer, PlayerInventorySerializer,
+    PlayerProfileSerializer, PlayerQuestProgressSerializer, QuestSerializer,
+    MagicalLocationValuesSerializer, PlayerQuestProgressValuesSerializer, trim_fields,
+)
+from .views import PlayerProfileDetailView
+
+
+def json_response(data, status_code=status.HTTP_200_OK, renderer_class=JSONRenderer):
+    return HttpResponse(renderer_class().render(data), status=status_code, content_type='application/json')
+
+
+class AsyncReadView(View):
+    """
+    Base for async read endpoints.
+
+    Authenticates from the JWT claims like views with ``requires_orm_user =
+    False``, sets ``request.player`` and renders JSON the same way DRF does.
+    Subclasses that set ``cursor_ordering`` are paginated with
+    GameCursorPagination; ``values_serializer_class`` opts them into the
+    fast read path like ValuesReadMixin.
+    """
+    http_method_names = ['get', 'head', 'options']
+    serializer_class = None
+    values_serializer_class = None
+    cursor_ordering = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Bearer-token auth only, exempt from CSRF like DRF's APIView.as_view().
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.drf_request = Request(request)
+        try:
+            request.player = await self.authenticate(request)
+        except exceptions.APIException as exc:
+            response = json_response({'detail': exc.detail}, exc.status_code)
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                response['WWW-Authenticate'] = PlayerJWTAuthentication().authenticate_header(request)
+            return response
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def authenticate(self, request):
+        authenticator = PlayerJWTAuthentication()
+        header = authenticator.get_header(request)
+        raw_token = authenticator.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            raise exceptions.NotAuthenticated()
+        validated_token = authenticator.get_validated_token(raw_token)
+        user = await sync_to_async(authenticator.get_token_user)(validated_token)
+        return await aresolve_token_player(user)
+
+    def get_serializer_context(self):
+        return {'request': self.drf_request, 'view': self}
+
+    async def list_response(self, queryset):
+        if self.values_serializer_class is not None and fast_reads.enabled():
+            serializer_class, renderer_class = self.values_serializer_class, FastJSONRenderer
+            queryset = serializer_class.values(queryset)
+        else:
+            serializer_class, renderer_class = self.serializer_class, JSONRenderer
+            queryset = apply_query_plan(queryset, serializer_class)
+        if self.cursor_ordering:
+            paginator = GameCursorPagination()
+            page = await sync_to_async(paginator.paginate_queryset)(queryset, self.drf_request, view=self)
+            data = serializer_class(page, many=True, context=self.get_serializer_context()).data
+            return json_response(paginator.get_paginated_response(data).data, renderer_class=renderer_class)
+        rows = [row async for row in queryset]
+        data = serializer_class(rows, many=True, context=self.get_serializer_context()).data
+        return json_response(data, renderer_class=renderer_class)
+
+
+class AsyncUserDashboardView(AsyncReadView):
+    async def get(self, request, *args, **kwargs):
+        profile = request.player
+        data = await caching.aget_dashboard(profile.pk)
+        if data is None:
+            # One aggregate query, as in UserDashboardView; the snapshot is built without ?fields=.
+            profile = await PlayerProfile.objects.with_dashboard_stats().aget(pk=profile.pk)
+            data = DashboardSerializer(profile).data
+            await caching.aset_dashboard(profile.pk, data)
+        return json_response(trim_fields(data, self.drf_request))
+
+
+class AsyncPlayerProfileDetailView(AsyncReadView):
+    http_method_names = ['get', 'head', 'options', 'put', 'patch']
+    write_view = staticmethod(sync_to_async(PlayerProfileDetailView.as_view()))
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Writes keep going through the DRF view and its validation.
+        if request.method in ('PUT', 'PATCH'):
+            return await self.write_view(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        return json_response(PlayerProfileSerializer(request.player, context=self.get_serializer_context()).data)
+
+
+class AsyncUserCompletedQuestsView(AsyncReadView):
+    serializer_class = PlayerQuestProgressSerializer
+    values_serializer_class = PlayerQuestProgressValuesSerializer
+    cursor_ordering = ('-completed_at', '-id')
+
+    async def get(self, request, *args, **kwargs):
+        return await self.list_response(PlayerQuestProgress.objects.filter(
+            player=request.player, status='COMPLETED', completed_at__isnull=False
+        ))
+
+
+class AsyncUserActiveQuestsView(AsyncReadView):
+    serializer_class = PlayerQuestProgressSerializer
+    values_serializer_class = PlayerQuestProgressValuesSerializer
+
+    async def get(self, request, *args, **kwargs):
+        return await self.list_response(PlayerQuestProgress.objects.filter(
+            player=request.player
+        ).exclude(status='COMPLETED').exclude(status='FAILED').order_by('quest__title'))
+
+
+class AsyncPlayerQuestListView(AsyncReadView):
+    serializer_class = PlayerQuestProgressSerializer
+    values_serializer_class = PlayerQuestProgressValuesSerializer
+    cursor_ordering = 'id'
+
+    async def get(self, request, *args, **kwargs):
+        return await self.list_response(
+            PlayerQuestProgress.objects.filter(player=request.player)
+        )
+
+
+class AsyncQuestAvailableListView(AsyncReadView):
+    serializer_class = QuestSerializer
+    cursor_ordering = 'id'
+
+    async def get(self, request, *args, **kwargs):
+        profile = request.player
+        queryset = Quest.objects.filter(is_active=True)
+        if profile.current_latitude is not None and profile.current_longitude is not None:
+            quest_ids = await sync_to_async(quest_catalogue.available_quest_ids)(profile)
+            queryset = queryset.filter(id__in=quest_ids)
+        else:
+            completed = await sync_to_async(quest_catalogue.completed_quest_ids)(profile.pk)
+            queryset = queryset.filter(min_player_level__lte=profile.level).exclude(id__in=completed)
+        return await self.list_response(queryset)
+
+
+class AsyncPlayerInventoryListView(AsyncReadView):
+    serializer_class = PlayerInventorySerializer
+    cursor_ordering = 'id'
+
+    async def get(self, request, *args, **kwargs):
+        return await self.list_response(
+            PlayerInventory.objects.filter(player=request.player)
+        )
+
+
+class AsyncMagicalLocationListView(AsyncReadView):
+    serializer_class = MagicalLocationSerializer
+    values_serializer_class = MagicalLocationValuesSerializer
+    cursor_ordering = 'id'
+
+    async def get(self, request, *args, **kwargs):
+        queryset = MagicalLocation.objects.filter(is_active=True)
+        params = request.GET
+        bounds = [params.get(name) for name in ('min_lat', 'max_lat', 'min_lon', 'max_lon')]
+        if all(bounds):
+            try:
+                queryset = queryset.in_bbox(*map(float, bounds))
+            except ValueError:
+                pass
+        return await self.list_response(queryset)
+
+
+class AsyncCatalogueCacheMixin(CatalogueCacheMixin):
+    """
+    CatalogueCacheMixin for AsyncReadView subclasses, which implement ``retrieve()``.
+
+    ETags and cached bodies are shared with the sync views; the cache is
+    only used through its async methods.
+    """
+
+    async def aget_catalogue_etag(self, request):
+        return self.make_etag([await caching.aget_version(name) for name in self.catalogue_names], request)
+
+    async def get(self, request, *args, **kwargs):
+        etag = await self.aget_catalogue_etag(request)
+        if self.is_not_modified(request, etag):
+            return self.not_modified_response(etag)
+
+        key = CATALOGUE_KEY.format(etag.strip('"'))
+        body = await cache.aget(key)
+        if body is None:
+            response = await self.retrieve(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = response.content
+            await cache.aset(key, body, catalogue_timeout())
+        if self.is_not_modified(request, etag, exists=True):
+            return self.not_modified_response(etag)
+        return self.catalogue_response(body, etag)
+
+
+class AsyncMagicalLocationDetailView(AsyncCatalogueCacheMixin, AsyncReadView):
+    catalogue_names = ('locations',)
+
+    async def retrieve(self, request, pk, *args, **kwargs):
+        try:
+            location = await apply_query_plan(MagicalLocation.objects.all(), MagicalLocationSerializer).aget(
+                pk=pk, is_active=True
+            )
+        except MagicalLocation.DoesNotExist:
+            return json_response({'detail': 'No MagicalLocation matches the given query.'}, status.HTTP_404_NOT_FOUND)
+        return json_response(MagicalLocationSerializer(location, context=self.get_serializer_context()).data)
@@ -0,0 +1,321 @@
+# gamemodels/benchmark.py
+# Synthetic world generator and endpoint benchmark driven through the real URLconf.
+import json
+import math
+import platform
+import random
+import subprocess
+import time
+from datetime import timedelta
+
+import django
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from auth_app.serializers import MyTokenObtainPairSerializer
+from . import geo, metrics, tiles
+from .models import (
+    GameItem, MagicalLocation, PlayerGPSTrace, PlayerInventory, PlayerProfile, PlayerQuestProgress, Quest,
+    HOUSE_CHOICES, ITEM_TYPE_CHOICES, POI_TYPE_CHOICES
+)
+
+CITY_CENTRE = (51.5072, -0.1276)
+CITY_RADIUS_M = 8000
+BENCHMARK_PASSWORD = 'benchmark-alohomora'
+USERNAME_PREFIX = 'bench-'
+PERCENTILES = (50, 90, 99)
+
+
+def _city_point(rng, centre=CITY_CENTRE, radius_m=CITY_RADIUS_M):
+    min_lat, max_lat, min_lon, max_lon = geo.radius_bbox(*centre, radius_m)
+    return round(rng.uniform(min_lat, max_lat), 6), round(rng.uniform(min_lon, max_lon), 6)
+
+
+def build_world(users=200, locations=2000, quests=300, items=50, inventory_per_user=5,
+                quests_per_user=5, traces_per_user=50, seed=0):
+    """
+    Fill the database with a reproducible city-sized world.
+
+    Everything is inserted with bulk_create, so model signals do not fire;
+    run it against an empty database and a cache with no game entries.
+    Returns the benchmark players' user ids.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(BENCHMARK_PASSWORD)
+
+    User.objects.bulk_create([
+        User(username=f'{USERNAME_PREFIX}{index}', email=f'{USERNAME_PREFIX}{index}@example.com', password=password)
+        for index in range(users)
+    ])
+    user_ids = list(User.objects.filter(username__startswith=USERNAME_PREFIX).order_by('id').values_list('id', flat=True))
+    houses = [choice for choice, _label in HOUSE_CHOICES]
+    PlayerProfile.objects.bulk_create([
+        PlayerProfile(
+            user_id=user_id, house=rng.choice(houses), level=rng.randint(1, 20), xp=rng.randint(0, 5000),
+            **dict(zip(('current_latitude', 'current_longitude'), _city_point(rng))),
+        )
+        for user_id in user_ids
+    ])
+    profile_ids = list(PlayerProfile.objects.filter(user_id__in=user_ids).order_by('id').values_list('id', flat=True))
+
+    item_types = [choice for choice, _label in ITEM_TYPE_CHOICES]
+    GameItem.objects.bulk_create([
+        GameItem(name=f'Benchmark item {index}', description='Synthetic item', item_type=rng.choice(item_types),
+                 rarity=rng.randint(1, 5))
+        for index in range(items)
+    ])
+    item_ids = list(GameItem.objects.order_by('id').values_list('id', flat=True))
+
+    poi_types = [choice for choice, _label in POI_TYPE_CHOICES]
+    new_locations = []
+    for index in range(locations):
+        latitude, longitude = _city_point(rng)
+        new_locations.append(MagicalLocation(
+            name=f'Benchmark location {index}', latitude=latitude, longitude=longitude,
+            geohash=geo.encode(latitude, longitude), poi_type=rng.choice(poi_types),
+            discovered_by_id=rng.choice(user_ids) if user_ids and rng.random() < 0.5 else None,
+        ))
+    MagicalLocation.objects.bulk_create(new_locations, batch_size=1000)
+    location_ids = list(MagicalLocation.objects.order_by('id').values_list('id', flat=True))
+
+    Quest.objects.bulk_create([
+        Quest(title=f'Benchmark quest {index}', description='Synthetic quest', xp_reward=rng.randint(10, 200),
+              min_player_level=rng.randint(1, 10), item_reward_id=rng.choice(item_ids) if item_ids else None,
+              target_location_id=rng.choice(location_ids) if location_ids else None)
+        for index in range(quests)
+    ], batch_size=1000)
+    quest_ids = list(Quest.objects.order_by('id').values_list('id', flat=True))
+
+    PlayerInventory.objects.bulk_create([
+        PlayerInventory(player_id=profile_id, item_id=item_id, quantity=rng.randint(1, 20))
+        for profile_id in profile_ids
+        for item_id in rng.sample(item_ids, min(inventory_per_user, len(item_ids)))
+    ], batch_size=1000)
+
+    statuses = ['ACCEPTED', 'IN_PROGRESS', 'COMPLETED']
+    progress = []
+    for profile_id in profile_ids:
+        for quest_id in rng.sample(quest_ids, min(quests_per_user, len(quest_ids))):
+            status = rng.choice(statuses)
+            progress.append(PlayerQuestProgress(
+                player_id=profile_id, quest_id=quest_id, status=status, started_at=now - timedelta(days=1),
+                completed_at=now - timedelta(hours=rng.randint(1, 20)) if status == 'COMPLETED' else None,
+            ))
+    PlayerQuestProgress.objects.bulk_create(progress, batch_size=1000)
+
+    traces = []
+    for profile_id in profile_ids:
+        latitude, longitude = _city_point(rng)
+        for step in range(traces_per_user):
+            latitude += rng.uniform(-0.0002, 0.0002)
+            longitude += rng.uniform(-0.0003, 0.0003)
+            traces.append(PlayerGPSTrace(
+                player_id=profile_id, latitude=latitude, longitude=longitude,
+                timestamp=now - timedelta(seconds=(traces_per_user - step) * 30),
+            ))
+    PlayerGPSTrace.objects.bulk_create(traces, batch_size=1000)
+    return user_ids
+
+
+def _around(player, radius_m=1000):
+    min_lat, max_lat, min_lon, max_lon = geo.radius_bbox(player['latitude'], player['longitude'], radius_m)
+    return {'min_lat': min_lat, 'max_lat': max_lat, 'min_lon': min_lon, 'max_lon': max_lon}
+
+
+def _tile(player, rng):
+    z = tiles.max_zoom() - 3
+    x, y = tiles.tile_for(player['latitude'], player['longitude'], z)
+    return reverse('gamemodels:map-tile', kwargs={'z': z, 'x': x, 'y': y})
+
+
+def _gps_batch(player, rng):
+    now = timezone.now()
+    return {'points': [
+        {'timestamp': (now - timedelta(seconds=10 * (10 - step))).isoformat(),
+         'latitude': player['latitude'] + step * 1e-5, 'longitude': player['longitude']}
+        for step in range(10)
+    ]}
+
+
+def _moved(player, rng):
+    latitude, longitude = _city_point(rng, (player['latitude'], player['longitude']), 200)
+    return {'latitude': latitude, 'longitude': longitude}
+
+
+def _city_viewport(player, rng):
+    return dict(_around({'latitude': CITY_CENTRE[0], 'longitude': CITY_CENTRE[1]}, CITY_RADIUS_M), zoom=12)
+
+
+# (url name, method, path builder, query builder, body builder). Builders take (player, rng).
+SCENARIOS = [
+    ('auth_app:token_obtain_pair', 'POST', None, None,
+     lambda player, rng: {'username': player['username'], 'password': BENCHMARK_PASSWORD}),
+    ('auth_app:user_detail', 'GET', None, None, None),
+    ('gamemodels:user-dashboard', 'GET', None, None, None),
+    ('gamemodels:user-profile-detail', 'GET', None, None, None),
+    ('gamemodels:user-profile-location', 'POST', None, None, _moved),
+    ('gamemodels:presence-heartbeat', 'POST', None, None, _moved),
+    ('gamemodels:presence-nearby', 'GET', None, None, None),
+    ('gamemodels:quest-available-list', 'GET', None, None, None),
+    ('gamemodels:quest-detail', 'GET', lambda player, rng: reverse(
+        'gamemodels:quest-detail', kwargs={'pk': rng.choice(player['quest_ids'])}), None, None),
+    ('gamemodels:player-quest-list', 'GET', None, None, None),
+    ('gamemodels:user-active-quests', 'GET', None, None, None),
+    ('gamemodels:user-completed-quests', 'GET', None, None, None),
+    ('gamemodels:game-item-list', 'GET', None, None, None),
+    ('gamemodels:player-inventory-list', 'GET', None, None, None),
+    ('gamemodels:magical-location-list', 'GET', None, lambda player, rng: _around(player), None),
+    ('gamemodels:magical-location-detail', 'GET', lambda player, rng: reverse(
+        'gamemodels:magical-location-detail', kwargs={'pk': rng.choice(player['location_ids'])}), None, None),
+    ('gamemodels:magical-location-clusters', 'GET', None, _city_viewport, None),
+    ('gamemodels:map-tile', 'GET', _tile, None, None),
+    ('gamemodels:gps-trace-create', 'GET', None, None, None),
+    ('gamemodels:gps-trace-batch-create', 'POST', None, None, _gps_batch),
+    ('gamemodels:gps-trace-history', 'GET', None, None, None),
+    ('gamemodels:player-wand-list-create', 'GET', None, None, None),
+]
+
+
+def _players(user_ids, limit):
+    """
+    Request context for up to ``limit`` benchmark players: position and a signed access token.
+    """
+    users = User.objects.filter(pk__in=user_ids[:limit]).select_related('profile').order_by('pk')
+    location_ids = list(MagicalLocation.objects.filter(is_active=True).values_list('id', flat=True)[:1000])
+    quest_ids = list(Quest.objects.filter(is_active=True).values_list('id', flat=True)[:1000])
+    return [{
+        'username': user.username,
+        'latitude': user.profile.current_latitude,
+        'longitude': user.profile.current_longitude,
+        'authorization': f'Bearer {MyTokenObtainPairSerializer.get_token(user).access_token}',
+        'location_ids': location_ids,
+        'quest_ids': quest_ids,
+    } for user in users]
+
+
+def _percentile(ordered, percent):
+    # Nearest-rank percentile of an ascending list.
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(timings, queries, statuses, elapsed):
+    ordered = sorted(timings)
+    summary = {
+        'requests': len(timings),
+        'errors': sum(count for status, count in statuses.items() if int(status) >= 400),
+        'status_codes': dict(sorted(statuses.items())),
+        'throughput_rps': round(len(timings) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'queries_per_request': round(sum(queries) / len(queries), 2),
+        'max_queries': max(queries),
+    }
+    for percent in PERCENTILES:
+        summary[f'p{percent}_ms'] = round(_percentile(ordered, percent) * 1000, 3)
+    return summary
+
+
+class Runner:
+    """
+    Sends each scenario's requests one after another through the test client.
+
+    With ``asgi=True`` requests go through Django's ASGI handler (AsyncClient)
+    instead of the WSGI one, which exercises GAME_ASYNC_VIEWS.
+    """
+
+    def __init__(self, players, requests=100, warmup=10, seed=0, asgi=False):
+        self.players = players
+        self.requests = requests
+        self.warmup = warmup
+        self.seed = seed
+        self.asgi = asgi
+        self.client = AsyncClient() if asgi else Client()
+
+    def _request(self, scenario, rng):
+        name, method, path, query, body = scenario
+        player = rng.choice(self.players)
+        url = path(player, rng) if path else reverse(name)
+        kwargs = {} if name == 'auth_app:token_obtain_pair' else {'headers': {'Authorization': player['authorization']}}
+        if query:
+            kwargs['data'] = query(player, rng)
+        if body:
+            kwargs['data'] = json.dumps(body(player, rng))
+            kwargs['content_type'] = 'application/json'
+        return getattr(self.client, method.lower()), url, kwargs
+
+    def _call(self, send, url, kwargs, sample=None):
+        if self.asgi:
+            # async_to_sync runs the handler's thread-sensitive parts back on
+            # this thread, so they share its connection and query hooks.
+            send = async_to_sync(send)
+        with metrics.database_hooks(sample or metrics.RequestSample()):
+            return send(url, **kwargs)
+
+    def run_scenario(self, scenario):
+        rng = random.Random(f'{self.seed}:{scenario[0]}')
+        for _ in range(self.warmup):
+            self._call(*self._request(scenario, rng))
+        timings, queries, statuses = [], [], {}
+        started = time.perf_counter()
+        for _ in range(self.requests):
+            send, url, kwargs = self._request(scenario, rng)
+            sample = metrics.RequestSample()
+            request_started = time.perf_counter()
+            response = self._call(send, url, kwargs, sample)
+            timings.append(time.perf_counter() - request_started)
+            queries.append(sample.queries)
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        return summarize(timings, queries, statuses, time.perf_counter() - started)
+
+    def run(self, names=None):
+        results = {}
+        for scenario in SCENARIOS:
+            label = scenario[0].split(':', 1)[1]
+            if names and label not in names:
+                continue
+            results[label] = {'method': scenario[1], **self.run_scenario(scenario)}
+        return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(world=None, requests=100, warmup=10, seed=0, players=50, endpoints=None, asgi=False):
+    """
+    Build the world described by ``world`` (build_world() arguments), run
+    every scenario and return the JSON-serializable report.
+    """
+    world = dict(world or {}, seed=seed)
+    started = time.perf_counter()
+    user_ids = build_world(**world)
+    setup_seconds = time.perf_counter() - started
+    runner = Runner(_players(user_ids, players), requests=requests, warmup=warmup, seed=seed, asgi=asgi)
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'django': django.get_version(),
+            'python': platform.python_version(),
+            'handler': 'asgi' if asgi else 'wsgi',
+            'world': world,
+            'players': players,
+            'requests_per_endpoint': requests,
+            'warmup_per_endpoint': warmup,
+            'world_setup_seconds': round(setup_seconds, 3),
+        },
+        'endpoints': runner.run(endpoints),
+    }
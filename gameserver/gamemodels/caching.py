@@ -0,0 +1,73 @@
+# gamemodels/caching.py
+# Cache keys, per-player snapshots and version counters for derived data.
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+DASHBOARD_KEY = 'gamemodels:dashboard:{}'
+VERSION_KEY = 'gamemodels:version:{}'
+
+
+def get_version(name):
+    """
+    Current version of a named dataset; bump_version() invalidates every key built from it.
+
+    Versions start from the clock so an evicted counter never reuses an old value.
+    """
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(name):
+    key = VERSION_KEY.format(name)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, int(time.time() * 1000), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(name):
+    key = VERSION_KEY.format(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), None)
+        return cache.get(key)
+
+
+def dashboard_timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60)
+
+
+def get_dashboard(profile_id):
+    if not dashboard_timeout():
+        return None
+    return cache.get(DASHBOARD_KEY.format(profile_id))
+
+
+def set_dashboard(profile_id, data):
+    timeout = dashboard_timeout()
+    if timeout:
+        cache.set(DASHBOARD_KEY.format(profile_id), data, timeout)
+
+
+async def aget_dashboard(profile_id):
+    if not dashboard_timeout():
+        return None
+    return await cache.aget(DASHBOARD_KEY.format(profile_id))
+
+
+async def aset_dashboard(profile_id, data):
+    timeout = dashboard_timeout()
+    if timeout:
+        await cache.aset(DASHBOARD_KEY.format(profile_id), data, timeout)
+
+
+def invalidate_dashboard(profile_id):
+    cache.delete(DASHBOARD_KEY.format(profile_id))
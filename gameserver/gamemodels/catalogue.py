@@ -0,0 +1,79 @@
+# gamemodels/catalogue.py
+# Pre-serialized, ETag-validated responses for rarely changing game data.
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.renderers import JSONRenderer
+
+from . import caching
+
+CATALOGUE_KEY = 'gamemodels:catalogue:{}'
+
+
+def catalogue_timeout():
+    return getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 3600)
+
+
+class CatalogueCacheMixin:
+    """
+    Serves GET responses as cached JSON bytes with a strong ETag.
+
+    ``catalogue_names`` lists the datasets a view depends on; saving or
+    deleting a row in any of them bumps its version (see signals.py), which
+    changes the ETag and orphans the cached bytes. Versions live in the
+    cache, so workers only see each other's bumps through a shared cache
+    (REDIS_URL); with per-process LocMemCache a worker can serve stale bytes
+    for up to CATALOGUE_CACHE_TIMEOUT seconds.
+    """
+    catalogue_names = ()
+    json_renderer_class = JSONRenderer
+
+    def get_catalogue_etag(self, request):
+        return self.make_etag([caching.get_version(name) for name in self.catalogue_names], request)
+
+    def make_etag(self, versions, request):
+        versions = ':'.join(str(version) for version in versions)
+        digest = hashlib.sha1(f'{versions}|{request.get_full_path()}'.encode()).hexdigest()
+        return f'"{digest}"'
+
+    def is_not_modified(self, request, etag, exists=False):
+        """
+        Whether If-None-Match matches; ``*`` only matches once the resource is known to exist.
+        """
+        if_none_match = request.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return exists
+        return etag in parse_etags(if_none_match)
+
+    def not_modified_response(self, etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    def catalogue_response(self, body, etag):
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_catalogue_etag(request)
+        if self.is_not_modified(request, etag):
+            return self.not_modified_response(etag)
+
+        key = CATALOGUE_KEY.format(etag.strip('"'))
+        body = cache.get(key)
+        if body is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = self.json_renderer_class().render(response.data)
+            cache.set(key, body, catalogue_timeout())
+        if self.is_not_modified(request, etag, exists=True):
+            return self.not_modified_response(etag)
+        return self.catalogue_response(body, etag)
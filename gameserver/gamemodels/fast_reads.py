@@ -0,0 +1,51 @@
+# gamemodels/fast_reads.py
+# Opt-in read path for hot list endpoints: .values() rows, ValuesSerializer
+# subclasses and FastJSONRenderer, producing the same bytes as the regular path.
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+from .renderers import FastJSONRenderer
+
+
+def enabled():
+    return getattr(settings, 'GAME_FAST_READS', True)
+
+
+class ValuesReadMixin:
+    """
+    Serves GET lists from ``.values()`` rows through ``values_serializer_class``.
+
+    The view's regular serializer still handles writes and is used for every
+    request when ``values_serializer_class`` is None or GAME_FAST_READS is off.
+    JSON is rendered with FastJSONRenderer on the fast path.
+    """
+    values_serializer_class = None
+
+    def uses_fast_reads(self):
+        return (
+            self.values_serializer_class is not None
+            and getattr(self, 'request', None) is not None
+            and self.request.method in ('GET', 'HEAD')
+            and enabled()
+        )
+
+    @property
+    def json_renderer_class(self):
+        return FastJSONRenderer if self.uses_fast_reads() else JSONRenderer
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not self.uses_fast_reads():
+            return renderers
+        return [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
+
+    def get_serializer_class(self):
+        if self.uses_fast_reads():
+            return self.values_serializer_class
+        return super().get_serializer_class()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.uses_fast_reads():
+            return self.values_serializer_class.values(queryset)
+        return queryset
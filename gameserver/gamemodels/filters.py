@@ -0,0 +1,16 @@
+# gamemodels/filters.py
+from rest_framework.filters import BaseFilterBackend
+
+from .serializers import apply_query_plan
+
+
+class SerializerQueryPlanFilter(BaseFilterBackend):
+    """
+    Applies the view serializer's declared select/prefetch plan to generic view querysets.
+
+    Installed as a default filter backend, so every list and detail view loads
+    the relations its serializer reads up front; see serializers.query_plan().
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        return apply_query_plan(queryset, view.get_serializer_class())
@@ -0,0 +1,196 @@
+# gamemodels/geo.py
+# Geohash helpers used to turn map viewports into indexed prefix lookups.
+import math
+
+from django.db.models import Q
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 12  # Precision stored on rows (~3.7cm x 1.9cm cells)
+MAX_COVER_CELLS = 16    # Upper bound on prefixes produced for one query
+EARTH_RADIUS_M = 6371008.8
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Encode a coordinate into a geohash string of the given precision.
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    ch = 0
+    even = True  # Geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                ch = (ch << 1) | 1
+                lon_lo = mid
+            else:
+                ch = ch << 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch = ch << 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits = 0
+            ch = 0
+    return ''.join(chars)
+
+
+def decode_bbox(geohash):
+    """
+    Return the (min_lat, max_lat, min_lon, max_lon) bounds of a geohash cell.
+    """
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for c in geohash:
+        value = BASE32.index(c)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+def cell_size(precision):
+    """
+    Return the (lat_degrees, lon_degrees) size of a cell at the given precision.
+    """
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def _cells_at(min_lat, max_lat, min_lon, max_lon, precision):
+    dlat, dlon = cell_size(precision)
+    lat_start = math.floor((min_lat + 90.0) / dlat)
+    lat_end = math.floor((max_lat + 90.0) / dlat)
+    lon_start = math.floor((min_lon + 180.0) / dlon)
+    lon_end = math.floor((max_lon + 180.0) / dlon)
+    cells = set()
+    for i in range(lat_start, lat_end + 1):
+        lat = min(-90.0 + (i + 0.5) * dlat, 90.0)
+        for j in range(lon_start, lon_end + 1):
+            lon = min(-180.0 + (j + 0.5) * dlon, 180.0)
+            cells.add(encode(lat, lon, precision))
+    return cells
+
+
+def _cell_count(min_lat, max_lat, min_lon, max_lon, precision):
+    dlat, dlon = cell_size(precision)
+    rows = math.floor((max_lat + 90.0) / dlat) - math.floor((min_lat + 90.0) / dlat) + 1
+    cols = math.floor((max_lon + 180.0) / dlon) - math.floor((min_lon + 180.0) / dlon) + 1
+    return rows * cols
+
+
+def bbox_cells(min_lat, max_lat, min_lon, max_lon, max_cells=MAX_COVER_CELLS, precision=None):
+    """
+    Cover a bounding box with geohash prefixes.
+
+    Picks the finest precision whose cover stays within ``max_cells`` unless an
+    explicit ``precision`` is given. Boxes crossing the antimeridian
+    (``min_lon > max_lon``) are split in two.
+    """
+    min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+    if min_lat > max_lat:
+        return set()
+    if min_lon > max_lon:
+        boxes = [(min_lon, 180.0), (-180.0, max_lon)]
+    else:
+        boxes = [(max(min_lon, -180.0), min(max_lon, 180.0))]
+
+    if precision is None:
+        precision = 1
+        for candidate in range(GEOHASH_PRECISION, 0, -1):
+            count = sum(_cell_count(min_lat, max_lat, lo, hi, candidate) for lo, hi in boxes)
+            if count <= max_cells:
+                precision = candidate
+                break
+
+    cells = set()
+    for lo, hi in boxes:
+        cells |= _cells_at(min_lat, max_lat, lo, hi, precision)
+    return cells
+
+
+def radius_bbox(latitude, longitude, radius_m):
+    """
+    Return the bounding box that encloses a circle of ``radius_m`` metres.
+    """
+    dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+    cos_lat = math.cos(math.radians(latitude))
+    if cos_lat < 1e-12:
+        dlon = 180.0
+    else:
+        dlon = min(math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat)), 180.0)
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if dlon >= 180.0:
+        min_lon, max_lon = -180.0, 180.0
+    else:
+        if min_lon < -180.0:
+            min_lon += 360.0
+        if max_lon > 180.0:
+            max_lon -= 360.0
+    return latitude - dlat, latitude + dlat, min_lon, max_lon
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance in metres between two coordinates.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cells_q(cells, field='geohash'):
+    """
+    Build an OR of ``<field>__startswith`` lookups for the given prefixes.
+    """
+    query = Q()
+    for cell in sorted(cells):
+        query |= Q(**{f'{field}__startswith': cell})
+    return query
+
+
+def bbox_q(min_lat, max_lat, min_lon, max_lon, prefix='', max_cells=MAX_COVER_CELLS):
+    """
+    Indexed prefix lookup plus the exact coordinate range for a bounding box.
+
+    ``prefix`` lets callers filter through a relation, e.g. ``target_location__``.
+    """
+    cells = bbox_cells(min_lat, max_lat, min_lon, max_lon, max_cells=max_cells)
+    if not cells:
+        return Q(pk__in=[])
+    query = cells_q(cells, field=f'{prefix}geohash')
+    query &= Q(**{f'{prefix}latitude__range': (min_lat, max_lat)})
+    if min_lon > max_lon:
+        query &= (Q(**{f'{prefix}longitude__gte': min_lon}) |
+                  Q(**{f'{prefix}longitude__lte': max_lon}))
+    else:
+        query &= Q(**{f'{prefix}longitude__range': (min_lon, max_lon)})
+    return query
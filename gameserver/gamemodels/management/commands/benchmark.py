@@ -0,0 +1,66 @@
+import json
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from gamemodels import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a synthetic world in a throwaway test database, run every API endpoint against it "
+        "and report throughput, latency percentiles and queries per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--locations', type=int, default=2000)
+        parser.add_argument('--quests', type=int, default=300)
+        parser.add_argument('--items', type=int, default=50)
+        parser.add_argument('--traces-per-user', type=int, default=50)
+        parser.add_argument('--players', type=int, default=50, help="Distinct players sending requests.")
+        parser.add_argument('--requests', type=int, default=100, help="Measured requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=10, help="Unmeasured requests per endpoint first.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help="Only run this URL name, e.g. user-dashboard. Repeatable.")
+        parser.add_argument('--asgi', action='store_true', help="Send requests through the ASGI handler.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the test database between runs.")
+
+    def handle(self, *args, **options):
+        world = {
+            'users': options['users'], 'locations': options['locations'], 'quests': options['quests'],
+            'items': options['items'], 'traces_per_user': options['traces_per_user'],
+        }
+        # Cache keys get a per-run prefix and tiles a temporary directory, so the
+        # synthetic world never leaks into the configured cache or tile files.
+        caches = {alias: dict(config, KEY_PREFIX=f'benchmark-{uuid.uuid4().hex}') for alias, config in settings.CACHES.items()}
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=options['keepdb'])
+        try:
+            with tempfile.TemporaryDirectory() as tile_dir, override_settings(CACHES=caches, TILE_CACHE_DIR=tile_dir):
+                report = benchmark.run_benchmark(
+                    world, requests=options['requests'], warmup=options['warmup'], seed=options['seed'],
+                    players=options['players'], endpoints=options['endpoints'], asgi=options['asgi'],
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as report_file:
+                report_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        for name, result in report['endpoints'].items():
+            self.stderr.write(
+                f"{name:<32} {result['throughput_rps']:>9} req/s  p50 {result['p50_ms']:>8} ms  "
+                f"p99 {result['p99_ms']:>8} ms  {result['queries_per_request']:>6} queries"
+            )
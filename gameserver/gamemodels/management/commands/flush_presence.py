@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gamemodels import presence
+
+
+class Command(BaseCommand):
+    help = (
+        "Write queued presence heartbeats to PlayerProfile.last_seen. Web requests already do this once per "
+        "PRESENCE_FLUSH_INTERVAL; run it as a process with --every only with PRESENCE_FLUSH_INLINE off and a "
+        "shared cache (REDIS_URL), since it cannot see heartbeats held in another process's LocMemCache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Players written per UPDATE.")
+        parser.add_argument('--every', type=float, help="Keep running and flush every this many seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            written = presence.flush_last_seen(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Updated last_seen for {written} players."))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
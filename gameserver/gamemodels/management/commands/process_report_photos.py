@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from gamemodels import photos
+from gamemodels.models import MapReport
+
+
+class Command(BaseCommand):
+    help = "Process map report photos still marked pending, e.g. after a worker restart."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help="Retry photos that failed as well.")
+
+    def handle(self, *args, **options):
+        statuses = ['PENDING', 'FAILED'] if options['failed'] else ['PENDING']
+        report_ids = list(MapReport.objects.filter(photo_status__in=statuses).values_list('pk', flat=True))
+        for report_id in report_ids:
+            photos.process_report_photo(report_id)
+        self.stdout.write(self.style.SUCCESS(f"Processed {len(report_ids)} map report photos."))
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from gamemodels import tracks
+
+
+class Command(BaseCommand):
+    help = "Roll raw GPS traces older than the retention window into per-day segments and prune them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=int,
+            default=getattr(settings, 'GPS_TRACE_RAW_RETENTION_DAYS', 7),
+            help="Keep raw fixes for this many whole days before rolling them up.",
+        )
+        parser.add_argument(
+            '--tolerance', type=float,
+            default=getattr(settings, 'GPS_TRACE_SIMPLIFY_TOLERANCE_M', 5.0),
+            help="Douglas-Peucker tolerance in metres.",
+        )
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would be rolled up.")
+
+    def handle(self, *args, **options):
+        cutoff = tracks.rollup_cutoff(options['retention_days'])
+        pending = list(tracks.pending_rollups(cutoff))
+        if options['dry_run']:
+            self.stdout.write(f"{len(pending)} player-days before {cutoff:%Y-%m-%d} would be rolled up.")
+            return
+
+        pruned = 0
+        for player_id, day in pending:
+            pruned += tracks.rollup_day(player_id, day, options['tolerance'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {len(pending)} player-days and pruned {pruned} raw traces."
+        ))
@@ -0,0 +1,236 @@
+# gamemodels/metrics.py
+# Per-endpoint request metrics kept in-process in log-linear histograms and
+# exposed in the Prometheus text format.
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS  # 16 linear steps per power of two: values within ~6% of the truth
+QUANTILES = (0.5, 0.9, 0.99)
+UNMATCHED = 'unmatched'
+
+# name -> (help, scale applied on export, histogram of the RequestSample attribute)
+METRICS = {
+    'request_duration_seconds': ('Wall time spent handling the request.', 1e-6, 'wall_us'),
+    'db_queries': ('Database queries run by the request.', 1, 'queries'),
+    'db_duration_seconds': ('Time spent waiting on the database.', 1e-6, 'db_us'),
+    'serializer_duration_seconds': ('Time spent in serializers, database time excluded.', 1e-6, 'serializer_us'),
+    'response_bytes': ('Size of the response body.', 1, 'response_bytes'),
+}
+
+_current = ContextVar('gamemodels_request_sample', default=None)
+
+
+def enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def sample_rate():
+    return getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+
+
+class Histogram:
+    """
+    HdrHistogram-style log-linear histogram of non-negative integers.
+
+    Values below SUB_BUCKETS get a bucket each; above that every power of two
+    is split into SUB_BUCKETS equal buckets, so the relative error stays
+    under 1/SUB_BUCKETS at any magnitude. Buckets are stored sparsely.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def bucket(value):
+        if value < SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+    @staticmethod
+    def highest_equivalent(index):
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = (index >> SUB_BUCKET_BITS) - 1
+        mantissa = (index & (SUB_BUCKETS - 1)) + SUB_BUCKETS
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        value = max(int(value), 0)
+        index = self.bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Highest value equivalent to the ``q`` quantile, capped at the largest value seen.
+        """
+        if not self.count:
+            return 0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.highest_equivalent(index), self.max)
+        return self.max
+
+
+class RequestSample:
+    """
+    Counters for one sampled request, filled in by the DB and serializer hooks.
+    """
+    __slots__ = ('queries', 'db_us', 'serializer_us', 'serializer_depth', 'wall_us', 'response_bytes')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_us = 0
+        self.serializer_us = 0
+        self.serializer_depth = 0
+        self.wall_us = 0
+        self.response_bytes = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper() hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_us += int((time.perf_counter() - started) * 1e6)
+
+
+class Registry:
+    """
+    Histograms keyed by (metric, endpoint) plus a request counter by status.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.responses = {}
+
+    def observe(self, endpoint, status, sample):
+        with self.lock:
+            self.responses[(endpoint, status)] = self.responses.get((endpoint, status), 0) + 1
+            for name, (_help, _scale, attribute) in METRICS.items():
+                histogram = self.histograms.get((name, endpoint))
+                if histogram is None:
+                    histogram = self.histograms[(name, endpoint)] = Histogram()
+                histogram.record(getattr(sample, attribute))
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.responses.clear()
+
+    def render(self, prefix='game'):
+        """
+        The registry in the Prometheus text exposition format (version 0.0.4).
+
+        Histograms are exported as summaries; ``_count`` covers sampled
+        requests only, so multiply by 1 / ``<prefix>_metrics_sample_rate``
+        to estimate traffic.
+        """
+        lines = [
+            f'# HELP {prefix}_metrics_sample_rate Fraction of requests that are measured.',
+            f'# TYPE {prefix}_metrics_sample_rate gauge',
+            f'{prefix}_metrics_sample_rate {_number(sample_rate())}',
+            f'# HELP {prefix}_requests_total Sampled responses by endpoint and status code.',
+            f'# TYPE {prefix}_requests_total counter',
+        ]
+        with self.lock:
+            for (endpoint, status), count in sorted(self.responses.items()):
+                lines.append(f'{prefix}_requests_total{{endpoint="{_label(endpoint)}",status="{status}"}} {count}')
+            for name, (help_text, scale, _attribute) in METRICS.items():
+                metric = f'{prefix}_{name}'
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} summary')
+                for (histogram_name, endpoint), histogram in sorted(self.histograms.items()):
+                    if histogram_name != name:
+                        continue
+                    label = f'endpoint="{_label(endpoint)}"'
+                    for q in QUANTILES:
+                        lines.append(f'{metric}{{{label},quantile="{q}"}} {_number(histogram.quantile(q) * scale)}')
+                    lines.append(f'{metric}_sum{{{label}}} {_number(histogram.total * scale)}')
+                    lines.append(f'{metric}_count{{{label}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+
+def start_sample():
+    """
+    Begin measuring the current request, or return None when it is not sampled.
+    """
+    if not enabled():
+        return None
+    rate = sample_rate()
+    if rate <= 0 or (rate < 1 and random.random() >= rate):
+        return None
+    sample = RequestSample()
+    _current.set(sample)
+    return sample
+
+
+@contextmanager
+def database_hooks(sample):
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(sample))
+        yield
+
+
+def finish_sample(sample, request, response, started):
+    sample.wall_us = int((time.perf_counter() - started) * 1e6)
+    if not response.streaming:
+        sample.response_bytes = len(response.content)
+    match = getattr(request, 'resolver_match', None)
+    endpoint = (match.url_name or match.view_name) if match is not None else UNMATCHED
+    registry.observe(endpoint, response.status_code, sample)
+    _current.set(None)
+
+
+@contextmanager
+def serializer_timer():
+    """
+    Add the enclosed serializer work to the current request's sample.
+
+    Only the outermost section counts, so nested serializers are not
+    measured twice, and queries run lazily inside it are left to db time.
+    """
+    sample = _current.get()
+    if sample is None or sample.serializer_depth:
+        yield
+        return
+    sample.serializer_depth += 1
+    started = time.perf_counter()
+    db_before = sample.db_us
+    try:
+        yield
+    finally:
+        sample.serializer_depth -= 1
+        elapsed = int((time.perf_counter() - started) * 1e6)
+        sample.serializer_us += max(elapsed - (sample.db_us - db_before), 0)
@@ -0,0 +1,115 @@
+# gamemodels/middleware.py
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.contrib.auth.models import User
+from django.utils.functional import SimpleLazyObject
+from rest_framework.exceptions import NotFound
+
+from . import metrics
+from .models import PlayerProfile
+
+
+def attach_claims_user(profile, token_user):
+    # Username and email come from the signed token instead of a User SELECT.
+    profile.user = User(id=token_user.id, username=token_user.username, email=token_user.token.get('email', ''))
+    return profile
+
+
+def resolve_player(request):
+    """
+    Return the PlayerProfile for the authenticated user.
+
+    ORM users come from PlayerJWTAuthentication with the profile already
+    joined in. Token-backed users (simplejwt's TokenUser) get their profile
+    looked up by user_id, with the related User built from the token claims
+    instead of being selected. Profiles are created by the signup signal, so
+    a missing one raises NotFound instead of being inserted here.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return None
+
+    if isinstance(user, User):
+        try:
+            return user.profile
+        except PlayerProfile.DoesNotExist:
+            raise NotFound("Player profile not found")
+
+    try:
+        profile = PlayerProfile.objects.get(user_id=user.id)
+    except PlayerProfile.DoesNotExist:
+        raise NotFound("Player profile not found")
+    return attach_claims_user(profile, user)
+
+
+async def aresolve_token_player(token_user):
+    """
+    Async counterpart of resolve_player() for token-backed users.
+    """
+    try:
+        profile = await PlayerProfile.objects.aget(user_id=token_user.id)
+    except PlayerProfile.DoesNotExist:
+        raise NotFound("Player profile not found")
+    return attach_claims_user(profile, token_user)
+
+
+class PlayerProfileMiddleware:
+    """
+    Exposes the authenticated player's profile as ``request.player``.
+
+    Resolution is lazy: DRF authenticates inside the view, so the profile is
+    loaded on first access and at most once per request. Async views resolve
+    the player themselves and overwrite the attribute.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.player = SimpleLazyObject(lambda: resolve_player(request))
+        return self.get_response(request)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records wall time, queries, database time, serializer time and response
+    size per URL name for a METRICS_SAMPLE_RATE fraction of requests.
+
+    Unsampled requests pass straight through. Place it first so the wall
+    time covers the rest of the middleware stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(self.get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        sample = metrics.start_sample()
+        if sample is None:
+            return self.get_response(request)
+        started = time.perf_counter()
+        with metrics.database_hooks(sample):
+            response = self.get_response(request)
+        metrics.finish_sample(sample, request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        sample = metrics.start_sample()
+        if sample is None:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with metrics.database_hooks(sample):
+            response = await self.get_response(request)
+        metrics.finish_sample(sample, request, response, started)
+        return response
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='mapreport',
+            name='photo_url',
+        ),
+        migrations.RemoveField(
+            model_name='wand',
+            name='assigned_to',
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, upload_to='map_reports/%Y/%m/%d/'),
+        ),
+        migrations.CreateModel(
+            name='PlayerGPSTrace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gps_traces', to='gamemodels.playerprofile')),
+            ],
+            options={
+                'ordering': ['player', 'timestamp'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlayerWand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('acquired_at', models.DateTimeField(auto_now_add=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_wands', to='gamemodels.playerprofile')),
+                ('wand', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_wands', to='gamemodels.wand')),
+            ],
+            options={
+                'unique_together': {('player', 'wand')},
+            },
+        ),
+    ]
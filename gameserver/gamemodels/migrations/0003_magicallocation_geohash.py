@@ -0,0 +1,68 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:44
+
+from django.db import migrations, models
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(latitude, longitude, precision=12):
+    # Frozen copy of gamemodels.geo.encode, so later changes there can't alter this migration.
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    ch = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                ch = (ch << 1) | 1
+                lon_lo = mid
+            else:
+                ch = ch << 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch = ch << 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits = 0
+            ch = 0
+    return ''.join(chars)
+
+
+def backfill_geohash(apps, schema_editor):
+    MagicalLocation = apps.get_model('gamemodels', 'MagicalLocation')
+    batch = []
+    for location in MagicalLocation.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        location.geohash = encode(location.latitude, location.longitude)
+        batch.append(location)
+        if len(batch) >= 2000:
+            MagicalLocation.objects.bulk_update(batch, ['geohash'])
+            batch = []
+    if batch:
+        MagicalLocation.objects.bulk_update(batch, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0002_sync_model_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='magicallocation',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Kept in sync with latitude/longitude on save', max_length=12),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
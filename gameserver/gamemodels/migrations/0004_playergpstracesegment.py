@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0003_magicallocation_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerGPSTraceSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('point_count', models.PositiveIntegerField(help_text='Points kept after simplification')),
+                ('raw_point_count', models.PositiveIntegerField(help_text='Raw fixes rolled into this segment')),
+                ('encoded_points', models.TextField()),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gps_trace_segments', to='gamemodels.playerprofile')),
+            ],
+            options={
+                'ordering': ['player', 'day'],
+                'unique_together': {('player', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0004_playergpstracesegment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playerquestprogress',
+            name='completion_key',
+            field=models.CharField(blank=True, editable=False, help_text='Idempotency key of the request that completed the quest', max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0005_playerquestprogress_completion_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='playerprofile',
+            name='last_seen',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Written in bulk from presence heartbeats'),
+        ),
+    ]
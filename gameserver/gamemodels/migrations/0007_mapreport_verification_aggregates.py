@@ -0,0 +1,69 @@
+# Generated by Django 5.2.1 on 2026-10-17 18:59
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+PRIOR_WEIGHT = 1.0
+
+
+def confidence(agree_weight, disagree_weight):
+    # Frozen copy of gamemodels.verification.confidence as of this migration.
+    return (agree_weight + PRIOR_WEIGHT) / (agree_weight + disagree_weight + 2 * PRIOR_WEIGHT)
+
+
+def backfill_aggregates(apps, schema_editor):
+    # Verifications cast before weights existed count with weight 1.
+    MapReport = apps.get_model('gamemodels', 'MapReport')
+    reports = MapReport.objects.annotate(
+        agrees=Count('verifications', filter=Q(verifications__agrees_with_report=True)),
+        disagrees=Count('verifications', filter=Q(verifications__agrees_with_report=False)),
+    ).filter(Q(agrees__gt=0) | Q(disagrees__gt=0))
+    batch = []
+    for report in reports.iterator(chunk_size=2000):
+        report.agree_count = report.agree_weight = report.agrees
+        report.disagree_count = report.disagree_weight = report.disagrees
+        report.confidence_score = confidence(report.agrees, report.disagrees)
+        batch.append(report)
+    fields = ['agree_count', 'disagree_count', 'agree_weight', 'disagree_weight', 'confidence_score']
+    MapReport.objects.bulk_update(batch, fields, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0006_playerprofile_last_seen_presence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mapreport',
+            name='agree_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='agree_weight',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='confidence_score',
+            field=models.FloatField(default=0.5, editable=False, help_text='Weighted share of verifiers agreeing, kept up to date by gamemodels.verification'),
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='disagree_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='disagree_weight',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reportverification',
+            name='weight',
+            field=models.FloatField(default=1.0, editable=False, help_text="Verifier's vote weight when the verification was cast"),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
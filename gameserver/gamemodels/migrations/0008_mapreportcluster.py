@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0007_mapreport_verification_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MapReportCluster',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_type', models.CharField(choices=[('OBSTRUCTION', 'Muggle Obstruction'), ('NEW_PATH', 'New Magical Passage'), ('POI_INACCURACY', 'Faded Magic (POI Error)'), ('NEW_POI_SUGGESTION', 'New Magical Sighting'), ('PHOTO_EVIDENCE', 'Photo Evidence'), ('ACCESS_ISSUE', 'Accessibility Issue')], max_length=30)),
+                ('cell', models.CharField(help_text='Geohash prefix the cluster was opened in', max_length=12)),
+                ('window_start', models.DateTimeField()),
+                ('latitude', models.FloatField(help_text='Running centroid of the clustered reports')),
+                ('longitude', models.FloatField()),
+                ('report_count', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('SUBMITTED', 'Submitted'), ('REVIEWING', 'Under Review'), ('VERIFIED', 'Verified & Integrated'), ('REJECTED', 'Rejected'), ('NEEDS_MORE_INFO', 'Needs More Information')], default='SUBMITTED', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('related_poi', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_clusters', to='gamemodels.magicallocation')),
+            ],
+            options={
+                'unique_together': {('cell', 'report_type', 'window_start')},
+            },
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='cluster',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reports', to='gamemodels.mapreportcluster'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def queue_existing_photos(apps, schema_editor):
+    # Existing uploads still carry EXIF; process_report_photos picks these up.
+    MapReport = apps.get_model('gamemodels', 'MapReport')
+    MapReport.objects.exclude(photo='').exclude(photo__isnull=True).update(photo_status='PENDING')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0008_mapreportcluster'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mapreport',
+            name='photo_duplicate_of',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='photo_duplicates', to='gamemodels.mapreport'),
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='photo_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='64-bit difference hash of the photo, hex', max_length=16, null=True),
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='photo_status',
+            field=models.CharField(choices=[('NONE', 'No Photo'), ('PENDING', 'Processing'), ('READY', 'Ready'), ('FAILED', 'Failed')], default='NONE', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='photo_thumbnail',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='map_reports/thumbnails/%Y/%m/%d/'),
+        ),
+        migrations.AddField(
+            model_name='mapreport',
+            name='photo_webp',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='map_reports/webp/%Y/%m/%d/'),
+        ),
+        migrations.RunPython(queue_existing_photos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0009_mapreport_photo_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='magicallocation',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['latitude', 'longitude'], name='gm_location_active_latlon_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mapreport',
+            index=models.Index(fields=['status', '-timestamp'], name='gm_report_status_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playergpstrace',
+            index=models.Index(fields=['player', 'timestamp'], name='gm_trace_player_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerquestprogress',
+            index=models.Index(fields=['player', 'status', '-completed_at'], name='gm_progress_player_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerquestprogress',
+            index=models.Index(condition=models.Q(models.Q(('status', 'COMPLETED'), _negated=True), models.Q(('status', 'FAILED'), _negated=True)), fields=['player'], name='gm_progress_open_player_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quest',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['min_player_level'], name='gm_quest_active_level_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0010_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='mapreportcluster',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='mapreportcluster',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('SUBMITTED', 'REVIEWING', 'NEEDS_MORE_INFO'))), fields=('cell', 'report_type', 'window_start'), name='gm_cluster_open_key'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-17 19:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamemodels', '0011_mapreportcluster_open_key'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='playerquestprogress',
+            name='gm_progress_player_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='playerquestprogress',
+            index=models.Index(fields=['player', 'status', '-completed_at', '-id'], name='gm_progress_player_status_idx'),
+        ),
+    ]
@@ -1,5 +1,9 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from . import geo
 
 # Choices for ENUM-like fields
 HOUSE_CHOICES = [
@@ -50,6 +54,15 @@ MAP_REPORT_STATUS_CHOICES = [
     ('REJECTED', 'Rejected'),
     ('NEEDS_MORE_INFO', 'Needs More Information'),
 ]
+OPEN_REPORT_STATUSES = ('SUBMITTED', 'REVIEWING', 'NEEDS_MORE_INFO')
+MAX_INVENTORY_QUANTITY = 2 ** 31 - 1  # Largest value PlayerInventory.quantity holds on every backend
+
+PHOTO_STATUS_CHOICES = [
+    ('NONE', 'No Photo'),
+    ('PENDING', 'Processing'),
+    ('READY', 'Ready'),
+    ('FAILED', 'Failed'),
+]
 
 WAND_CORE_CHOICES = [
     ('PHOENIX_FEATHER', 'Phoenix Feather'),
@@ -67,6 +80,23 @@ WOOD_TYPE_CHOICES = [
     ('HAWTHORN', 'Hawthorn'),
 ]
 
+class PlayerProfileQuerySet(models.QuerySet):
+    def with_dashboard_stats(self):
+        """
+        Annotate quest counts by status bucket and the player's first wand in one query.
+        """
+        first_wand = PlayerWand.objects.filter(player=OuterRef('pk')).order_by('pk')
+        return self.select_related('user').annotate(
+            completed_quests_count=Count('quest_progress', filter=Q(quest_progress__status='COMPLETED')),
+            pending_quests_count=Count('quest_progress', filter=Q(quest_progress__status='PENDING')),
+            in_progress_quests_count=Count('quest_progress', filter=Q(quest_progress__status__in=['IN_PROGRESS', 'ACCEPTED'])),
+            dashboard_wand_id=Subquery(first_wand.values('wand_id')[:1]),
+            dashboard_wand_core=Subquery(first_wand.values('wand__core')[:1]),
+            dashboard_wand_wood_type=Subquery(first_wand.values('wand__wood_type')[:1]),
+            dashboard_wand_length_inches=Subquery(first_wand.values('wand__length_inches')[:1]),
+            dashboard_wand_flexibility=Subquery(first_wand.values('wand__flexibility')[:1]),
+        )
+
 class PlayerProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     house = models.CharField(max_length=20, choices=HOUSE_CHOICES, null=True, blank=True)
@@ -75,11 +105,26 @@ class PlayerProfile(models.Model):
     avatar_url = models.URLField(max_length=255, null=True, blank=True)
     current_latitude = models.FloatField(null=True, blank=True)
     current_longitude = models.FloatField(null=True, blank=True)
-    last_seen = models.DateTimeField(auto_now=True)
+    last_seen = models.DateTimeField(default=timezone.now, help_text="Written in bulk from presence heartbeats")
+
+    objects = PlayerProfileQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.user.username}'s Profile ({self.house})"
 
+    @property
+    def dashboard_wand(self):
+        # Rebuilds the Wand from with_dashboard_stats() annotations without another query.
+        if self.dashboard_wand_id is None:
+            return None
+        return Wand(
+            id=self.dashboard_wand_id,
+            core=self.dashboard_wand_core,
+            wood_type=self.dashboard_wand_wood_type,
+            length_inches=self.dashboard_wand_length_inches,
+            flexibility=self.dashboard_wand_flexibility,
+        )
+
 class Wand(models.Model):
     core = models.CharField(max_length=30, choices=WAND_CORE_CHOICES)
     wood_type = models.CharField(max_length=30, choices=WOOD_TYPE_CHOICES)
@@ -100,11 +145,19 @@ class PlayerWand(models.Model):
     def __str__(self):
         return f"{self.player.user.username}'s {self.wand}"
 
+class MagicalLocationQuerySet(models.QuerySet):
+    def in_bbox(self, min_lat, max_lat, min_lon, max_lon):
+        return self.filter(geo.bbox_q(min_lat, max_lat, min_lon, max_lon))
+
+    def near(self, latitude, longitude, radius_m):
+        return self.in_bbox(*geo.radius_bbox(latitude, longitude, radius_m))
+
 class MagicalLocation(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     latitude = models.FloatField()
     longitude = models.FloatField()
+    geohash = models.CharField(max_length=geo.GEOHASH_PRECISION, db_index=True, editable=False, blank=True, help_text="Kept in sync with latitude/longitude on save")
     poi_type = models.CharField(max_length=50, choices=POI_TYPE_CHOICES)
     real_world_identifier = models.CharField(max_length=100, blank=True, null=True, help_text="HERE API ID or similar")
     discovered_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="discovered_locations")
@@ -113,9 +166,24 @@ class MagicalLocation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MagicalLocationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Bounding-box range of in_bbox(); only active locations are ever shown on the map.
+            models.Index(fields=['latitude', 'longitude'], condition=Q(is_active=True), name='gm_location_active_latlon_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.poi_type})"
 
+    def save(self, *args, **kwargs):
+        self.geohash = geo.encode(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+
 class GameItem(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField()
@@ -148,6 +216,12 @@ class Quest(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # quests/available/ for players without a position: active quests up to their level.
+            models.Index(fields=['min_player_level'], condition=Q(is_active=True), name='gm_quest_active_level_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -157,13 +231,52 @@ class PlayerQuestProgress(models.Model):
     status = models.CharField(max_length=20, choices=QUEST_STATUS_CHOICES, default='PENDING')
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    completion_key = models.CharField(max_length=64, null=True, blank=True, editable=False, help_text="Idempotency key of the request that completed the quest")
 
     class Meta:
         unique_together = ('player', 'quest')
+        indexes = [
+            # Per-status lists and counts; quests/completed/ pages by (-completed_at, -id).
+            models.Index(fields=['player', 'status', '-completed_at', '-id'], name='gm_progress_player_status_idx'),
+            # quests/active/ excludes the terminal statuses, spelled the way the view filters.
+            models.Index(
+                fields=['player'], condition=~Q(status='COMPLETED') & ~Q(status='FAILED'),
+                name='gm_progress_open_player_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.player.user.username} - {self.quest.title} ({self.status})"
 
+class MapReportCluster(models.Model):
+    """
+    Reports of one type made in the same geohash cell and time window.
+
+    Only one open cluster exists per cell, type and window; once it is closed
+    the next report opens a new one.
+    """
+    report_type = models.CharField(max_length=30, choices=MAP_REPORT_TYPE_CHOICES)
+    cell = models.CharField(max_length=geo.GEOHASH_PRECISION, help_text="Geohash prefix the cluster was opened in")
+    window_start = models.DateTimeField()
+    latitude = models.FloatField(help_text="Running centroid of the clustered reports")
+    longitude = models.FloatField()
+    related_poi = models.ForeignKey(MagicalLocation, on_delete=models.SET_NULL, null=True, blank=True, related_name="report_clusters")
+    report_count = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=MAP_REPORT_STATUS_CHOICES, default='SUBMITTED')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cell', 'report_type', 'window_start'], condition=Q(status__in=OPEN_REPORT_STATUSES),
+                name='gm_cluster_open_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} cluster at {self.cell} ({self.report_count} reports)"
+
 class MapReport(models.Model):
     reporter = models.ForeignKey(User, on_delete=models.CASCADE, related_name="map_reports")
     latitude = models.FloatField()
@@ -175,9 +288,26 @@ class MapReport(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=MAP_REPORT_STATUS_CHOICES, default='SUBMITTED')
     ai_confidence_score = models.FloatField(null=True, blank=True, help_text="Confidence from AI analysis")
+    photo_status = models.CharField(max_length=10, choices=PHOTO_STATUS_CHOICES, default='NONE', editable=False)
+    photo_thumbnail = models.ImageField(upload_to='map_reports/thumbnails/%Y/%m/%d/', null=True, blank=True, editable=False)
+    photo_webp = models.ImageField(upload_to='map_reports/webp/%Y/%m/%d/', null=True, blank=True, editable=False)
+    photo_hash = models.CharField(max_length=16, null=True, blank=True, db_index=True, editable=False, help_text="64-bit difference hash of the photo, hex")
+    photo_duplicate_of = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="photo_duplicates")
     admin_notes = models.TextField(blank=True, null=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
     resolver = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="resolved_reports")
+    agree_count = models.PositiveIntegerField(default=0, editable=False)
+    disagree_count = models.PositiveIntegerField(default=0, editable=False)
+    agree_weight = models.FloatField(default=0, editable=False)
+    disagree_weight = models.FloatField(default=0, editable=False)
+    cluster = models.ForeignKey(MapReportCluster, on_delete=models.SET_NULL, null=True, blank=True, related_name="reports")
+    confidence_score = models.FloatField(default=0.5, editable=False, help_text="Weighted share of verifiers agreeing, kept up to date by gamemodels.verification")
+
+    class Meta:
+        indexes = [
+            # Moderation queue: reports in a status, newest first.
+            models.Index(fields=['status', '-timestamp'], name='gm_report_status_time_idx'),
+        ]
 
     def __str__(self):
         return f"Report by {self.reporter.username} at ({self.latitude}, {self.longitude}) - {self.get_report_type_display()}"
@@ -186,6 +316,7 @@ class ReportVerification(models.Model):
     map_report = models.ForeignKey(MapReport, on_delete=models.CASCADE, related_name="verifications")
     verifier = models.ForeignKey(User, on_delete=models.CASCADE, related_name="report_verifications")
     agrees_with_report = models.BooleanField()
+    weight = models.FloatField(default=1.0, editable=False, help_text="Verifier's vote weight when the verification was cast")
     comment = models.TextField(blank=True, null=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
@@ -203,6 +334,32 @@ class PlayerGPSTrace(models.Model):
 
     class Meta:
         ordering = ['player', 'timestamp']
+        indexes = [
+            # A player's fixes in time order: gps-traces/, history and the daily rollup.
+            models.Index(fields=['player', 'timestamp'], name='gm_trace_player_time_idx'),
+        ]
+
+    def __str__(self):
+        return f"GPS Trace for {self.player.user.username} at {self.timestamp}" 
+
+class PlayerGPSTraceSegment(models.Model):
+    """
+    A day of a player's GPS history rolled up from PlayerGPSTrace rows.
+
+    ``encoded_points`` uses the polyline algorithm over
+    ``(latitude, longitude, seconds since start_time)`` triples.
+    """
+    player = models.ForeignKey(PlayerProfile, on_delete=models.CASCADE, related_name="gps_trace_segments")
+    day = models.DateField()
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    point_count = models.PositiveIntegerField(help_text="Points kept after simplification")
+    raw_point_count = models.PositiveIntegerField(help_text="Raw fixes rolled into this segment")
+    encoded_points = models.TextField()
+
+    class Meta:
+        unique_together = ('player', 'day')
+        ordering = ['player', 'day']
 
     def __str__(self):
-        return f"GPS Trace for {self.player.user.username} at {self.timestamp}" 
\ No newline at end of file
+        return f"GPS Segment for {self.player.user.username} on {self.day} ({self.point_count} points)"
@@ -0,0 +1,21 @@
+# gamemodels/pagination.py
+from rest_framework.pagination import CursorPagination
+
+
+class GameCursorPagination(CursorPagination):
+    """
+    Keyset pagination used by every list endpoint.
+
+    Views pick their indexed ordering with a ``cursor_ordering`` attribute;
+    clients can shrink or grow pages up to ``max_page_size``.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return super().get_ordering(request, queryset, view)
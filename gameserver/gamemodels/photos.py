@@ -0,0 +1,166 @@
+# gamemodels/photos.py
+# Background processing of MapReport photos: EXIF stripping, small variants,
+# perceptual hashes and a pluggable quality score.
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps, ImageStat
+
+from .models import MapReport
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'PHOTO_PROCESSING_WORKERS', 2),
+                thread_name_prefix='report-photos',
+            )
+    return _executor
+
+
+def schedule(report_id):
+    """
+    Process a report's photo once the current transaction commits.
+
+    With PHOTO_PROCESSING_WORKERS = 0 the work runs inline after the commit.
+    """
+    def submit():
+        if getattr(settings, 'PHOTO_PROCESSING_WORKERS', 2):
+            get_executor().submit(_run_in_worker, report_id)
+        else:
+            process_report_photo(report_id)
+    transaction.on_commit(submit)
+
+
+def _run_in_worker(report_id):
+    close_old_connections()
+    try:
+        process_report_photo(report_id)
+    except Exception:
+        logger.exception("Processing photo of map report %s failed", report_id)
+    finally:
+        close_old_connections()
+
+
+def difference_hash(image, size=8):
+    """
+    64-bit dHash: whether each pixel is brighter than its right neighbour on a 9x8 grayscale thumbnail.
+    """
+    pixels = list(image.convert('L').resize((size + 1, size), Image.LANCZOS).getdata())
+    value = 0
+    for row in range(size):
+        for column in range(size):
+            left = pixels[row * (size + 1) + column]
+            right = pixels[row * (size + 1) + column + 1]
+            value = (value << 1) | (left > right)
+    return f'{value:016x}'
+
+
+def hash_distance(first, second):
+    return bin(int(first, 16) ^ int(second, 16)).count('1')
+
+
+def quality_score(image, report):
+    """
+    Default local scorer: favours sharp, well-exposed photos of reasonable size.
+
+    Returns a value in [0, 1]. Replace it through the PHOTO_SCORER setting with
+    any callable taking ``(image, report)``.
+    """
+    gray = ImageOps.grayscale(image)
+    gray.thumbnail((512, 512))
+    stat = ImageStat.Stat(gray)
+    mean, stddev = stat.mean[0], stat.stddev[0]
+    contrast = min(stddev / 64.0, 1.0)
+    exposure = 1.0 - abs(mean - 128.0) / 128.0
+    resolution = min(image.width * image.height / (640 * 480), 1.0)
+    return round(0.5 * contrast + 0.3 * exposure + 0.2 * resolution, 3)
+
+
+def _encode(image, format, **options):
+    buffer = BytesIO()
+    image.save(buffer, format=format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def _bounded(image, max_size):
+    copy = image.copy()
+    copy.thumbnail((max_size, max_size), Image.LANCZOS)
+    return copy
+
+
+def find_duplicate(report):
+    """
+    Earliest other report in the same cluster whose photo hash is within PHOTO_DUPLICATE_DISTANCE bits.
+    """
+    if report.cluster_id is None:
+        return None
+    threshold = getattr(settings, 'PHOTO_DUPLICATE_DISTANCE', 6)
+    candidates = MapReport.objects.filter(
+        cluster_id=report.cluster_id, photo_hash__isnull=False, pk__lt=report.pk
+    ).order_by('pk').values_list('pk', 'photo_hash')
+    for pk, photo_hash in candidates:
+        if hash_distance(photo_hash, report.photo_hash) <= threshold:
+            return pk
+    return None
+
+
+def process_report_photo(report_id):
+    """
+    Replace the uploaded photo with an EXIF-free copy and build its variants.
+
+    Writes a JPEG thumbnail and a size-bounded WebP, the difference hash, the
+    duplicate link and ``ai_confidence_score``. Safe to run again for the same
+    report.
+    """
+    report = MapReport.objects.filter(pk=report_id).first()
+    if report is None or not report.photo:
+        return
+    try:
+        with report.photo.open('rb') as raw:
+            image = Image.open(raw)
+            image.load()
+        # Apply the orientation tag before dropping the rest of the metadata.
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    except (OSError, ValueError, Image.DecompressionBombError):
+        logger.warning("Map report %s has an unreadable photo", report_id)
+        MapReport.objects.filter(pk=report_id).update(photo_status='FAILED')
+        return
+
+    stem = os.path.splitext(os.path.basename(report.photo.name))[0]
+    original_name = report.photo.name
+    report.photo.save(f'{stem}.jpg', _encode(image, 'JPEG', quality=90), save=False)
+    if report.photo.name != original_name:
+        report.photo.storage.delete(original_name)
+
+    for field in (report.photo_thumbnail, report.photo_webp):
+        if field:
+            field.delete(save=False)
+    thumbnail_size = getattr(settings, 'PHOTO_THUMBNAIL_SIZE', 256)
+    report.photo_thumbnail.save(f'{stem}.jpg', _encode(_bounded(image, thumbnail_size), 'JPEG', quality=80), save=False)
+    webp_size = getattr(settings, 'PHOTO_WEBP_MAX_SIZE', 1280)
+    report.photo_webp.save(f'{stem}.webp', _encode(_bounded(image, webp_size), 'WEBP', quality=80), save=False)
+
+    report.photo_hash = difference_hash(image)
+    report.photo_duplicate_of_id = find_duplicate(report)
+    scorer = import_string(getattr(settings, 'PHOTO_SCORER', 'gamemodels.photos.quality_score'))
+    report.ai_confidence_score = scorer(image, report)
+    report.photo_status = 'READY'
+    report.save(update_fields=[
+        'photo', 'photo_thumbnail', 'photo_webp', 'photo_hash', 'photo_duplicate_of',
+        'ai_confidence_score', 'photo_status',
+    ])
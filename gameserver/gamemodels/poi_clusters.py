@@ -0,0 +1,101 @@
+# gamemodels/poi_clusters.py
+# Zoom-aware POI aggregation for map viewports, cached per geohash tile.
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count
+from django.db.models.functions import Substr
+
+from . import caching, geo
+from .models import MagicalLocation
+
+TILE_KEY = 'gamemodels:poi-tile:{}:{}:{}'
+MAX_CLUSTER_PRECISION = 6
+MAX_TILES = 64
+CLUSTER_FIELDS = ['cell', 'count', 'latitude', 'longitude', 'poi_type']
+POINT_FIELDS = ['id', 'latitude', 'longitude', 'poi_type']
+
+
+class ViewportTooLarge(Exception):
+    pass
+
+
+def cluster_precision(zoom):
+    """
+    Geohash precision whose cells are a few dozen screen pixels wide at ``zoom``.
+    """
+    return max(1, min(MAX_CLUSTER_PRECISION, (zoom * 2 + 4) // 5))
+
+
+def _tile_clusters(tiles, precision, version):
+    """
+    ``[cell, count, latitude, longitude, poi_type]`` rows for every cluster cell inside each tile.
+    """
+    keys = {TILE_KEY.format(version, precision, tile): tile for tile in tiles}
+    found = cache.get_many(list(keys))
+    missing = [tile for key, tile in keys.items() if key not in found]
+    if missing:
+        built = {tile: {} for tile in missing}
+        queryset = MagicalLocation.objects.filter(is_active=True)
+        if missing != ['']:
+            queryset = queryset.filter(geo.cells_q(missing))
+        rows = (
+            queryset.annotate(cell=Substr('geohash', 1, precision))
+            .values('cell', 'poi_type')
+            .annotate(count=Count('id'), latitude=Avg('latitude'), longitude=Avg('longitude'))
+            .order_by()
+        )
+        for row in rows:
+            tile = row['cell'][:precision - 1]
+            cells = built[tile]
+            cell = cells.setdefault(row['cell'], {'count': 0, 'latitude': 0.0, 'longitude': 0.0, 'types': {}})
+            cell['count'] += row['count']
+            cell['latitude'] += row['latitude'] * row['count']
+            cell['longitude'] += row['longitude'] * row['count']
+            cell['types'][row['poi_type']] = row['count']
+        entries = {
+            TILE_KEY.format(version, precision, tile): [
+                [cell, data['count'], round(data['latitude'] / data['count'], 6),
+                 round(data['longitude'] / data['count'], 6), max(data['types'], key=data['types'].get)]
+                for cell, data in sorted(cells.items())
+            ]
+            for tile, cells in built.items()
+        }
+        cache.set_many(entries, getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 3600))
+        found.update(entries)
+    return [row for rows in found.values() for row in rows]
+
+
+def viewport(min_lat, max_lat, min_lon, max_lon, zoom):
+    """
+    Map payload for a viewport.
+
+    Below POI_CLUSTER_MAX_ZOOM active POIs are aggregated into geohash cells
+    sized for the zoom level. Each tile (the parent cell one level up) is
+    cached until a location changes. From that zoom on, compact point tuples
+    are returned, capped at POI_POINTS_LIMIT. Rows are lists described by
+    ``fields`` to keep the payload small.
+
+    Raises ViewportTooLarge when the viewport spans more than MAX_TILES tiles.
+    """
+    if zoom >= getattr(settings, 'POI_CLUSTER_MAX_ZOOM', 15):
+        limit = getattr(settings, 'POI_POINTS_LIMIT', 2000)
+        points = MagicalLocation.objects.filter(is_active=True).in_bbox(
+            min_lat, max_lat, min_lon, max_lon
+        ).order_by('id').values_list(*POINT_FIELDS)[:limit + 1]
+        points = [list(point) for point in points]
+        return {'mode': 'points', 'fields': POINT_FIELDS, 'truncated': len(points) > limit, 'items': points[:limit]}
+
+    precision = cluster_precision(zoom)
+    if precision == 1:
+        tiles = {''}
+    else:
+        # Estimate first so a world-sized box at a high zoom is refused before enumerating cells.
+        dlat, dlon = geo.cell_size(precision - 1)
+        lon_span = max_lon - min_lon if min_lon <= max_lon else 360.0 - (min_lon - max_lon)
+        if ((max_lat - min_lat) / dlat + 1) * (lon_span / dlon + 1) > MAX_TILES * 4:
+            raise ViewportTooLarge()
+        tiles = geo.bbox_cells(min_lat, max_lat, min_lon, max_lon, precision=precision - 1)
+        if len(tiles) > MAX_TILES:
+            raise ViewportTooLarge()
+    rows = _tile_clusters(sorted(tiles), precision, caching.get_version('locations'))
+    return {'mode': 'clusters', 'precision': precision, 'fields': CLUSTER_FIELDS, 'items': rows}
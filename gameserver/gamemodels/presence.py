@@ -0,0 +1,164 @@
+# gamemodels/presence.py
+# Heartbeats kept in the cache and written back to PlayerProfile.last_seen in bulk.
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import geo
+from .models import PlayerProfile
+
+CELL_PRECISION = 6  # ~1.2km x 0.6km buckets for the "online near me" lookup
+MAX_NEARBY_RADIUS_M = 2000
+BEAT_LOG_TIMEOUT = 24 * 3600  # Queued heartbeats survive this long without a flush
+
+PLAYER_KEY = 'gamemodels:presence:player:{}'
+CELL_KEY = 'gamemodels:presence:cell:{}'
+QUEUED_KEY = 'gamemodels:presence:queued:{}'
+BEAT_KEY = 'gamemodels:presence:beat:{}'
+SEQ_KEY = 'gamemodels:presence:seq'
+FLUSHED_KEY = 'gamemodels:presence:flushed'
+FLUSH_LOCK_KEY = 'gamemodels:presence:flush-lock'
+
+
+def presence_ttl():
+    return getattr(settings, 'PRESENCE_TTL', 120)
+
+
+def flush_interval():
+    return getattr(settings, 'PRESENCE_FLUSH_INTERVAL', 60)
+
+
+def flush_inline():
+    return getattr(settings, 'PRESENCE_FLUSH_INLINE', True)
+
+
+def heartbeat(player_id, username='', latitude=None, longitude=None):
+    """
+    Mark a player online, optionally at a position.
+
+    The player's record and its cell bucket live for PRESENCE_TTL seconds.
+    At most one heartbeat per PRESENCE_FLUSH_INTERVAL is queued for
+    flush_last_seen(); the flush picks up the newest one from the record.
+    With PRESENCE_FLUSH_INLINE the first heartbeat of each interval runs the
+    flush itself, so last_seen keeps moving without a scheduled command.
+    """
+    now = time.time()
+    ttl = presence_ttl()
+    previous = cache.get(PLAYER_KEY.format(player_id)) or {}
+    if latitude is None or longitude is None:
+        latitude, longitude = previous.get('latitude'), previous.get('longitude')
+    cell = geo.encode(latitude, longitude, CELL_PRECISION) if latitude is not None else None
+
+    # Cell buckets are rewritten only when the player changes cell or half
+    # the TTL has passed, which keeps the read-modify-write rare.
+    indexed = previous.get('indexed', 0)
+    if cell and (cell != previous.get('cell') or now - indexed > ttl / 2):
+        _index(cell, player_id, now, ttl)
+        indexed = now
+
+    cache.set(PLAYER_KEY.format(player_id), {
+        'player_id': player_id, 'username': username, 'latitude': latitude, 'longitude': longitude,
+        'cell': cell, 'seen': now, 'indexed': indexed,
+    }, ttl)
+
+    if cache.add(QUEUED_KEY.format(player_id), True, flush_interval() or None):
+        cache.add(SEQ_KEY, 0, None)
+        cache.set(BEAT_KEY.format(cache.incr(SEQ_KEY)), (player_id, now), BEAT_LOG_TIMEOUT)
+
+    if flush_inline():
+        interval = flush_interval()
+        if not interval or cache.add(FLUSH_LOCK_KEY, True, interval):
+            flush_last_seen()
+
+
+def _index(cell, player_id, now, ttl):
+    # Concurrent writers can drop each other's entry; the next heartbeat re-adds it.
+    key = CELL_KEY.format(cell)
+    members = {pid: seen for pid, seen in (cache.get(key) or {}).items() if now - seen < ttl}
+    members[player_id] = now
+    cache.set(key, members, ttl)
+
+
+def get_presence(player_id):
+    """
+    The player's latest heartbeat record, or None when they are offline.
+    """
+    return cache.get(PLAYER_KEY.format(player_id))
+
+
+def online_in_cells(cells, exclude=None):
+    """
+    Heartbeat records of the players with a live heartbeat and a position in ``cells``.
+    """
+    cells = set(cells)
+    now = time.time()
+    ttl = presence_ttl()
+    player_ids = set()
+    for members in cache.get_many([CELL_KEY.format(cell) for cell in cells]).values():
+        player_ids.update(pid for pid, seen in members.items() if now - seen < ttl)
+    player_ids.discard(exclude)
+    records = cache.get_many([PLAYER_KEY.format(pid) for pid in player_ids]).values()
+    return [record for record in records if record['latitude'] is not None and record['cell'] in cells]
+
+
+def online_near(latitude, longitude, radius_m, exclude=None):
+    """
+    Players with a live heartbeat within ``radius_m`` metres, nearest first.
+
+    Only the cache is read: the cell buckets covering the radius, then the
+    records of the players found in them.
+    """
+    radius_m = min(radius_m, MAX_NEARBY_RADIUS_M)
+    cells = geo.bbox_cells(*geo.radius_bbox(latitude, longitude, radius_m), precision=CELL_PRECISION)
+    nearby = []
+    for record in online_in_cells(cells, exclude):
+        distance = geo.haversine_m(latitude, longitude, record['latitude'], record['longitude'])
+        if distance <= radius_m:
+            nearby.append({
+                'player_id': record['player_id'],
+                'username': record['username'],
+                'latitude': record['latitude'],
+                'longitude': record['longitude'],
+                'distance_m': round(distance, 1),
+                'last_seen': datetime.fromtimestamp(record['seen'], tz=dt_timezone.utc),
+            })
+    nearby.sort(key=lambda row: row['distance_m'])
+    return nearby
+
+
+def flush_last_seen(batch_size=1000):
+    """
+    Write queued heartbeats to PlayerProfile.last_seen with bulk UPDATEs.
+
+    Returns the number of players written. Heartbeats run it once per
+    PRESENCE_FLUSH_INTERVAL unless PRESENCE_FLUSH_INLINE is off; the
+    flush_presence command only sees the web workers' heartbeats through a
+    shared cache (REDIS_URL), never through the per-process LocMemCache.
+    """
+    current = cache.get(SEQ_KEY) or 0
+    flushed = cache.get(FLUSHED_KEY) or 0
+    if flushed > current:
+        # The sequence was evicted and restarted.
+        flushed = 0
+
+    seen = {}
+    for start in range(flushed + 1, current + 1, batch_size):
+        keys = [BEAT_KEY.format(seq) for seq in range(start, min(start + batch_size, current + 1))]
+        for player_id, beat in cache.get_many(keys).values():
+            seen[player_id] = max(beat, seen.get(player_id, 0))
+        cache.delete_many(keys)
+
+    player_ids = list(seen)
+    for start in range(0, len(player_ids), batch_size):
+        chunk = player_ids[start:start + batch_size]
+        for record in cache.get_many([PLAYER_KEY.format(pid) for pid in chunk]).values():
+            seen[record['player_id']] = max(record['seen'], seen[record['player_id']])
+        PlayerProfile.objects.bulk_update([
+            PlayerProfile(pk=pid, last_seen=datetime.fromtimestamp(seen[pid], tz=dt_timezone.utc))
+            for pid in chunk
+        ], ['last_seen'])
+
+    cache.set(FLUSHED_KEY, current, None)
+    return len(player_ids)
@@ -0,0 +1,101 @@
+# gamemodels/quest_catalogue.py
+# Cached per-cell quest catalogue backing QuestAvailableListView.
+from django.conf import settings
+from django.core.cache import cache
+
+from . import caching, geo
+from .models import PlayerQuestProgress, Quest
+
+CELL_PRECISION = 5  # ~4.9km x 4.9km cells
+QUEST_RADIUS_DEGREES = 0.1
+CELL_KEY = 'gamemodels:quest-cell:{}:{}'
+GLOBAL_KEY = 'gamemodels:quest-global:{}'
+COMPLETED_KEY = 'gamemodels:completed-quests:{}'
+
+
+def _timeout():
+    return getattr(settings, 'QUEST_CATALOGUE_TIMEOUT', 3600)
+
+
+def _cell_entries(cells, version):
+    """
+    ``(quest_id, min_player_level, latitude, longitude)`` for active quests targeting each cell.
+    """
+    keys = {CELL_KEY.format(version, cell): cell for cell in cells}
+    found = cache.get_many(list(keys))
+    missing = [cell for key, cell in keys.items() if key not in found]
+    if missing:
+        built = {cell: [] for cell in missing}
+        rows = Quest.objects.filter(
+            geo.cells_q(missing, field='target_location__geohash'), is_active=True
+        ).values_list('id', 'min_player_level', 'target_location__latitude',
+                      'target_location__longitude', 'target_location__geohash')
+        for quest_id, min_level, lat, lon, geohash in rows:
+            built[geohash[:CELL_PRECISION]].append((quest_id, min_level, lat, lon))
+        cache.set_many({CELL_KEY.format(version, cell): entries for cell, entries in built.items()}, _timeout())
+        found.update({CELL_KEY.format(version, cell): entries for cell, entries in built.items()})
+    return [entry for entries in found.values() for entry in entries]
+
+
+def _global_entries(version):
+    """
+    ``(quest_id, min_player_level)`` for active quests without a target location.
+    """
+    key = GLOBAL_KEY.format(version)
+    entries = cache.get(key)
+    if entries is None:
+        entries = list(Quest.objects.filter(is_active=True, target_location__isnull=True)
+                       .values_list('id', 'min_player_level'))
+        cache.set(key, entries, _timeout())
+    return entries
+
+
+def completed_quest_ids(player_id):
+    key = COMPLETED_KEY.format(player_id)
+    completed = cache.get(key)
+    if completed is None:
+        completed = frozenset(PlayerQuestProgress.objects.filter(
+            player_id=player_id, status='COMPLETED'
+        ).values_list('quest_id', flat=True))
+        cache.set(key, completed, _timeout())
+    return completed
+
+
+def forget_completed_quests(player_id):
+    cache.delete(COMPLETED_KEY.format(player_id))
+
+
+def available_quest_ids(player):
+    """
+    Ids of quests the player can take at their current position.
+
+    Looks up the cells covering the player's ±0.1° box instead of scanning
+    Quest, then drops quests above the player's level and ones already completed.
+    """
+    version = caching.get_version('quests')
+    lat, lon = player.current_latitude, player.current_longitude
+    min_lat, max_lat = lat - QUEST_RADIUS_DEGREES, lat + QUEST_RADIUS_DEGREES
+    min_lon, max_lon = lon - QUEST_RADIUS_DEGREES, lon + QUEST_RADIUS_DEGREES
+    cells = geo.bbox_cells(min_lat, max_lat, min_lon, max_lon, precision=CELL_PRECISION)
+
+    completed = completed_quest_ids(player.pk)
+    ids = {
+        quest_id for quest_id, min_level, q_lat, q_lon in _cell_entries(cells, version)
+        if min_level <= player.level and min_lat <= q_lat <= max_lat and min_lon <= q_lon <= max_lon
+    }
+    ids.update(quest_id for quest_id, min_level in _global_entries(version) if min_level <= player.level)
+    return ids - completed
+
+
+def triggered_quest_ids(player, latitude, longitude):
+    """
+    Ids of available quests whose target location is within trigger range of a point.
+    """
+    radius_m = getattr(settings, 'QUEST_TRIGGER_RADIUS_M', 50)
+    cells = geo.bbox_cells(*geo.radius_bbox(latitude, longitude, radius_m), precision=CELL_PRECISION)
+    completed = completed_quest_ids(player.pk)
+    return {
+        quest_id for quest_id, min_level, q_lat, q_lon in _cell_entries(cells, caching.get_version('quests'))
+        if min_level <= player.level and quest_id not in completed
+        and geo.haversine_m(latitude, longitude, q_lat, q_lon) <= radius_m
+    }
@@ -0,0 +1,298 @@
+# gamemodels/realtime.py
+# WebSocket push of nearby POIs, players and quest triggers, served straight
+# from the ASGI entry point (see game/asgi.py). Consumers only see each other
+# within one process, so the Procfile runs a single ``realtime`` worker.
+import asyncio
+import json
+from collections import defaultdict
+from itertools import count
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from auth_app.authentication import is_user_active
+
+from . import geo, presence, quest_catalogue
+from .models import MagicalLocation, PlayerProfile
+
+CELL_PRECISION = 6  # ~1.2km x 0.6km; a client watches its cell and the eight around it
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_UNKNOWN_ROUTE = 4404
+CLOSE_TOO_SLOW = 4429
+OVERFLOW = {'type': 'overflow'}
+
+
+def queue_size():
+    return getattr(settings, 'REALTIME_QUEUE_SIZE', 256)
+
+
+class InProcessChannelLayer:
+    """
+    Minimal group fan-out between consumers running in the same process.
+
+    Mirrors the group_add/group_discard/group_send shape of a channel layer so
+    a shared backend can replace it when the game runs on several workers.
+    Each channel buffers at most REALTIME_QUEUE_SIZE messages; a channel
+    that overflows is removed from its groups and told to close.
+    """
+
+    def __init__(self):
+        self.groups = defaultdict(dict)
+        self._ids = count()
+
+    def new_channel(self):
+        return f'inprocess.{next(self._ids)}', asyncio.Queue(maxsize=queue_size() + 1)
+
+    async def group_add(self, group, channel_name, queue):
+        self.groups[group][channel_name] = queue
+
+    async def group_discard(self, group, channel_name):
+        members = self.groups.get(group)
+        if members is not None:
+            members.pop(channel_name, None)
+            if not members:
+                del self.groups[group]
+
+    async def group_send(self, group, message):
+        await self.group_send_many([group], message)
+
+    async def group_send_many(self, groups, message):
+        # Each channel receives the message once even if it is in several groups.
+        recipients = {}
+        for group in groups:
+            recipients.update(self.groups.get(group, {}))
+        for channel_name, queue in recipients.items():
+            # The extra slot is kept for the overflow marker.
+            if queue.qsize() < queue.maxsize - 1:
+                queue.put_nowait(message)
+            elif queue.qsize() == queue.maxsize - 1:
+                queue.put_nowait(OVERFLOW)
+                self.discard_channel(channel_name)
+
+    def discard_channel(self, channel_name):
+        for group in [group for group, members in self.groups.items() if channel_name in members]:
+            members = self.groups[group]
+            members.pop(channel_name)
+            if not members:
+                del self.groups[group]
+
+
+channel_layer = InProcessChannelLayer()
+
+
+def neighbourhood_cells(latitude, longitude):
+    """
+    The geohash cell containing the point plus its eight neighbours.
+    """
+    dlat, dlon = geo.cell_size(CELL_PRECISION)
+    return geo.bbox_cells(latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon,
+                          precision=CELL_PRECISION)
+
+
+def cell_group(cell):
+    return f'cell.{cell}'
+
+
+class NearbyConsumer:
+    """
+    Streams diffs of what is around a player over one WebSocket.
+
+    Clients connect with ``?token=<access token>`` and send
+    ``{"type": "position", "latitude": .., "longitude": ..}``. The server
+    replies with ``pois`` diffs when the player's cell changes, ``player``
+    events for other players in the surrounding cells, and ``quest_trigger``
+    messages when the player walks into range of an available quest.
+    Players already online in newly watched cells are sent as ``entered``
+    from the presence store. A client that falls REALTIME_QUEUE_SIZE
+    messages behind is disconnected with CLOSE_TOO_SLOW.
+    """
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.channel_name, self.queue = channel_layer.new_channel()
+        self.profile = None
+        self.cell = None
+        self.cells = set()
+        self.groups = set()
+        self.pois = {}
+        self.players = {}
+        self.triggered = set()
+
+    @classmethod
+    async def as_asgi(cls, scope, receive, send):
+        await cls(scope, receive, send).run()
+
+    async def run(self):
+        message = await self.receive()
+        if message['type'] != 'websocket.connect':
+            return
+        self.profile = await self.authenticate()
+        if self.profile is None:
+            await self.send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+            return
+        await self.send({'type': 'websocket.accept'})
+
+        pump = asyncio.ensure_future(self.forward_group_messages())
+        try:
+            while True:
+                message = await self.receive()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                if message['type'] == 'websocket.receive':
+                    await self.handle_text(message.get('text') or '')
+        finally:
+            pump.cancel()
+            await self.leave()
+
+    async def authenticate(self):
+        params = parse_qs(self.scope.get('query_string', b'').decode())
+        raw_token = (params.get('token') or [None])[0]
+        if not raw_token:
+            return None
+        try:
+            token = AccessToken(raw_token)
+            user_id = token[api_settings.USER_ID_CLAIM]
+        except (TokenError, KeyError):
+            return None
+        if not await sync_to_async(is_user_active)(user_id):
+            return None
+        try:
+            profile = await PlayerProfile.objects.aget(user_id=user_id)
+        except PlayerProfile.DoesNotExist:
+            return None
+        profile.username = token.get('username', '')
+        return profile
+
+    async def send_json(self, payload):
+        await self.send({'type': 'websocket.send', 'text': json.dumps(payload)})
+
+    async def handle_text(self, text):
+        try:
+            payload = json.loads(text)
+            if payload.get('type') != 'position':
+                raise ValueError
+            latitude, longitude = float(payload['latitude']), float(payload['longitude'])
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValueError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            await self.send_json({'type': 'error', 'error': 'Expected {"type": "position", "latitude": .., "longitude": ..}'})
+            return
+        await self.update_position(latitude, longitude)
+
+    async def update_position(self, latitude, longitude):
+        await sync_to_async(presence.heartbeat)(self.profile.pk, self.profile.username, latitude, longitude)
+        cell = geo.encode(latitude, longitude, CELL_PRECISION)
+        notify = {cell_group(cell)}
+        if cell != self.cell:
+            # Watchers of the old cell learn the new one and drop us if it is out of their range.
+            if self.cell is not None:
+                notify.add(cell_group(self.cell))
+            self.cell = cell
+            self.cells = neighbourhood_cells(latitude, longitude)
+            await self.move_groups(self.cells)
+            await self.send_poi_diff(self.cells)
+            await self.forget_players_outside(self.cells)
+            await self.send_occupants(self.cells)
+        await channel_layer.group_send_many(notify, self.player_message(
+            'moved', latitude=latitude, longitude=longitude, cell=cell
+        ))
+        await self.send_quest_triggers(latitude, longitude)
+
+    def player_message(self, event, **extra):
+        return {'type': 'player', 'event': event, 'player_id': self.profile.pk,
+                'username': self.profile.username, 'sender': self.channel_name, **extra}
+
+    async def move_groups(self, cells):
+        groups = {cell_group(cell) for cell in cells}
+        for group in self.groups - groups:
+            await channel_layer.group_discard(group, self.channel_name)
+        for group in groups - self.groups:
+            await channel_layer.group_add(group, self.channel_name, self.queue)
+        self.groups = groups
+
+    async def send_poi_diff(self, cells):
+        current = {}
+        rows = MagicalLocation.objects.filter(geo.cells_q(cells), is_active=True).values(
+            'id', 'name', 'latitude', 'longitude', 'poi_type'
+        )
+        async for row in rows:
+            current[row['id']] = row
+        added = [row for poi_id, row in current.items() if self.pois.get(poi_id) != row]
+        removed = [poi_id for poi_id in self.pois if poi_id not in current]
+        self.pois = current
+        if added or removed:
+            await self.send_json({'type': 'pois', 'added': added, 'removed': removed})
+
+    async def forget_players_outside(self, cells):
+        for player_id, cell in list(self.players.items()):
+            if cell not in cells:
+                del self.players[player_id]
+                await self.send_json({'type': 'player', 'event': 'left', 'player_id': player_id})
+
+    async def send_occupants(self, cells):
+        # Stationary players send nothing over the layer, so read them from presence.
+        records = await sync_to_async(presence.online_in_cells)(cells, exclude=self.profile.pk)
+        for record in records:
+            if record['player_id'] in self.players:
+                continue
+            self.players[record['player_id']] = record['cell']
+            await self.send_json({
+                'type': 'player', 'event': 'entered', 'player_id': record['player_id'],
+                'username': record['username'],
+                'latitude': record['latitude'], 'longitude': record['longitude'],
+            })
+
+    async def send_quest_triggers(self, latitude, longitude):
+        quest_ids = await sync_to_async(quest_catalogue.triggered_quest_ids)(self.profile, latitude, longitude)
+        new = sorted(set(quest_ids) - self.triggered)
+        self.triggered = set(quest_ids)
+        if new:
+            await self.send_json({'type': 'quest_trigger', 'quest_ids': new})
+
+    async def forward_group_messages(self):
+        while True:
+            message = await self.queue.get()
+            if message is OVERFLOW:
+                await self.send({'type': 'websocket.close', 'code': CLOSE_TOO_SLOW})
+                return
+            if message.get('sender') == self.channel_name:
+                continue
+            player_id = message['player_id']
+            if message['event'] == 'left' or message['cell'] not in self.cells:
+                if self.players.pop(player_id, None) is not None:
+                    await self.send_json({'type': 'player', 'event': 'left', 'player_id': player_id})
+                continue
+            event = 'moved' if player_id in self.players else 'entered'
+            self.players[player_id] = message['cell']
+            await self.send_json({
+                'type': 'player', 'event': event, 'player_id': player_id,
+                'username': message['username'],
+                'latitude': message['latitude'], 'longitude': message['longitude'],
+            })
+
+    async def leave(self):
+        if self.cell is not None:
+            await channel_layer.group_send(cell_group(self.cell), self.player_message('left'))
+        for group in self.groups:
+            await channel_layer.group_discard(group, self.channel_name)
+        self.groups = set()
+
+
+websocket_routes = {
+    '/ws/game/nearby/': NearbyConsumer.as_asgi,
+}
+
+
+async def websocket_application(scope, receive, send):
+    consumer = websocket_routes.get(scope['path'])
+    if consumer is None:
+        await receive()
+        await send({'type': 'websocket.close', 'code': CLOSE_UNKNOWN_ROUTE})
+        return
+    await consumer(scope, receive, send)
@@ -0,0 +1,42 @@
+# gamemodels/renderers.py
+import re
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+# Floats below 1e-4 or from 1e16 up are written differently by orjson (0.00001, 1e16)
+# and json.dumps (1e-05, 1e+16). Strings that merely look like them take the slow path too.
+DIVERGENT_FLOAT = re.compile(rb'\d[eE][-+]?\d|0\.0000')
+
+
+def _unsupported(value):
+    raise TypeError
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson.
+
+    The bytes are identical to JSONRenderer's: anything orjson would write
+    differently (datetimes, Decimals, lazy strings, big integers, non-string
+    keys, very small or large floats) falls back to the regular encoder, and U+2028 and
+    U+2029 are escaped the same way. Indented, non-compact or non-strict output
+    always uses the regular encoder. orjson cannot refuse NaN and infinities the
+    way STRICT_JSON does, so the data must not contain them; ValuesSerializer
+    floats are checked when the rows are built.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not self.compact or self.ensure_ascii or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            body = orjson.dumps(data, default=_unsupported, option=(
+                orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            ))
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if DIVERGENT_FLOAT.search(body):
+            return super().render(data, accepted_media_type, renderer_context)
+        return body.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
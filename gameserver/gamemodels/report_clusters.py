@@ -0,0 +1,123 @@
+# gamemodels/report_clusters.py
+# Groups incoming MapReports by geohash cell, report type and time window.
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import geo, photos
+from .models import OPEN_REPORT_STATUSES, MagicalLocation, MapReportCluster
+
+CELL_PRECISION = 7  # ~150m x 150m
+POI_REPORT_TYPES = {'POI_INACCURACY', 'PHOTO_EVIDENCE', 'ACCESS_ISSUE', 'NEW_POI_SUGGESTION'}
+
+
+def cluster_radius_m():
+    return getattr(settings, 'MAP_REPORT_CLUSTER_RADIUS_M', 50)
+
+
+def window_start(moment):
+    """
+    Start of the fixed MAP_REPORT_CLUSTER_WINDOW bucket that ``moment`` falls in.
+    """
+    window = getattr(settings, 'MAP_REPORT_CLUSTER_WINDOW', 6 * 3600)
+    epoch = int(moment.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % window, tz=dt_timezone.utc)
+
+
+def nearest_poi(latitude, longitude):
+    radius = cluster_radius_m()
+    candidates = MagicalLocation.objects.near(latitude, longitude, radius).filter(is_active=True).only(
+        'id', 'latitude', 'longitude'
+    )
+    best = None
+    for location in candidates:
+        distance = geo.haversine_m(latitude, longitude, location.latitude, location.longitude)
+        if distance <= radius and (best is None or distance < best[0]):
+            best = (distance, location)
+    return best[1] if best else None
+
+
+def find_cluster(latitude, longitude, report_type, start):
+    """
+    The open cluster a new report belongs to, if any.
+
+    Looks at the report's cell and its eight neighbours in one query on the
+    (cell, report_type, window_start) key of open clusters, so reports either
+    side of a cell edge still land together; verified or rejected clusters
+    take no new reports. Clusters in the report's own cell win, then the
+    nearest centroid within MAP_REPORT_CLUSTER_RADIUS_M.
+    """
+    cell = geo.encode(latitude, longitude, CELL_PRECISION)
+    dlat, dlon = geo.cell_size(CELL_PRECISION)
+    cells = geo.bbox_cells(latitude - dlat, latitude + dlat, longitude - dlon, longitude + dlon,
+                           precision=CELL_PRECISION)
+    radius = cluster_radius_m()
+    best = None
+    clusters = MapReportCluster.objects.filter(
+        cell__in=cells, report_type=report_type, window_start=start, status__in=OPEN_REPORT_STATUSES
+    )
+    for cluster in clusters:
+        if cluster.cell == cell:
+            return cluster
+        distance = geo.haversine_m(latitude, longitude, cluster.latitude, cluster.longitude)
+        if distance <= radius and (best is None or distance < best[0]):
+            best = (distance, cluster)
+    return best[1] if best else None
+
+
+def attach_report(latitude, longitude, report_type, moment=None):
+    """
+    Find or open the cluster for a new report and count the report in it.
+
+    New clusters for POI-related report types are linked to the nearest active
+    location within the cluster radius. Call inside the transaction that saves
+    the report; returns the cluster with ``report_count`` already incremented.
+    """
+    start = window_start(moment or timezone.now())
+    cluster = find_cluster(latitude, longitude, report_type, start)
+    if cluster is None:
+        cell = geo.encode(latitude, longitude, CELL_PRECISION)
+        related_poi = nearest_poi(latitude, longitude) if report_type in POI_REPORT_TYPES else None
+        try:
+            with transaction.atomic():
+                return MapReportCluster.objects.create(
+                    report_type=report_type, cell=cell, window_start=start, latitude=latitude,
+                    longitude=longitude, related_poi=related_poi, report_count=1,
+                )
+        except IntegrityError:
+            # Another report opened the same cluster first.
+            cluster = MapReportCluster.objects.get(
+                cell=cell, report_type=report_type, window_start=start, status__in=OPEN_REPORT_STATUSES
+            )
+
+    # SET expressions read the row as it was before the UPDATE.
+    MapReportCluster.objects.filter(pk=cluster.pk).update(
+        latitude=(F('latitude') * F('report_count') + latitude) / (F('report_count') + 1),
+        longitude=(F('longitude') * F('report_count') + longitude) / (F('report_count') + 1),
+        report_count=F('report_count') + 1,
+        updated_at=timezone.now(),
+    )
+    cluster.refresh_from_db(fields=['latitude', 'longitude', 'report_count', 'related_poi', 'status'])
+    return cluster
+
+
+def save_report(serializer, **save_kwargs):
+    """
+    Save a validated MapReportSerializer with its cluster and the cluster's POI.
+
+    An uploaded photo is stored as-is and handed to the photo workers once the
+    transaction commits.
+    """
+    data = serializer.validated_data
+    with transaction.atomic():
+        cluster = attach_report(data['latitude'], data['longitude'], data['report_type'])
+        report = serializer.save(
+            cluster=cluster, related_poi=cluster.related_poi,
+            photo_status='PENDING' if data.get('photo') else 'NONE', **save_kwargs
+        )
+        if report.photo:
+            photos.schedule(report.pk)
+    return report
@@ -2,13 +2,99 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import (
     PlayerProfile, Wand, PlayerQuestProgress, Quest, GameItem, PlayerInventory,
-    MagicalLocation, MapReport, PlayerGPSTrace, PlayerWand,
+    MagicalLocation, MapReport, MapReportCluster, PlayerGPSTrace, PlayerWand,
     HOUSE_CHOICES, WAND_CORE_CHOICES, WOOD_TYPE_CHOICES, QUEST_STATUS_CHOICES,
-    POI_TYPE_CHOICES, ITEM_TYPE_CHOICES, MAP_REPORT_TYPE_CHOICES, MAP_REPORT_STATUS_CHOICES
+    POI_TYPE_CHOICES, ITEM_TYPE_CHOICES, MAP_REPORT_TYPE_CHOICES, MAP_REPORT_STATUS_CHOICES,
+    MAX_INVENTORY_QUANTITY
 )
+from django.conf import settings
 from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+import math
+from rest_framework.settings import api_settings
+from . import metrics
 
-class WandSerializer(serializers.ModelSerializer):
+GPS_PACKED_SCALE = 1e6
+GPS_PACKED_LIMIT = 2 ** 53  # Bounds each packed integer, so sums of a batch stay far from float overflow
+
+class TimedRepresentationMixin:
+    """
+    Reports the time spent building response data to the request metrics.
+    """
+    def to_representation(self, instance):
+        with metrics.serializer_timer():
+            return super().to_representation(instance)
+
+class SparseFieldsMixin:
+    """
+    Trims read responses to the comma-separated ``?fields=`` query parameter,
+    e.g. ``?fields=id,latitude,longitude``. Only the top-level serializer of a
+    request is trimmed; nested serializers keep their full shape.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = requested_fields(self.context.get('request'))
+        if wanted is not None:
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+def requested_fields(request):
+    """
+    Field names from a read request's ``?fields=`` parameter, or None.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None
+    fields = getattr(request, 'query_params', request.GET).get('fields')
+    if not fields:
+        return None
+    return {name.strip() for name in fields.split(',') if name.strip()}
+
+def trim_fields(data, request):
+    """
+    Applies ``?fields=`` to an already built response dict, e.g. a cached snapshot.
+    """
+    wanted = requested_fields(request)
+    if wanted is None:
+        return data
+    return {name: value for name, value in data.items() if name in wanted}
+
+@lru_cache(maxsize=None)
+def query_plan(serializer_class):
+    """
+    ``(select_related, prefetch_related)`` lookups a serializer reads.
+
+    Serializers declare the relations their own fields touch in
+    ``Meta.select_related`` and ``Meta.prefetch_related``. Nested serializers
+    add their relation and their own plan under their source, so plans
+    compose; ``many=True`` nesting turns into prefetches.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    select = list(getattr(meta, 'select_related', ()))
+    prefetch = list(getattr(meta, 'prefetch_related', ()))
+    for name, field in getattr(serializer_class, '_declared_fields', {}).items():
+        many = isinstance(field, serializers.ListSerializer)
+        nested = field.child if many else field
+        if not isinstance(nested, serializers.BaseSerializer) or field.source == '*':
+            continue
+        path = (field.source or name).replace('.', '__')
+        nested_select, nested_prefetch = query_plan(type(nested))
+        if many:
+            prefetch += [path] + [f'{path}__{lookup}' for lookup in nested_select + nested_prefetch]
+        else:
+            select += [path] + [f'{path}__{lookup}' for lookup in nested_select]
+            prefetch += [f'{path}__{lookup}' for lookup in nested_prefetch]
+    return tuple(dict.fromkeys(select)), tuple(dict.fromkeys(prefetch))
+
+def apply_query_plan(queryset, serializer_class):
+    select, prefetch = query_plan(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+class WandSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     core_display = serializers.CharField(source='get_core_display', read_only=True)
     wood_type_display = serializers.CharField(source='get_wood_type_display', read_only=True)
 
@@ -16,7 +102,7 @@ class WandSerializer(serializers.ModelSerializer):
         model = Wand
         fields = ['id', 'core', 'core_display', 'wood_type', 'wood_type_display', 'length_inches', 'flexibility']
 
-class PlayerWandSerializer(serializers.ModelSerializer):
+class PlayerWandSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     wand = WandSerializer(read_only=True)
     wand_id = serializers.PrimaryKeyRelatedField(queryset=Wand.objects.all(), source='wand', write_only=True)
     player_id = serializers.PrimaryKeyRelatedField(queryset=PlayerProfile.objects.all(), source='player', write_only=True, required=False)
@@ -32,13 +118,14 @@ class PlayerWandSerializer(serializers.ModelSerializer):
             validated_data['player'] = self.context['player']
         return super().create(validated_data)
 
-class PlayerProfileSerializer(serializers.ModelSerializer):
+class PlayerProfileSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
     house_display = serializers.CharField(source='get_house_display', read_only=True)
 
     class Meta:
         model = PlayerProfile
+        select_related = ['user']
         fields = [
             'id', 'user', 'username', 'email', 'house', 'house_display', 'level', 'xp',
             'avatar_url', 'current_latitude', 'current_longitude', 'last_seen'
@@ -51,26 +138,27 @@ class PlayerProfileSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
-class GameItemSerializer(serializers.ModelSerializer):
+class GameItemSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     item_type_display = serializers.CharField(source='get_item_type_display', read_only=True)
 
     class Meta:
         model = GameItem
         fields = ['id', 'name', 'description', 'item_type', 'item_type_display', 'image_url', 'rarity']
 
-class PlayerInventorySerializer(serializers.ModelSerializer):
+class PlayerInventorySerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     item = GameItemSerializer(read_only=True)
 
     class Meta:
         model = PlayerInventory
         fields = ['id', 'item', 'quantity']
 
-class MagicalLocationSerializer(serializers.ModelSerializer):
+class MagicalLocationSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     poi_type_display = serializers.CharField(source='get_poi_type_display', read_only=True)
     discovered_by_username = serializers.CharField(source='discovered_by.username', read_only=True, allow_null=True)
 
     class Meta:
         model = MagicalLocation
+        select_related = ['discovered_by']
         fields = [
             'id', 'name', 'description', 'latitude', 'longitude', 'poi_type',
             'poi_type_display', 'real_world_identifier', 'discovered_by',
@@ -78,7 +166,7 @@ class MagicalLocationSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
 
-class QuestSerializer(serializers.ModelSerializer):
+class QuestSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     item_reward = GameItemSerializer(read_only=True)
     target_location = MagicalLocationSerializer(read_only=True)
 
@@ -95,7 +183,7 @@ class QuestTitleSerializer(serializers.ModelSerializer):
         model = Quest
         fields = ['id', 'title', 'description', 'xp_reward']
 
-class PlayerQuestProgressSerializer(serializers.ModelSerializer):
+class PlayerQuestProgressSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     quest = QuestTitleSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
 
@@ -103,7 +191,7 @@ class PlayerQuestProgressSerializer(serializers.ModelSerializer):
         model = PlayerQuestProgress
         fields = ['id', 'quest', 'status', 'status_display', 'started_at', 'completed_at']
 
-class MapReportSerializer(serializers.ModelSerializer):
+class MapReportSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     reporter_username = serializers.CharField(source='reporter.username', read_only=True)
     related_poi = MagicalLocationSerializer(read_only=True)
     report_type_display = serializers.CharField(source='get_report_type_display', read_only=True)
@@ -111,21 +199,123 @@ class MapReportSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = MapReport
+        select_related = ['reporter']
         fields = [
             'id', 'reporter', 'reporter_username', 'latitude', 'longitude',
             'report_type', 'report_type_display', 'description_text', 'photo',
             'related_poi', 'timestamp', 'status', 'status_display',
-            'ai_confidence_score', 'admin_notes', 'resolved_at', 'resolver'
+            'ai_confidence_score', 'admin_notes', 'resolved_at', 'resolver',
+            'agree_count', 'disagree_count', 'confidence_score', 'cluster',
+            'photo_status', 'photo_thumbnail', 'photo_webp', 'photo_duplicate_of'
+        ]
+        read_only_fields = ['reporter', 'timestamp', 'status', 'ai_confidence_score', 'admin_notes', 'resolved_at', 'resolver',
+                            'agree_count', 'disagree_count', 'confidence_score', 'cluster',
+                            'photo_status', 'photo_thumbnail', 'photo_webp', 'photo_duplicate_of']
+        # Clients show the processed variants; the original is only uploaded.
+        extra_kwargs = {'photo': {'write_only': True}}
+
+class MapReportClusterSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
+    related_poi = MagicalLocationSerializer(read_only=True)
+    report_type_display = serializers.CharField(source='get_report_type_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+
+    class Meta:
+        model = MapReportCluster
+        fields = [
+            'id', 'report_type', 'report_type_display', 'latitude', 'longitude', 'window_start',
+            'related_poi', 'report_count', 'status', 'status_display', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['reporter', 'timestamp', 'status', 'ai_confidence_score', 'admin_notes', 'resolved_at', 'resolver']
 
-class PlayerGPSTraceSerializer(serializers.ModelSerializer):
+class ReportVerificationSerializer(serializers.Serializer):
+    agrees_with_report = serializers.BooleanField()
+    comment = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+class PlayerGPSTraceSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = PlayerGPSTrace
         fields = ['id', 'player', 'timestamp', 'latitude', 'longitude']
         read_only_fields = ['player', 'timestamp']
 
-class DashboardSerializer(serializers.Serializer):
+class PlayerLocationSerializer(serializers.Serializer):
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+
+class PlayerGPSTracePointSerializer(serializers.Serializer):
+    timestamp = serializers.DateTimeField()
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+
+class PlayerGPSTraceBatchSerializer(serializers.Serializer):
+    """
+    A batch of client-timestamped fixes, either as a list of points or packed.
+
+    The packed form is a flat list of integers: the first triple is
+    ``[epoch_ms, latitude * 1e6, longitude * 1e6]`` and every following triple
+    holds deltas from the previous point.
+    """
+    points = PlayerGPSTracePointSerializer(many=True, required=False)
+    packed = serializers.ListField(
+        child=serializers.IntegerField(min_value=-GPS_PACKED_LIMIT, max_value=GPS_PACKED_LIMIT), required=False
+    )
+
+    def max_points(self):
+        return getattr(settings, 'GPS_TRACE_BATCH_MAX_POINTS', 500)
+
+    def validate_packed(self, value):
+        if len(value) % 3:
+            raise serializers.ValidationError("Packed traces must contain [timestamp, latitude, longitude] triples.")
+        if len(value) // 3 > self.max_points():
+            raise serializers.ValidationError(f"A batch may contain at most {self.max_points()} points.")
+        points = []
+        ts = lat = lon = 0
+        for i in range(0, len(value), 3):
+            ts += value[i]
+            lat += value[i + 1]
+            lon += value[i + 2]
+            latitude, longitude = lat / GPS_PACKED_SCALE, lon / GPS_PACKED_SCALE
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise serializers.ValidationError(f"Point {i // 3} is out of range.")
+            try:
+                timestamp = datetime.fromtimestamp(ts / 1000, tz=dt_timezone.utc)
+            except (OverflowError, OSError, ValueError):
+                raise serializers.ValidationError(f"Point {i // 3} has an invalid timestamp.")
+            points.append({'timestamp': timestamp, 'latitude': latitude, 'longitude': longitude})
+        return points
+
+    def validate(self, attrs):
+        if ('points' in attrs) == ('packed' in attrs):
+            raise serializers.ValidationError("Provide exactly one of 'points' or 'packed'.")
+        points = attrs.get('points') or attrs.get('packed')
+        if not points:
+            raise serializers.ValidationError("A batch must contain at least one point.")
+        if len(points) > self.max_points():
+            raise serializers.ValidationError(f"A batch may contain at most {self.max_points()} points.")
+        latest_allowed = timezone.now() + timedelta(seconds=getattr(settings, 'GPS_TRACE_MAX_CLOCK_SKEW', 60))
+        if max(point['timestamp'] for point in points) > latest_allowed:
+            raise serializers.ValidationError("Timestamps may not be in the future.")
+        return {'points': points}
+
+class InventoryDeltaSerializer(serializers.Serializer):
+    item_id = serializers.IntegerField()
+    delta = serializers.IntegerField(min_value=-MAX_INVENTORY_QUANTITY, max_value=MAX_INVENTORY_QUANTITY)
+
+class InventoryBatchSerializer(serializers.Serializer):
+    items = InventoryDeltaSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, value):
+        max_items = getattr(settings, 'INVENTORY_BATCH_MAX_ITEMS', 100)
+        if len(value) > max_items:
+            raise serializers.ValidationError(f"A batch may change at most {max_items} items.")
+        return value
+
+    def get_deltas(self):
+        # Collapse repeated item ids into one delta each.
+        deltas = {}
+        for change in self.validated_data['items']:
+            deltas[change['item_id']] = deltas.get(change['item_id'], 0) + change['delta']
+        return deltas
+
+class DashboardSerializer(TimedRepresentationMixin, serializers.Serializer):
     profile = PlayerProfileSerializer(read_only=True)
     wand = WandSerializer(read_only=True, allow_null=True)
     completed_quests_count = serializers.IntegerField(read_only=True)
@@ -133,17 +323,9 @@ class DashboardSerializer(serializers.Serializer):
     in_progress_quests_count = serializers.IntegerField(read_only=True)
 
     def to_representation(self, instance_profile):
-        player_wand = PlayerWand.objects.filter(player=instance_profile).select_related('wand').first()
-        user_wand = player_wand.wand if player_wand else None
-        completed_quests_count = PlayerQuestProgress.objects.filter(
-            player=instance_profile, status='COMPLETED'
-        ).count()
-        pending_quests_count = PlayerQuestProgress.objects.filter(
-            player=instance_profile, status='PENDING'
-        ).count()
-        in_progress_quests_count = PlayerQuestProgress.objects.filter(
-            player=instance_profile, status__in=['IN_PROGRESS', 'ACCEPTED']
-        ).count()
+        if not hasattr(instance_profile, 'completed_quests_count'):
+            instance_profile = PlayerProfile.objects.with_dashboard_stats().get(pk=instance_profile.pk)
+        user_wand = instance_profile.dashboard_wand
 
         profile_data = PlayerProfileSerializer(instance_profile, context=self.context).data
         wand_data = WandSerializer(user_wand, context=self.context).data if user_wand else None
@@ -151,7 +333,123 @@ class DashboardSerializer(serializers.Serializer):
         return {
             'profile': profile_data,
             'wand': wand_data,
-            'completed_quests_count': completed_quests_count,
-            'pending_quests_count': pending_quests_count,
-            'in_progress_quests_count': in_progress_quests_count,
-        }
\ No newline at end of file
+            'completed_quests_count': instance_profile.completed_quests_count,
+            'pending_quests_count': instance_profile.pending_quests_count,
+            'in_progress_quests_count': instance_profile.in_progress_quests_count,
+        }
+
+_datetime_field = serializers.DateTimeField(read_only=True)
+
+def _display(model, field_name):
+    # Same lookup as Model.get_<field>_display().
+    return dict(model._meta.get_field(field_name).flatchoices)
+
+def _datetime(value):
+    return None if value is None else _datetime_field.to_representation(value)
+
+def _float(value):
+    # orjson would write NaN and infinities as null; raise the ValueError the regular renderer raises.
+    value = float(value)
+    if api_settings.STRICT_JSON and not math.isfinite(value):
+        raise ValueError(f"Out of range float values are not JSON compliant: {value!r}")
+    return value
+
+class ValuesSerializer:
+    """
+    Read-only serializer over ``.values()`` rows for hot list endpoints.
+
+    Subclasses name the ``lookups`` they read and build each row's output in
+    ``to_representation()``, matching a ModelSerializer's JSON byte for byte
+    without creating model instances or DRF fields per row; the default
+    returns the looked-up columns unchanged. Float columns go through
+    ``_float()``. ``?fields=`` trims the output like SparseFieldsMixin. Views
+    opt in through ``values_serializer_class`` (see gamemodels.fast_reads).
+    """
+    lookups = ()
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.lookups)
+
+    def to_representation(self, row):
+        return {name: row[name] for name in self.lookups}
+
+    def wanted_fields(self):
+        return requested_fields(self.context.get('request'))
+
+    @property
+    def data(self):
+        with metrics.serializer_timer():
+            rows = self.instance if self.many else [self.instance]
+            data = [self.to_representation(row) for row in rows]
+            wanted = self.wanted_fields()
+            if wanted is not None:
+                data = [{name: value for name, value in item.items() if name in wanted} for item in data]
+        return data if self.many else data[0]
+
+class GameItemValuesSerializer(ValuesSerializer):
+    lookups = ('id', 'name', 'description', 'item_type', 'image_url', 'rarity')
+    item_type_labels = _display(GameItem, 'item_type')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'item_type': row['item_type'],
+            'item_type_display': str(self.item_type_labels.get(row['item_type'], row['item_type'])),
+            'image_url': row['image_url'],
+            'rarity': row['rarity'],
+        }
+
+class MagicalLocationValuesSerializer(ValuesSerializer):
+    lookups = (
+        'id', 'name', 'description', 'latitude', 'longitude', 'poi_type', 'real_world_identifier',
+        'discovered_by', 'discovered_by__username', 'is_active', 'verification_score', 'created_at', 'updated_at',
+    )
+    poi_type_labels = _display(MagicalLocation, 'poi_type')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'latitude': _float(row['latitude']),
+            'longitude': _float(row['longitude']),
+            'poi_type': row['poi_type'],
+            'poi_type_display': str(self.poi_type_labels.get(row['poi_type'], row['poi_type'])),
+            'real_world_identifier': row['real_world_identifier'],
+            'discovered_by': row['discovered_by'],
+            'discovered_by_username': row['discovered_by__username'],
+            'is_active': row['is_active'],
+            'verification_score': row['verification_score'],
+            'created_at': _datetime(row['created_at']),
+            'updated_at': _datetime(row['updated_at']),
+        }
+
+class PlayerQuestProgressValuesSerializer(ValuesSerializer):
+    lookups = (
+        'id', 'quest_id', 'quest__title', 'quest__description', 'quest__xp_reward',
+        'status', 'started_at', 'completed_at',
+    )
+    status_labels = _display(PlayerQuestProgress, 'status')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'quest': {
+                'id': row['quest_id'],
+                'title': row['quest__title'],
+                'description': row['quest__description'],
+                'xp_reward': row['quest__xp_reward'],
+            },
+            'status': row['status'],
+            'status_display': str(self.status_labels.get(row['status'], row['status'])),
+            'started_at': _datetime(row['started_at']),
+            'completed_at': _datetime(row['completed_at']),
+        }
@@ -0,0 +1,203 @@
+# gamemodels/services.py
+# Write paths that must stay correct under concurrent requests from one player.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import caching, geo, presence
+from .models import MAX_INVENTORY_QUANTITY, GameItem, PlayerInventory, PlayerProfile, PlayerQuestProgress
+
+XP_PER_LEVEL = 1000
+LOCATION_WRITE_KEY = 'gamemodels:location-write:{}'
+LOCATION_PENDING_KEY = 'gamemodels:location-pending:{}'
+LOCATION_PENDING_TIMEOUT = 24 * 3600  # A coalesced fix waits this long for its trailing write
+
+
+class QuestAlreadyCompleted(Exception):
+    pass
+
+
+class InventoryError(Exception):
+    def __init__(self, item_ids):
+        super().__init__(item_ids)
+        self.item_ids = sorted(item_ids)
+
+
+class UnknownItems(InventoryError):
+    pass
+
+
+class InsufficientQuantity(InventoryError):
+    pass
+
+
+class QuantityTooLarge(InventoryError):
+    pass
+
+
+def grant_item(player_id, item_id, quantity=1):
+    """
+    Add ``quantity`` of an item with a conditional UPDATE, inserting the row if missing.
+    """
+    updated = PlayerInventory.objects.filter(player_id=player_id, item_id=item_id).update(
+        quantity=F('quantity') + quantity
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            PlayerInventory.objects.create(player_id=player_id, item_id=item_id, quantity=quantity)
+    except IntegrityError:
+        # A concurrent request inserted the row first; apply ours on top of it.
+        PlayerInventory.objects.filter(player_id=player_id, item_id=item_id).update(
+            quantity=F('quantity') + quantity
+        )
+
+
+def complete_quest(player, progress_id, idempotency_key=None):
+    """
+    Complete a quest and apply its rewards in one transaction.
+
+    The progress row is locked for the duration, XP is added with an F()
+    expression and the item reward with a conditional UPDATE, so double taps
+    and retries cannot lose or duplicate rewards. Replaying a request with the
+    idempotency key that completed the quest returns ``(progress, False)``.
+
+    Raises PlayerQuestProgress.DoesNotExist or QuestAlreadyCompleted.
+    """
+    with transaction.atomic():
+        progress = (
+            PlayerQuestProgress.objects.select_for_update(of=('self',))
+            .select_related('quest')
+            .get(pk=progress_id, player=player)
+        )
+        if progress.status == 'COMPLETED':
+            if idempotency_key and progress.completion_key == idempotency_key:
+                return progress, False
+            raise QuestAlreadyCompleted()
+
+        quest = progress.quest
+        PlayerProfile.objects.filter(pk=player.pk).update(
+            xp=F('xp') + quest.xp_reward,
+            level=(F('xp') + quest.xp_reward) / XP_PER_LEVEL + 1,
+        )
+        if quest.item_reward_id:
+            grant_item(player.pk, quest.item_reward_id)
+
+        progress.status = 'COMPLETED'
+        progress.completed_at = timezone.now()
+        progress.completion_key = idempotency_key
+        progress.save(update_fields=['status', 'completed_at', 'completion_key'])
+    return progress, True
+
+
+def apply_inventory_deltas(player_id, deltas):
+    """
+    Apply ``{item_id: delta}`` changes to a player's inventory in one transaction.
+
+    Missing rows for positive deltas are inserted first so every touched row
+    can be locked, new quantities are checked against zero, and the result is
+    written back with a single INSERT ... ON CONFLICT upsert on
+    ``('player', 'item')``. PlayerInventory.quantity is a PositiveIntegerField,
+    so the database rejects negative values as well.
+
+    Returns the touched PlayerInventory rows, with ``item`` populated, ordered by item id.
+    Raises UnknownItems, InsufficientQuantity or QuantityTooLarge.
+    """
+    items = GameItem.objects.in_bulk(list(deltas))
+    unknown = set(deltas) - set(items)
+    if unknown:
+        raise UnknownItems(unknown)
+
+    with transaction.atomic():
+        PlayerInventory.objects.bulk_create(
+            [PlayerInventory(player_id=player_id, item_id=item_id, quantity=0)
+             for item_id, delta in deltas.items() if delta > 0],
+            ignore_conflicts=True,
+        )
+        current = dict(
+            PlayerInventory.objects.select_for_update()
+            .filter(player_id=player_id, item_id__in=list(deltas))
+            .values_list('item_id', 'quantity')
+        )
+        new_quantities = {item_id: current.get(item_id, 0) + delta for item_id, delta in deltas.items()}
+        insufficient = {item_id for item_id, quantity in new_quantities.items() if quantity < 0}
+        if insufficient:
+            raise InsufficientQuantity(insufficient)
+        too_large = {item_id for item_id, quantity in new_quantities.items() if quantity > MAX_INVENTORY_QUANTITY}
+        if too_large:
+            raise QuantityTooLarge(too_large)
+
+        rows = PlayerInventory.objects.bulk_create(
+            [PlayerInventory(player_id=player_id, item_id=item_id, quantity=quantity)
+             for item_id, quantity in sorted(new_quantities.items()) if item_id in current],
+            update_conflicts=True,
+            unique_fields=['player', 'item'],
+            update_fields=['quantity'],
+        )
+    for row in rows:
+        row.item = items[row.item_id]
+    return rows
+
+
+def location_interval():
+    return getattr(settings, 'LOCATION_UPDATE_MIN_INTERVAL', 5)
+
+
+def update_location(player, latitude, longitude):
+    """
+    Store a player's position with a column-only UPDATE.
+
+    Every fix refreshes the player's presence heartbeat. Fixes closer than
+    LOCATION_UPDATE_MIN_DISTANCE_M to the stored position are then ignored,
+    and only one write per LOCATION_UPDATE_MIN_INTERVAL seconds reaches the
+    database. Fixes inside the interval are stashed in the cache, and the
+    newest one is written by the next write after the interval, or by
+    write_pending_location() when no other fix follows the burst.
+    Neither the row's other columns nor post_save handlers are touched, so the
+    write does not contend with XP updates on the same row.
+
+    Returns ``'updated'``, ``'coalesced'`` or ``'ignored'``.
+    """
+    presence.heartbeat(player.pk, player.user.username, latitude, longitude)
+    if player.current_latitude is not None and player.current_longitude is not None:
+        moved = geo.haversine_m(player.current_latitude, player.current_longitude, latitude, longitude)
+        if moved < getattr(settings, 'LOCATION_UPDATE_MIN_DISTANCE_M', 10):
+            # Back near the stored position: an older stashed fix is no longer the latest.
+            cache.delete(LOCATION_PENDING_KEY.format(player.pk))
+            return 'ignored'
+
+    interval = location_interval()
+    if interval and not cache.add(LOCATION_WRITE_KEY.format(player.pk), True, interval):
+        cache.set(LOCATION_PENDING_KEY.format(player.pk), (latitude, longitude), LOCATION_PENDING_TIMEOUT)
+        return 'coalesced'
+
+    _write_location(player, latitude, longitude)
+    return 'updated'
+
+
+def write_pending_location(player):
+    """
+    Trailing write of the player's newest coalesced fix once the interval has passed.
+
+    Called on heartbeats, so the last fix of a burst reaches the database
+    even when no further fix arrives. Returns True when a position was written.
+    """
+    pending = cache.get(LOCATION_PENDING_KEY.format(player.pk))
+    if pending is None:
+        return False
+    interval = location_interval()
+    if interval and not cache.add(LOCATION_WRITE_KEY.format(player.pk), True, interval):
+        return False
+    _write_location(player, *pending)
+    return True
+
+
+def _write_location(player, latitude, longitude):
+    # A fix stashed concurrently with this write can be dropped; the next fix replaces it.
+    cache.delete(LOCATION_PENDING_KEY.format(player.pk))
+    PlayerProfile.objects.filter(pk=player.pk).update(current_latitude=latitude, current_longitude=longitude)
+    player.current_latitude, player.current_longitude = latitude, longitude
+    caching.invalidate_dashboard(player.pk)
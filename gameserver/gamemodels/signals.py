@@ -1,8 +1,14 @@
 # gamemodels_app/signals.py
-from django.db.models.signals import post_save
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User # User model is from django.contrib.auth
-from .models import PlayerProfile
+from .models import (
+    GameItem, MagicalLocation, PlayerProfile, PlayerQuestProgress, PlayerWand, Quest, ReportVerification
+)
+from . import caching, quest_catalogue, tiles, verification
 
 @receiver(post_save, sender=User)
 def create_player_profile_on_user_creation(sender, instance, created, **kwargs):
@@ -12,4 +18,92 @@ def create_player_profile_on_user_creation(sender, instance, created, **kwargs):
     if created:
         PlayerProfile.objects.create(user=instance)
         # Note: If wizard_name handling is done in RegisterSerializer (auth_app),
-        # it might update the profile there after it's created by this signal.
\ No newline at end of file
+        # it might update the profile there after it's created by this signal.
+
+@receiver(post_save, sender=PlayerProfile)
+@receiver(post_delete, sender=PlayerProfile)
+def invalidate_dashboard_on_profile_change(sender, instance, **kwargs):
+    # After commit, so a concurrent read cannot re-cache the old row.
+    transaction.on_commit(partial(caching.invalidate_dashboard, instance.pk))
+
+@receiver(post_save, sender=PlayerQuestProgress)
+@receiver(post_delete, sender=PlayerQuestProgress)
+@receiver(post_save, sender=PlayerWand)
+@receiver(post_delete, sender=PlayerWand)
+def invalidate_dashboard_on_player_row_change(sender, instance, **kwargs):
+    transaction.on_commit(partial(caching.invalidate_dashboard, instance.player_id))
+
+@receiver(post_save, sender=PlayerQuestProgress)
+@receiver(post_delete, sender=PlayerQuestProgress)
+def forget_completed_quests_on_progress_change(sender, instance, **kwargs):
+    transaction.on_commit(partial(quest_catalogue.forget_completed_quests, instance.player_id))
+
+@receiver(post_save, sender=Quest)
+@receiver(post_delete, sender=Quest)
+@receiver(post_save, sender=MagicalLocation)
+@receiver(post_delete, sender=MagicalLocation)
+def refresh_quest_catalogue(sender, instance, **kwargs):
+    transaction.on_commit(partial(caching.bump_version, 'quests'))
+
+@receiver(post_save, sender=User)
+def invalidate_dashboard_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Username and email are part of the dashboard profile; login only touches last_login.
+    """
+    if created or update_fields == frozenset({'last_login'}):
+        return
+    for profile_id in PlayerProfile.objects.filter(user=instance).values_list('pk', flat=True):
+        transaction.on_commit(partial(caching.invalidate_dashboard, profile_id))
+
+@receiver(post_save, sender=GameItem)
+@receiver(post_delete, sender=GameItem)
+def bump_item_catalogue(sender, instance, **kwargs):
+    transaction.on_commit(partial(caching.bump_version, 'items'))
+
+@receiver(post_save, sender=MagicalLocation)
+@receiver(post_delete, sender=MagicalLocation)
+def bump_location_catalogue(sender, instance, **kwargs):
+    transaction.on_commit(partial(caching.bump_version, 'locations'))
+
+@receiver(post_save, sender=ReportVerification)
+def count_report_verification(sender, instance, created, **kwargs):
+    if created:
+        verification.record_verification(instance)
+
+@receiver(post_delete, sender=ReportVerification)
+def uncount_report_verification(sender, instance, **kwargs):
+    verification.record_verification(instance, sign=-1)
+
+@receiver(pre_save, sender=MagicalLocation)
+def remember_previous_location_point(sender, instance, **kwargs):
+    instance._previous_tile_point = None
+    if instance.pk:
+        instance._previous_tile_point = MagicalLocation.objects.filter(pk=instance.pk).values_list(
+            'latitude', 'longitude'
+        ).first()
+
+@receiver(pre_save, sender=Quest)
+def remember_previous_quest_target(sender, instance, **kwargs):
+    instance._previous_tile_point = None
+    if instance.pk:
+        instance._previous_tile_point = Quest.objects.filter(
+            pk=instance.pk, target_location__isnull=False
+        ).values_list('target_location__latitude', 'target_location__longitude').first()
+
+@receiver(post_save, sender=MagicalLocation)
+@receiver(post_delete, sender=MagicalLocation)
+@receiver(post_save, sender=Quest)
+@receiver(post_delete, sender=Quest)
+def invalidate_map_tiles(sender, instance, **kwargs):
+    """
+    Drop the cached tiles containing the location (or quest target) before and after the change, once committed.
+    """
+    if sender is Quest:
+        location = instance.target_location if instance.target_location_id else None
+        points = {(location.latitude, location.longitude)} if location else set()
+    else:
+        points = {(instance.latitude, instance.longitude)}
+    previous = getattr(instance, '_previous_tile_point', None)
+    if previous:
+        points.add(previous)
+    transaction.on_commit(partial(tiles.invalidate_points, points))
@@ -1,3 +1,1305 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone as dt_timezone
+from importlib import import_module
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from auth_app.authentication import USER_ACTIVE_KEY
+from auth_app.serializers import MyTokenObtainPairSerializer
+
+from . import (
+    benchmark, caching, geo, metrics, poi_clusters, presence, quest_catalogue, realtime, report_clusters, services,
+    tiles, tracks, verification,
+)
+from .async_views import (
+    AsyncMagicalLocationDetailView, AsyncPlayerInventoryListView, AsyncPlayerProfileDetailView, AsyncUserDashboardView
+)
+from .catalogue import CATALOGUE_KEY
+from .middleware import resolve_player
+from .models import (
+    GameItem, MagicalLocation, MapReport, MapReportCluster, PlayerGPSTrace, PlayerGPSTraceSegment, PlayerInventory,
+    PlayerProfile, PlayerQuestProgress, PlayerWand, Quest, ReportVerification, Wand, MAX_INVENTORY_QUANTITY
+)
+from .renderers import FastJSONRenderer
+from .serializers import MagicalLocationValuesSerializer, ValuesSerializer
+
+
+class ListQueryCountTests(TestCase):
+    """
+    List endpoints must run the same number of queries however many rows they return.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora', is_staff=True)
+        self.profile = self.user.profile
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.discoverer = User.objects.create_user('hermione', 'hermione@hogwarts.edu', 'alohomora')
+        self.created = 0
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(queries)
+
+    def assertQueryCountIndependentOfSize(self, url, add_rows):
+        add_rows(2)
+        small = self.count_queries(url)
+        add_rows(8)
+        large = self.count_queries(url)
+        self.assertEqual(small, large, f"{url} ran {small} queries for 2 rows and {large} for 10")
+
+    def location(self):
+        self.created += 1
+        return MagicalLocation.objects.create(
+            name=f'Location {self.created}', latitude=51.5, longitude=-0.12,
+            poi_type='MAGICAL_LANDMARK', discovered_by=self.discoverer,
+        )
+
+    def item(self):
+        self.created += 1
+        return GameItem.objects.create(name=f'Item {self.created}', description='', item_type='POTION')
+
+    def quest(self):
+        self.created += 1
+        return Quest.objects.create(
+            title=f'Quest {self.created}', description='', item_reward=self.item(), target_location=self.location(),
+        )
+
+    def add_quests(self, count):
+        for _ in range(count):
+            self.quest()
+
+    def add_progress(self, status):
+        def add(count):
+            for _ in range(count):
+                PlayerQuestProgress.objects.create(player=self.profile, quest=self.quest(), status=status)
+        return add
+
+    def test_quest_lists(self):
+        self.assertQueryCountIndependentOfSize('/game/quests/available/', self.add_quests)
+
+    def test_player_quest_lists(self):
+        self.assertQueryCountIndependentOfSize('/game/quests/me/', self.add_progress('ACCEPTED'))
+        self.assertQueryCountIndependentOfSize('/game/quests/active/', self.add_progress('IN_PROGRESS'))
+        self.assertQueryCountIndependentOfSize('/game/quests/completed/', self.add_progress('COMPLETED'))
+
+    def test_inventory_list(self):
+        def add(count):
+            for _ in range(count):
+                PlayerInventory.objects.create(player=self.profile, item=self.item(), quantity=1)
+        self.assertQueryCountIndependentOfSize('/game/inventory/me/', add)
+
+    def test_catalogue_lists(self):
+        self.assertQueryCountIndependentOfSize('/game/items/', lambda count: [self.item() for _ in range(count)])
+        self.assertQueryCountIndependentOfSize(
+            '/game/magical-locations/', lambda count: [self.location() for _ in range(count)]
+        )
+
+    def test_wand_list(self):
+        def add(count):
+            for _ in range(count):
+                wand = Wand.objects.create(core='PHOENIX_FEATHER', wood_type='HOLLY', length_inches=11, flexibility='Supple')
+                PlayerWand.objects.create(player=self.profile, wand=wand)
+        self.assertQueryCountIndependentOfSize('/game/wands/me/', add)
+
+    def test_gps_trace_list(self):
+        def add(count):
+            for _ in range(count):
+                PlayerGPSTrace.objects.create(player=self.profile, latitude=51.5, longitude=-0.12, timestamp='2025-01-01T00:00:00Z')
+        self.assertQueryCountIndependentOfSize('/game/gps-traces/', add)
+
+    def test_map_report_cluster_list(self):
+        def add(count):
+            for _ in range(count):
+                self.created += 1
+                MapReportCluster.objects.create(
+                    report_type='OBSTRUCTION', cell=f'gcpvj{self.created}', window_start='2025-01-01T00:00:00Z',
+                    latitude=51.5, longitude=-0.12, related_poi=self.location(), report_count=1,
+                )
+        self.assertQueryCountIndependentOfSize('/game/map-reports/clusters/', add)
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_SAMPLE_RATE=1.0, METRICS_TOKEN='scrape-me')
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_histogram_quantiles_stay_within_bucket_error(self):
+        histogram = metrics.Histogram()
+        for value in range(1, 100001):
+            histogram.record(value)
+        for q in metrics.QUANTILES:
+            self.assertGreaterEqual(histogram.quantile(q), q * 100000)
+            self.assertLessEqual(histogram.quantile(q), q * 100000 * (1 + 1 / metrics.SUB_BUCKETS))
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.get('/game/items/')
+        response = APIClient().get('/game/metrics/', HTTP_AUTHORIZATION='Bearer scrape-me')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('game_requests_total{endpoint="game-item-list",status="200"} 1', body)
+        self.assertIn('game_db_queries_count{endpoint="game-item-list"} 1', body)
+
+    def test_metrics_endpoint_needs_token_or_staff(self):
+        self.assertEqual(self.client.get('/game/metrics/').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get('/game/metrics/').status_code, 200)
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_recorded(self):
+        self.client.get('/game/items/')
+        self.assertEqual(metrics.registry.histograms, {})
+
+
+class BenchmarkTests(TestCase):
+    def test_every_scenario_runs_against_a_small_world(self):
+        with tempfile.TemporaryDirectory() as tile_dir, override_settings(TILE_CACHE_DIR=tile_dir):
+            report = benchmark.run_benchmark(
+                {'users': 3, 'locations': 20, 'quests': 5, 'items': 5, 'traces_per_user': 3},
+                requests=2, warmup=0, players=2,
+            )
+        json.dumps(report)
+        self.assertEqual(len(report['endpoints']), len(benchmark.SCENARIOS))
+        for name, result in report['endpoints'].items():
+            self.assertEqual(result['errors'], 0, f"{name}: {result['status_codes']}")
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+
+class FastReadTests(TestCase):
+    """
+    The values()/orjson read path must return the same bytes as the serializers.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        item = GameItem.objects.create(name='Fénix “feather” ', description='Line\nbreak', item_type='ARTIFACT', rarity=5)
+        GameItem.objects.create(name='Plain', description='', item_type='POTION', image_url='https://example.com/p.png')
+        discovered = MagicalLocation.objects.create(
+            name='Ollivanders', latitude=51.51, longitude=-0.00001, poi_type='MAGICAL_LANDMARK', discovered_by=self.user,
+        )
+        MagicalLocation.objects.create(
+            name='Unnamed 🦉', latitude=51.5, longitude=-0.12, poi_type='CREATURE_HABITAT', real_world_identifier='here:1',
+        )
+        for index, status in enumerate(['ACCEPTED', 'IN_PROGRESS', 'COMPLETED', 'COMPLETED']):
+            quest = Quest.objects.create(
+                title=f'Quest {index}', description='Find it', item_reward=item, target_location=discovered,
+            )
+            PlayerQuestProgress.objects.create(
+                player=self.user.profile, quest=quest, status=status,
+                completed_at='2025-01-0%dT10:00:00.123456Z' % (index + 1) if status == 'COMPLETED' else None,
+            )
+
+    def assertSameBytes(self, url):
+        cache.clear()
+        with override_settings(GAME_FAST_READS=False):
+            regular = self.client.get(url)
+        cache.clear()
+        with override_settings(GAME_FAST_READS=True):
+            fast = self.client.get(url)
+        self.assertEqual(regular.status_code, 200, regular.content)
+        self.assertEqual(fast.content, regular.content)
+
+    def test_fast_reads_match_serializers(self):
+        for url in [
+            '/game/items/', '/game/items/?fields=id,item_type_display',
+            '/game/magical-locations/', '/game/magical-locations/?fields=discovered_by_username,longitude',
+            '/game/quests/me/', '/game/quests/me/?page_size=1', '/game/quests/active/', '/game/quests/completed/',
+        ]:
+            with self.subTest(url=url):
+                self.assertSameBytes(url)
+
+    def test_non_finite_floats_match_the_regular_renderer(self):
+        row = dict.fromkeys(MagicalLocationValuesSerializer.lookups, None)
+        row.update(latitude=float('nan'), longitude=0.0)
+        with self.assertRaises(ValueError):
+            JSONRenderer().render({'latitude': float('nan')})
+        with self.assertRaises(ValueError):
+            MagicalLocationValuesSerializer(row).data
+        lenient = {'latitude': float('nan'), 'longitude': float('inf')}
+        fast, regular = FastJSONRenderer(), JSONRenderer()
+        fast.strict = regular.strict = False  # STRICT_JSON off
+        self.assertEqual(fast.render(lenient), regular.render(lenient))
+
+    def test_values_serializer_defaults_to_its_lookups(self):
+        class PlainValues(ValuesSerializer):
+            lookups = ('id', 'name')
+
+        rows = GameItem.objects.order_by('id')
+        self.assertEqual(PlainValues(PlainValues.values(rows), many=True).data, list(rows.values('id', 'name')))
+
+
+class QuestCatalogueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.profile = self.user.profile
+        PlayerProfile.objects.filter(pk=self.profile.pk).update(current_latitude=0.0, current_longitude=0.0)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(self.user).access_token}')
+        self.near = MagicalLocation.objects.create(name='Near', latitude=0.05, longitude=0.05, poi_type='MAGICAL_LANDMARK')
+        far = MagicalLocation.objects.create(name='Far', latitude=5, longitude=5, poi_type='MAGICAL_LANDMARK')
+        self.quest = Quest.objects.create(title='Near', description='', target_location=self.near)
+        Quest.objects.create(title='Anywhere', description='')
+        Quest.objects.create(title='Far', description='', target_location=far)
+        Quest.objects.create(title='Too hard', description='', target_location=self.near, min_player_level=3)
+        cache.clear()
+
+    def titles(self):
+        response = self.client.get('/game/quests/available/')
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(row['title'] for row in response.json()['results'])
+
+    def test_available_quests_come_from_nearby_cells(self):
+        self.assertEqual(self.titles(), ['Anywhere', 'Near'])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.titles(), ['Anywhere', 'Near'])
+        self.assertFalse([query for query in queries if 'LIKE' in query['sql']], "cell lookups were not cached")
+
+    def test_catalogue_changes_apply_after_commit(self):
+        self.assertEqual(self.titles(), ['Anywhere', 'Near'])
+        with self.captureOnCommitCallbacks(execute=True):
+            Quest.objects.create(title='New', description='', target_location=self.near)
+            self.assertEqual(self.titles(), ['Anywhere', 'Near'])
+        self.assertEqual(self.titles(), ['Anywhere', 'Near', 'New'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.near.latitude = 3
+            self.near.save()
+        self.assertEqual(self.titles(), ['Anywhere'])
+
+    def test_completed_quests_are_left_out(self):
+        self.assertEqual(self.titles(), ['Anywhere', 'Near'])
+        with self.captureOnCommitCallbacks(execute=True):
+            PlayerQuestProgress.objects.create(player=self.profile, quest=self.quest, status='COMPLETED')
+        self.assertEqual(self.titles(), ['Anywhere'])
+
+
+class CatalogueCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(self.user).access_token}')
+        self.item = GameItem.objects.create(name='Bezoar', description='', item_type='INGREDIENT')
+        self.quest = Quest.objects.create(title='Antidote', description='', item_reward=self.item)
+        cache.clear()
+
+    def rename(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = name
+            self.item.save()
+
+    def test_cached_body_and_not_modified(self):
+        first = self.client.get('/game/items/')
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            cached = self.client.get('/game/items/')
+        self.assertEqual((cached.content, cached['ETag']), (first.content, first['ETag']))
+        self.assertEqual(self.client.get('/game/items/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        self.rename('Bezoar stone')
+        changed = self.client.get('/game/items/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertEqual(changed.json()['results'][0]['name'], 'Bezoar stone')
+
+    def test_versions_are_bumped_after_commit(self):
+        etag = self.client.get(f'/game/quests/{self.quest.pk}/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = 'Bezoar stone'
+            self.item.save()
+            self.assertEqual(self.client.get(f'/game/quests/{self.quest.pk}/')['ETag'], etag)
+        response = self.client.get(f'/game/quests/{self.quest.pk}/')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['item_reward']['name'], 'Bezoar stone')
+
+
+class CompletedQuestPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        location = MagicalLocation.objects.create(name='Hogsmeade', latitude=51.5, longitude=-0.12, poi_type='MAGICAL_LANDMARK')
+        completed_at = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        self.expected = []
+        for index in range(6):
+            quest = Quest.objects.create(title=f'Quest {index}', description='', target_location=location)
+            progress = PlayerQuestProgress.objects.create(
+                player=self.user.profile, quest=quest, status='COMPLETED',
+                completed_at=None if index == 5 else completed_at,
+            )
+            if progress.completed_at is not None:
+                self.expected.append(progress.pk)
+
+    def test_tied_timestamps_page_without_gaps_or_repeats(self):
+        for fast_reads in (False, True):
+            with self.subTest(fast_reads=fast_reads), override_settings(GAME_FAST_READS=fast_reads):
+                seen = []
+                url = '/game/quests/completed/?page_size=2'
+                while url:
+                    page = self.client.get(url).json()
+                    seen += [row['id'] for row in page['results']]
+                    url = page['next']
+                self.assertEqual(seen, sorted(self.expected, reverse=True))
+
+
+class DashboardCacheTests(TestCase):
+    """
+    The cached dashboard snapshot is shared by every read, so ?fields= must not leak into it.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        cache.clear()
+
+    def get_async(self, url):
+        request = AsyncRequestFactory().get(url, headers={'Authorization': f'Bearer {self.token}'})
+        return async_to_sync(AsyncUserDashboardView.as_view())(request)
+
+    def test_sparse_fields_do_not_trim_the_cached_snapshot(self):
+        for get in (self.client.get, self.get_async):
+            with self.subTest(view=get.__name__):
+                cache.clear()
+                trimmed = json.loads(get('/game/dashboard/?fields=profile').content)
+                self.assertEqual(list(trimmed), ['profile'])
+                self.assertIn('username', trimmed['profile'])
+                full = json.loads(get('/game/dashboard/').content)
+                self.assertEqual(full['profile'], trimmed['profile'])
+                self.assertIn('completed_quests_count', full)
+
+    def test_writes_invalidate_the_snapshot_after_commit(self):
+        self.assertIsNone(self.client.get('/game/dashboard/').json()['wand'])
+        wand = Wand.objects.create(core='PHOENIX_FEATHER', wood_type='HOLLY', length_inches=11, flexibility='Supple')
+        with self.captureOnCommitCallbacks(execute=True):
+            PlayerWand.objects.create(player=self.user.profile, wand=wand)
+            self.assertIsNotNone(caching.get_dashboard(self.user.profile.pk))
+        self.assertIsNone(caching.get_dashboard(self.user.profile.pk))
+        self.assertEqual(self.client.get('/game/dashboard/').json()['wand']['wood_type'], 'HOLLY')
+
+    def test_async_dashboard_matches_the_sync_view(self):
+        wand = Wand.objects.create(core='PHOENIX_FEATHER', wood_type='HOLLY', length_inches=11, flexibility='Supple')
+        PlayerWand.objects.create(player=self.user.profile, wand=wand)
+        with CaptureQueriesContext(connection) as regular_queries:
+            regular = self.client.get('/game/dashboard/')
+        cache.clear()
+        with CaptureQueriesContext(connection) as async_queries:
+            response = self.get_async('/game/dashboard/')
+        self.assertEqual(response.content, regular.content)
+        self.assertEqual(len(async_queries), len(regular_queries))
+
+
+class PlayerResolutionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.profile = self.user.profile
+        self.token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        cache.clear()
+
+    def test_orm_user_comes_with_its_profile(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/game/profile/')
+        self.assertEqual(response.json()['username'], 'harry')
+        response = self.client.patch('/game/profile/', {'house': 'RAVENCLAW'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.house, 'RAVENCLAW')
+
+    def test_token_user_profile_is_one_query(self):
+        request = RequestFactory().get('/')
+        request.user = TokenUser(AccessToken(str(self.token)))
+        with self.assertNumQueries(1):
+            player = resolve_player(request)
+            self.assertEqual((player.user.username, player.user.email), ('harry', 'harry@hogwarts.edu'))
+        self.assertEqual(player.pk, self.profile.pk)
+
+    def test_missing_profile_is_not_found_and_not_created(self):
+        self.profile.delete()
+        for url in ('/game/inventory/me/', '/game/profile/', '/game/dashboard/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 404, response.content)
+                self.assertEqual(response.json(), {'detail': 'Player profile not found'})
+        request = AsyncRequestFactory().get('/game/inventory/me/', headers={'Authorization': f'Bearer {self.token}'})
+        response = async_to_sync(AsyncPlayerInventoryListView.as_view())(request)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('WWW-Authenticate', response)
+        self.assertFalse(PlayerProfile.objects.exists())
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(self.user).access_token}')
+        cache.clear()
+        self.addCleanup(cache.clear)  # User ids are reused once the test transaction rolls back
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [query['sql'] for query in queries if 'FROM "auth_user"' in query['sql']]
+
+    def test_claims_views_check_the_user_once_per_ttl(self):
+        self.assertEqual(len(self.user_queries('/game/inventory/me/')), 1)
+        self.assertEqual(self.user_queries('/game/inventory/me/'), [])
+        self.assertEqual(self.user_queries('/game/dashboard/'), [])
+        self.assertEqual(len(self.user_queries('/game/profile/')), 1)  # ORM view
+
+    def test_deactivation_applies_after_commit(self):
+        self.client.get('/game/inventory/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            self.assertIs(cache.get(USER_ACTIVE_KEY.format(self.user.pk)), True)
+        for url in ('/game/inventory/me/', '/game/profile/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_token_user_is_rejected_when_deleted(self):
+        self.client.get('/game/inventory/me/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.client.get('/game/inventory/me/').status_code, 401)
+
+
+# The async views as urls.py mounts them with GAME_ASYNC_VIEWS on, for AsyncViewTests.
+urlpatterns = [
+    path('game/profile/', AsyncPlayerProfileDetailView.as_view()),
+    path('game/magical-locations/<int:pk>/', AsyncMagicalLocationDetailView.as_view()),
+]
+
+
+class AsyncViewTests(TestCase):
+    """
+    GAME_ASYNC_VIEWS must not change HTTP semantics (CSRF exemption, catalogue ETags) or block the event loop.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.client = APIClient(enforce_csrf_checks=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(self.user).access_token}')
+        self.location = MagicalLocation.objects.create(
+            name='Ollivanders', latitude=51.51, longitude=-0.13, poi_type='MAGICAL_LANDMARK',
+        )
+        cache.clear()
+
+    def test_token_writes_pass_csrf_checks(self):
+        with override_settings(ROOT_URLCONF=__name__):
+            response = self.client.patch('/game/profile/', {'house': 'GRYFFINDOR'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(PlayerProfile.objects.get(user=self.user).house, 'GRYFFINDOR')
+
+    def test_location_detail_shares_the_catalogue_cache(self):
+        url = f'/game/magical-locations/{self.location.pk}/'
+        regular = self.client.get(url)
+        with override_settings(ROOT_URLCONF=__name__):
+            cached = self.client.get(url)
+            cache.delete(CATALOGUE_KEY.format(regular['ETag'].strip('"')))
+            built = self.client.get(url)
+            not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=regular['ETag'])
+        for response in (cached, built):
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(response['ETag'], regular['ETag'])
+            self.assertEqual(response['Cache-Control'], 'private, no-cache')
+            self.assertEqual(response.content, regular.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_any_etag_matches_only_existing_resources(self):
+        missing = f'/game/magical-locations/{self.location.pk + 1}/'
+        existing = f'/game/magical-locations/{self.location.pk}/'
+        for urlconf in (settings.ROOT_URLCONF, __name__):
+            with self.subTest(urlconf=urlconf), override_settings(ROOT_URLCONF=urlconf):
+                for _ in range(2):  # uncached, then cached
+                    self.assertEqual(self.client.get(missing, HTTP_IF_NONE_MATCH='*').status_code, 404)
+                    self.assertEqual(self.client.get(existing, HTTP_IF_NONE_MATCH='*').status_code, 304)
+
+
+    def test_cache_is_not_called_on_the_event_loop(self):
+        def off_the_loop(method):
+            def guarded(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    return method(*args, **kwargs)
+                raise AssertionError(f"cache.{method.__name__}() ran on the event loop")
+            return guarded
+
+        token = MyTokenObtainPairSerializer.get_token(self.user).access_token
+        views = [
+            (AsyncUserDashboardView, '/game/dashboard/', {}),
+            (AsyncMagicalLocationDetailView, f'/game/magical-locations/{self.location.pk}/', {'pk': self.location.pk}),
+        ]
+        with ExitStack() as stack:
+            for name in ('get', 'set', 'add', 'get_many', 'set_many'):
+                stack.enter_context(mock.patch.object(cache, name, off_the_loop(getattr(cache, name))))
+            for view, url, kwargs in views:
+                for _ in range(2):  # Built, then served from the cache
+                    request = AsyncRequestFactory().get(url, headers={'Authorization': f'Bearer {token}'})
+                    response = async_to_sync(view.as_view())(request, **kwargs)
+                    self.assertEqual(response.status_code, 200, response.content)
+
+class PresenceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.profile = self.user.profile
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(self.user).access_token}')
+        cache.clear()
+
+    def test_heartbeats_reach_last_seen_without_a_scheduled_flush(self):
+        PlayerProfile.objects.filter(pk=self.profile.pk).update(last_seen=datetime(2020, 1, 1, tzinfo=dt_timezone.utc))
+        response = self.client.post('/game/presence/heartbeat/', {'latitude': 51.5, 'longitude': -0.12}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.profile.refresh_from_db()
+        self.assertGreater(self.profile.last_seen, datetime.now(dt_timezone.utc) - timedelta(minutes=1))
+
+    def test_nearby_rejects_radius_that_is_not_finite_and_positive(self):
+        self.client.post('/game/presence/heartbeat/', {'latitude': 51.5, 'longitude': -0.12}, format='json')
+        for radius in ['nan', 'inf', '-inf', '0', '-5', 'far']:
+            with self.subTest(radius=radius):
+                response = self.client.get('/game/presence/nearby/', {'radius': radius})
+                self.assertEqual(response.status_code, 400, response.content)
+        self.assertEqual(self.client.get('/game/presence/nearby/', {'radius': '100'}).status_code, 200)
+
+    @override_settings(PRESENCE_FLUSH_INLINE=False)
+    def test_heartbeats_wait_for_the_command_when_inline_flush_is_off(self):
+        old = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+        PlayerProfile.objects.filter(pk=self.profile.pk).update(last_seen=old)
+        self.client.post('/game/presence/heartbeat/', format='json')
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.last_seen, old)
+        self.assertEqual(presence.flush_last_seen(), 1)
+        self.profile.refresh_from_db()
+        self.assertGreater(self.profile.last_seen, old)
+
+
+class FakeWebSocket:
+    """
+    Drives the realtime ASGI application the way a server would for one connection.
+    """
+
+    def __init__(self, token):
+        self.scope = {'type': 'websocket', 'path': '/ws/game/nearby/', 'query_string': f'token={token}'.encode()}
+        self.inbox = asyncio.Queue()
+        self.outbox = asyncio.Queue()
+        self.inbox.put_nowait({'type': 'websocket.connect'})
+        self.task = asyncio.ensure_future(realtime.websocket_application(self.scope, self.inbox.get, self.outbox.put))
+
+    async def accepted(self):
+        self.assert_type(await self.next(), 'websocket.accept')
+        return self
+
+    async def next(self):
+        return await asyncio.wait_for(self.outbox.get(), timeout=5)
+
+    async def next_json(self, message_type):
+        while True:
+            message = await self.next()
+            self.assert_type(message, 'websocket.send')
+            payload = json.loads(message['text'])
+            if payload['type'] == message_type:
+                return payload
+
+    def assert_type(self, message, expected):
+        if message['type'] != expected:
+            raise AssertionError(f"Expected {expected}, got {message}")
+
+    def position(self, latitude, longitude):
+        text = json.dumps({'type': 'position', 'latitude': latitude, 'longitude': longitude})
+        self.inbox.put_nowait({'type': 'websocket.receive', 'text': text})
+
+    async def disconnect(self):
+        self.inbox.put_nowait({'type': 'websocket.disconnect'})
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+class RealtimeTests(TestCase):
+    def setUp(self):
+        self.tokens = {}
+        self.profiles = {}
+        for name in ('harry', 'ron'):
+            user = User.objects.create_user(name, f'{name}@hogwarts.edu', 'alohomora')
+            self.tokens[name] = MyTokenObtainPairSerializer.get_token(user).access_token
+            self.profiles[name] = user.profile.pk
+        cache.clear()
+
+    async def test_new_connection_sees_players_already_in_its_cells(self):
+        await sync_to_async(presence.heartbeat)(self.profiles['ron'], 'ron', 51.5003, -0.12)
+        harry = await FakeWebSocket(self.tokens['harry']).accepted()
+        harry.position(51.5, -0.12)
+        entered = await harry.next_json('player')
+        self.assertEqual(entered['event'], 'entered')
+        self.assertEqual(entered['player_id'], self.profiles['ron'])
+        await harry.disconnect()
+
+    async def test_moves_are_pushed_to_players_nearby(self):
+        harry = await FakeWebSocket(self.tokens['harry']).accepted()
+        ron = await FakeWebSocket(self.tokens['ron']).accepted()
+        harry.position(51.5, -0.12)
+        ron.position(51.5003, -0.12)
+        self.assertEqual((await harry.next_json('player'))['event'], 'entered')
+        self.assertEqual((await ron.next_json('player'))['event'], 'entered')
+        ron.position(51.5006, -0.12)
+        moved = await harry.next_json('player')
+        while moved['latitude'] != 51.5006:  # Ron's first fix may arrive after Harry's snapshot
+            moved = await harry.next_json('player')
+        self.assertEqual(moved['event'], 'moved')
+        await ron.disconnect()
+        self.assertEqual((await harry.next_json('player'))['event'], 'left')
+        await harry.disconnect()
+
+    @override_settings(REALTIME_QUEUE_SIZE=2)
+    def test_slow_channel_is_dropped_from_its_groups(self):
+        layer = realtime.InProcessChannelLayer()
+        channel_name, queue = layer.new_channel()
+
+        async def flood():
+            await layer.group_add('cell.gcpvj0', channel_name, queue)
+            for index in range(5):
+                await layer.group_send('cell.gcpvj0', {'index': index})
+
+        async_to_sync(flood)()
+        self.assertEqual([queue.get_nowait() for _ in range(queue.qsize())], [{'index': 0}, {'index': 1}, realtime.OVERFLOW])
+        self.assertEqual(layer.groups, {})
+
+
+class GPSTraceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.profile = self.user.profile
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.now_ms = int(datetime.now(dt_timezone.utc).timestamp() * 1000)
+        cache.clear()
+
+    def post_packed(self, packed):
+        return self.client.post('/game/gps-traces/batch/', {'packed': packed}, format='json')
+
+    def test_packed_batch_is_stored(self):
+        response = self.post_packed([self.now_ms - 2000, 51500000, -120000, 1000, 10, -10])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(PlayerGPSTrace.objects.filter(player=self.profile).count(), 2)
+
+    def test_batch_refreshes_the_cached_dashboard(self):
+        self.assertIsNone(self.client.get('/game/dashboard/').json()['profile']['current_latitude'])
+        self.post_packed([self.now_ms, 51500000, -120000])
+        self.assertEqual(self.client.get('/game/dashboard/').json()['profile']['current_latitude'], 51.5)
+
+    def test_history_window_is_validated(self):
+        history = '/game/gps-traces/history/'
+        self.assertEqual(self.client.get(history).status_code, 200)
+        for params in (
+            {'start': '2025-01-02T00:00:00Z', 'end': '2025-01-01T00:00:00Z'},
+            {'start': '2020-01-01T00:00:00Z', 'end': '2025-01-01T00:00:00Z'},
+            {'start': 'yesterday'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(history, params).status_code, 400)
+        with override_settings(GPS_TRACE_HISTORY_MAX_DAYS=3):
+            window = self.client.get(history).json()
+        self.assertEqual(datetime.fromisoformat(window['end']) - datetime.fromisoformat(window['start']), timedelta(days=3))
+
+    def test_packed_values_too_large_are_rejected(self):
+        for packed in ([1760000000, 10 ** 400, 0], [10 ** 30, 0, 0]):
+            with self.subTest(packed=packed):
+                self.assertEqual(self.post_packed(packed).status_code, 400)
+
+    @override_settings(GPS_TRACE_BATCH_MAX_POINTS=2)
+    def test_packed_batch_size_is_checked(self):
+        response = self.post_packed([self.now_ms, 51500000, -120000] + [1, 1, 1] * 2)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('at most 2 points', str(response.content))
+
+
+class GPSRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.profile = self.user.profile
+        self.day_start = datetime.combine(
+            datetime.now(dt_timezone.utc).date() - timedelta(days=10), datetime.min.time(), tzinfo=dt_timezone.utc
+        )
+
+    def add_traces(self, points, start_second=0):
+        PlayerGPSTrace.objects.bulk_create([
+            PlayerGPSTrace(player=self.profile, latitude=latitude, longitude=longitude,
+                           timestamp=self.day_start + timedelta(seconds=start_second + index * 10))
+            for index, (latitude, longitude) in enumerate(points)
+        ])
+
+    def test_polyline_round_trip(self):
+        rows = [[1, -2, 3], [100000, -5, 0], [-7, 8, 1234567]]
+        self.assertEqual(tracks.decode_polyline(tracks.encode_polyline(rows), 3), rows)
+        # Reference example from the polyline algorithm's documentation.
+        self.assertEqual(
+            tracks.encode_polyline([[3850000, -12020000], [4070000, -12095000], [4325200, -12645300]]),
+            '_p~iF~ps|U_ulLnnqC_mqNvxq`@',
+        )
+
+    def test_simplify_drops_points_within_tolerance(self):
+        straight = [(51.5 + index * 1e-4, -0.12, index) for index in range(50)]
+        self.assertEqual(tracks.simplify(straight, 5), [straight[0], straight[-1]])
+        corner = straight[:25] + [(51.5024, -0.12 + index * 1e-4, 25 + index) for index in range(1, 25)]
+        self.assertEqual(tracks.simplify(corner, 5), [corner[0], corner[24], corner[-1]])
+        self.assertEqual(tracks.simplify(corner, 0), corner)
+
+    def test_command_rolls_old_days_into_segments(self):
+        self.add_traces([(51.5 + index * 1e-4, -0.12) for index in range(50)] + [(51.6, -0.2)])
+        recent = PlayerGPSTrace.objects.create(player=self.profile, latitude=1, longitude=1, timestamp=datetime.now(dt_timezone.utc))
+        call_command('rollup_gps_traces', '--dry-run', stdout=StringIO())
+        self.assertEqual(PlayerGPSTrace.objects.count(), 52)
+
+        call_command('rollup_gps_traces', stdout=StringIO())
+        self.assertEqual(list(PlayerGPSTrace.objects.all()), [recent])
+        segment = PlayerGPSTraceSegment.objects.get()
+        self.assertEqual((segment.point_count, segment.raw_point_count), (3, 51))
+        points = tracks.decode_segment_points(segment)
+        self.assertEqual([(lat, lon) for lat, lon, _ in points], [(51.5, -0.12), (51.5049, -0.12), (51.6, -0.2)])
+        self.assertEqual(points[-1][2], self.day_start + timedelta(seconds=500))
+
+        history = tracks.player_history(self.profile, self.day_start, datetime.now(dt_timezone.utc))
+        self.assertEqual(len(history), 4)
+        self.assertEqual(history[-1]['latitude'], 1)
+
+    def test_late_fixes_merge_into_the_existing_segment(self):
+        self.add_traces([(51.5, -0.12), (51.5, -0.13)])
+        tracks.rollup_day(self.profile.pk, self.day_start.date(), 5)
+        self.add_traces([(51.51, -0.125)], start_second=5)
+        self.assertEqual(tracks.rollup_day(self.profile.pk, self.day_start.date(), 5), 1)
+
+        segment = PlayerGPSTraceSegment.objects.get()
+        self.assertEqual((segment.point_count, segment.raw_point_count), (3, 3))
+        self.assertEqual(
+            [(lat, lon) for lat, lon, _ in tracks.decode_segment_points(segment)],
+            [(51.5, -0.12), (51.51, -0.125), (51.5, -0.13)],
+        )
+        self.assertEqual(PlayerGPSTrace.objects.count(), 0)
+
+
+class ReportVerificationTests(TestCase):
+    def setUp(self):
+        self.reporter = User.objects.create_user('harry', 'harry@hogwarts.edu')
+        self.verifiers = [User.objects.create_user(f'auror{index}', f'auror{index}@ministry.gov') for index in range(4)]
+        self.location = MagicalLocation.objects.create(name='Knockturn Alley', latitude=51.5, longitude=-0.12, poi_type='MAGICAL_LANDMARK')
+        cache.clear()
+
+    def report(self, report_type):
+        return MapReport.objects.create(
+            reporter=self.reporter, latitude=51.5, longitude=-0.12, report_type=report_type, related_poi=self.location,
+        )
+
+    def verify(self, user, report, agrees):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client.post(f'/game/map-reports/{report.pk}/verify/', {'agrees_with_report': agrees}, format='json')
+
+    def test_votes_are_weighted_by_level(self):
+        PlayerProfile.objects.filter(user=self.verifiers[0]).update(level=11)
+        PlayerProfile.objects.filter(user=self.verifiers[1]).update(level=50)
+        self.assertEqual(verification.verifier_weight(self.verifiers[0]), 2.0)
+        self.assertEqual(verification.verifier_weight(self.verifiers[1]), verification.MAX_WEIGHT)
+
+        report = self.report('OBSTRUCTION')
+        response = self.verify(self.verifiers[0], report, True)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['confidence_score'], verification.confidence(2.0, 0))
+        self.assertEqual((response.json()['agree_count'], response.json()['status']), (1, 'SUBMITTED'))
+
+    def test_agreement_verifies_the_report_and_scores_the_poi(self):
+        report = self.report('PHOTO_EVIDENCE')
+        self.assertEqual(self.verify(self.reporter, report, True).status_code, 400)
+        version = caching.get_version('locations')
+        with self.captureOnCommitCallbacks(execute=True):
+            for verifier in self.verifiers[:2]:
+                self.assertEqual(self.verify(verifier, report, True).json()['status'], 'SUBMITTED')
+            self.assertEqual(self.verify(verifier, report, True).status_code, 400)  # Already verified
+            response = self.verify(self.verifiers[2], report, True)
+            self.assertEqual(caching.get_version('locations'), version)
+        self.assertEqual(response.json()['status'], 'VERIFIED')
+        self.assertGreater(caching.get_version('locations'), version)
+        self.location.refresh_from_db()
+        self.assertEqual(self.location.verification_score, 1)
+        self.assertEqual(self.verify(self.verifiers[3], report, True).json(), {'error': 'Map report is already closed'})
+
+    def test_disagreement_rejects_and_deletions_are_taken_back_out(self):
+        report = self.report('POI_INACCURACY')
+        for verifier in self.verifiers[:3]:
+            self.verify(verifier, report, False)
+        report.refresh_from_db()
+        self.assertEqual((report.status, report.disagree_count, report.confidence_score), ('REJECTED', 3, 0.2))
+        self.location.refresh_from_db()
+        self.assertEqual(self.location.verification_score, 0)
+
+        ReportVerification.objects.filter(map_report=report).first().delete()
+        report.refresh_from_db()
+        self.assertEqual((report.disagree_count, report.disagree_weight), (2, 2.0))
+        self.assertEqual(report.confidence_score, verification.confidence(0, 2.0))
+
+    @override_settings(MAP_REPORT_MIN_VERIFICATIONS=5)
+    def test_reports_stay_open_below_the_minimum_verifications(self):
+        report = self.report('OBSTRUCTION')
+        for verifier in self.verifiers:
+            self.verify(verifier, report, True)
+        self.assertIsNone(verification.settle_report(report.pk))
+        report.refresh_from_db()
+        self.assertEqual((report.status, report.agree_count), ('SUBMITTED', 4))
+
+
+class ReportPhotoTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name, PHOTO_PROCESSING_WORKERS=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user('colin', 'colin@hogwarts.edu')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def photo(self, name='evidence.jpg'):
+        image = Image.new('RGB', (2000, 1500), (120, 30, 200))
+        for left in range(0, 2000, 50):
+            image.paste((10, 200, 10), (left, 0, left + 20, 1500))
+        exif = Image.Exif()
+        exif[0x010f] = 'Creevey Camera'  # Make
+        exif[0x0112] = 6  # Orientation: rotate 90° clockwise
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+    def upload(self, photo):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/game/map-reports/', {
+                'latitude': 51.5, 'longitude': -0.12, 'report_type': 'PHOTO_EVIDENCE', 'photo': photo,
+            }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.content)
+        return MapReport.objects.get(pk=response.json()['id'])
+
+    def test_upload_strips_metadata_and_builds_variants(self):
+        report = self.upload(self.photo())
+        self.assertEqual(report.photo_status, 'READY')
+        with Image.open(report.photo.path) as original:
+            self.assertEqual(dict(original.getexif()), {})
+            self.assertEqual(original.size, (1500, 2000))  # Orientation applied before stripping
+        with Image.open(report.photo_thumbnail.path) as thumbnail:
+            self.assertLessEqual(max(thumbnail.size), settings.PHOTO_THUMBNAIL_SIZE)
+        with Image.open(report.photo_webp.path) as webp:
+            self.assertEqual(webp.format, 'WEBP')
+            self.assertLessEqual(max(webp.size), settings.PHOTO_WEBP_MAX_SIZE)
+        self.assertEqual(len(report.photo_hash), 16)
+        self.assertTrue(0 <= report.ai_confidence_score <= 1)
+
+    def test_same_photo_in_the_same_cluster_is_a_duplicate(self):
+        first = self.upload(self.photo('first.jpg'))
+        second = self.upload(self.photo('second.jpg'))
+        self.assertEqual(first.cluster_id, second.cluster_id)
+        self.assertIsNone(first.photo_duplicate_of_id)
+        self.assertEqual(second.photo_duplicate_of_id, first.pk)
+
+    def test_command_processes_pending_and_marks_unreadable_photos(self):
+        report = self.upload(self.photo())
+        MapReport.objects.filter(pk=report.pk).update(photo_status='PENDING', photo_hash=None)
+        broken = MapReport.objects.create(
+            reporter=self.user, latitude=51.5, longitude=-0.12, report_type='PHOTO_EVIDENCE', photo_status='PENDING',
+        )
+        broken.photo.save('broken.jpg', ContentFile(b'not a jpeg'))
+        with self.assertLogs('gamemodels.photos', 'WARNING'):
+            call_command('process_report_photos', stdout=StringIO())
+        report.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual((report.photo_status, len(report.photo_hash)), ('READY', 16))
+        self.assertEqual(broken.photo_status, 'FAILED')
+
+
+class ReportClusterTests(TestCase):
+    def test_closed_clusters_take_no_new_reports(self):
+        moment = datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc)
+        first = report_clusters.attach_report(51.5, -0.12, 'OBSTRUCTION', moment)
+        self.assertEqual(report_clusters.attach_report(51.5, -0.12, 'OBSTRUCTION', moment).pk, first.pk)
+        MapReportCluster.objects.filter(pk=first.pk).update(status='VERIFIED')
+
+        second = report_clusters.attach_report(51.5, -0.12, 'OBSTRUCTION', moment)
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertEqual((second.status, second.report_count), ('SUBMITTED', 1))
+        self.assertEqual(MapReportCluster.objects.get(pk=first.pk).report_count, 2)
+        self.assertEqual(report_clusters.attach_report(51.5, -0.12, 'OBSTRUCTION', moment).pk, second.pk)
+
+
+class QuestCompletionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.profile = self.user.profile
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.item = GameItem.objects.create(name='Snitch', description='', item_type='ARTIFACT')
+        location = MagicalLocation.objects.create(name='Pitch', latitude=51.5, longitude=-0.12, poi_type='MAGICAL_LANDMARK')
+        quest = Quest.objects.create(
+            title='Catch it', description='', xp_reward=1500, item_reward=self.item, target_location=location,
+        )
+        self.progress = PlayerQuestProgress.objects.create(player=self.profile, quest=quest, status='IN_PROGRESS')
+        self.url = f'/game/quests/progress/{self.progress.pk}/complete/'
+
+    def assertRewardedOnce(self):
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.xp, self.profile.level), (1500, 2))
+        self.assertEqual(PlayerInventory.objects.get(player=self.profile, item=self.item).quantity, 1)
+
+    def test_repeated_completion_key_grants_once(self):
+        for _ in range(2):
+            response = self.client.post(self.url, headers={'Idempotency-Key': 'tap-1'})
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(response.json()['status'], 'COMPLETED')
+        self.assertRewardedOnce()
+        _, completed = services.complete_quest(self.profile, self.progress.pk, 'tap-1')
+        self.assertFalse(completed)
+
+    def test_completing_again_without_the_key_is_rejected(self):
+        self.assertEqual(self.client.post(self.url, headers={'Idempotency-Key': 'tap-1'}).status_code, 200)
+        for headers in ({}, {'Idempotency-Key': 'tap-2'}):
+            with self.subTest(headers=headers):
+                self.assertEqual(self.client.post(self.url, headers=headers).status_code, 400)
+        self.assertRewardedOnce()
+
+    def test_completion_refreshes_cached_reads_after_commit(self):
+        cache.clear()
+        self.assertEqual(len(self.client.get('/game/quests/available/').json()['results']), 1)
+        self.assertEqual(self.client.get('/game/dashboard/').json()['completed_quests_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            services.complete_quest(self.profile, self.progress.pk)
+            self.assertIsNotNone(cache.get(quest_catalogue.COMPLETED_KEY.format(self.profile.pk)))
+            self.assertIsNotNone(caching.get_dashboard(self.profile.pk))
+        self.assertEqual(self.client.get('/game/quests/available/').json()['results'], [])
+        self.assertEqual(self.client.get('/game/dashboard/').json()['completed_quests_count'], 1)
+
+    def test_item_reward_adds_to_an_existing_stack(self):
+        PlayerInventory.objects.create(player=self.profile, item=self.item, quantity=2)
+        services.complete_quest(self.profile, self.progress.pk)
+        self.assertEqual(PlayerInventory.objects.get(player=self.profile, item=self.item).quantity, 3)
+
+
+class InventoryBatchTests(TestCase):
+    url = '/game/inventory/me/batch/'
+
+    def setUp(self):
+        self.user = User.objects.create_user('ron', 'ron@hogwarts.edu', 'alohomora')
+        self.profile = self.user.profile
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.rat = GameItem.objects.create(name='Rat Tonic', description='', item_type='POTION')
+        self.frog = GameItem.objects.create(name='Chocolate Frog', description='', item_type='INGREDIENT')
+        PlayerInventory.objects.create(player=self.profile, item=self.rat, quantity=2)
+
+    def quantities(self):
+        return dict(PlayerInventory.objects.filter(player=self.profile).values_list('item_id', 'quantity'))
+
+    def post(self, *changes):
+        return self.client.post(self.url, {'items': [{'item_id': i, 'delta': d} for i, d in changes]}, format='json')
+
+    def test_upsert_updates_existing_and_creates_missing_rows(self):
+        response = self.post((self.rat.pk, 3), (self.frog.pk, 1), (self.frog.pk, 4))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(self.quantities(), {self.rat.pk: 5, self.frog.pk: 5})
+        self.assertEqual([row['quantity'] for row in response.json()], [5, 5])
+
+    def test_underflow_is_rejected_without_changes(self):
+        response = self.post((self.frog.pk, 1), (self.rat.pk, -3))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Insufficient quantity', 'item_ids': [self.rat.pk]})
+        self.assertEqual(self.quantities(), {self.rat.pk: 2})
+
+    def test_huge_delta_is_rejected(self):
+        self.assertEqual(self.post((self.rat.pk, 10 ** 20)).status_code, 400)
+        response = self.post((self.rat.pk, MAX_INVENTORY_QUANTITY))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Quantity too large')
+        self.assertEqual(self.quantities(), {self.rat.pk: 2})
+
+
+class LocationUpdateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.profile = self.user.profile
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(self.user).access_token}')
+        cache.clear()
+
+    def post(self, latitude, longitude):
+        response = self.client.post('/game/profile/location/', {'latitude': latitude, 'longitude': longitude}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()['status']
+
+    def stored(self):
+        self.profile.refresh_from_db()
+        return self.profile.current_latitude, self.profile.current_longitude
+
+    def expire_interval(self):
+        cache.delete(services.LOCATION_WRITE_KEY.format(self.profile.pk))
+
+    def test_updated_ignored_and_coalesced(self):
+        self.assertEqual(self.post(51.5, -0.12), 'updated')
+        self.expire_interval()
+        self.assertEqual(self.post(51.50001, -0.12), 'ignored')
+        self.assertEqual(self.post(51.51, -0.12), 'updated')
+        self.assertEqual(self.post(51.52, -0.12), 'coalesced')
+        self.assertEqual(self.stored(), (51.51, -0.12))
+
+    def test_next_write_after_the_interval_carries_the_latest_fix(self):
+        self.post(51.5, -0.12)
+        self.assertEqual(self.post(51.52, -0.12), 'coalesced')
+        self.expire_interval()
+        self.assertEqual(self.post(51.53, -0.12), 'updated')
+        self.assertEqual(self.stored(), (51.53, -0.12))
+
+    def test_heartbeat_writes_the_last_fix_of_a_burst(self):
+        self.post(51.5, -0.12)
+        self.post(51.52, -0.12)
+        self.post(51.54, -0.12)
+        self.client.post('/game/presence/heartbeat/', format='json')
+        self.assertEqual(self.stored(), (51.5, -0.12))
+        self.expire_interval()
+        self.client.post('/game/presence/heartbeat/', format='json')
+        self.assertEqual(self.stored(), (51.54, -0.12))
+        self.assertFalse(services.write_pending_location(self.profile))
+
+    def test_returning_near_the_stored_position_drops_the_stashed_fix(self):
+        self.post(51.5, -0.12)
+        self.post(51.52, -0.12)
+        self.assertEqual(self.post(51.50001, -0.12), 'ignored')
+        self.expire_interval()
+        self.assertFalse(services.write_pending_location(self.profile))
+        self.assertEqual(self.stored(), (51.5, -0.12))
+
+
+class GeohashTests(TestCase):
+    def test_encode_matches_the_reference_geohash(self):
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        min_lat, max_lat, min_lon, max_lon = geo.decode_bbox('u4pruydqqvj')
+        self.assertTrue(min_lat <= 57.64911 <= max_lat and min_lon <= 10.40744 <= max_lon)
+
+    def test_bbox_cells_cover_the_box(self):
+        cells = geo.bbox_cells(51.5, 51.52, -0.13, -0.10)
+        self.assertLessEqual(len(cells), geo.MAX_COVER_CELLS)
+        for latitude in (51.5, 51.51, 51.52):
+            for longitude in (-0.13, -0.115, -0.10):
+                geohash = geo.encode(latitude, longitude)
+                self.assertTrue(any(geohash.startswith(cell) for cell in cells), (latitude, longitude))
+
+    def test_bbox_cells_split_at_the_antimeridian(self):
+        cells = geo.bbox_cells(10, 11, 179.5, -179.5)
+        for longitude in (179.9, -179.9):
+            self.assertTrue(any(geo.encode(10.5, longitude).startswith(cell) for cell in cells), longitude)
+        self.assertFalse(any(geo.encode(10.5, 0).startswith(cell) for cell in cells))
+
+    def test_bbox_and_radius_lookups(self):
+        inside = MagicalLocation.objects.create(name='Leaky Cauldron', latitude=51.501, longitude=-0.12, poi_type='MAGICAL_LANDMARK')
+        MagicalLocation.objects.create(name='Burrow', latitude=52.0, longitude=-0.12, poi_type='MAGICAL_LANDMARK')
+        self.assertEqual(inside.geohash, geo.encode(51.501, -0.12))
+        self.assertEqual(list(MagicalLocation.objects.in_bbox(51.5, 51.52, -0.13, -0.10)), [inside])
+        self.assertEqual(list(MagicalLocation.objects.near(51.5, -0.12, 500)), [inside])
+        self.assertEqual(list(MagicalLocation.objects.near(51.5, -0.12, 50)), [])
+
+    def test_backfill_migration_fills_blank_geohashes(self):
+        backfill = import_module('gamemodels.migrations.0003_magicallocation_geohash')
+        location = MagicalLocation.objects.create(name='Gringotts', latitude=51.51, longitude=-0.13, poi_type='MAGICAL_LANDMARK')
+        MagicalLocation.objects.update(geohash='')
+        backfill.backfill_geohash(django_apps, None)
+        location.refresh_from_db()
+        self.assertEqual(location.geohash, geo.encode(51.51, -0.13))
+
+
+class PoiClusterTests(TestCase):
+    url = '/game/magical-locations/clusters/?min_lat=51.2&max_lat=51.8&min_lon=-0.5&max_lon=0.3&zoom={}'
+
+    def setUp(self):
+        self.user = User.objects.create_user('luna', 'luna@hogwarts.edu')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        for row in range(6):
+            for column in range(10):
+                MagicalLocation.objects.create(
+                    name=f'Landmark {row}-{column}', latitude=51.3 + row * 0.08, longitude=-0.4 + column * 0.07,
+                    poi_type='WAND_SHOP' if column % 3 == 0 else 'MAGICAL_LANDMARK',
+                )
+        MagicalLocation.objects.create(name='Closed shop', latitude=51.5, longitude=-0.12, poi_type='WAND_SHOP', is_active=False)
+        cache.clear()
+
+    def counted(self, zoom):
+        response = self.client.get(self.url.format(zoom))
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_clusters_cover_every_active_location_at_each_zoom(self):
+        for zoom in (3, 8, 10, 12):
+            payload = self.counted(zoom)
+            self.assertEqual((payload['mode'], payload['precision']), ('clusters', poi_clusters.cluster_precision(zoom)))
+            self.assertEqual(sum(row[1] for row in payload['items']), 60)
+            for cell, count, latitude, longitude, poi_type in payload['items']:
+                self.assertEqual(len(cell), payload['precision'])
+                self.assertTrue(geo.encode(latitude, longitude).startswith(cell))
+        self.assertLess(len(self.counted(3)['items']), len(self.counted(12)['items']))
+
+    def test_zoomed_in_viewport_returns_points(self):
+        payload = self.counted(16)
+        self.assertEqual((payload['mode'], payload['truncated'], len(payload['items'])), ('points', False, 60))
+        with override_settings(POI_POINTS_LIMIT=10):
+            payload = self.counted(16)
+        self.assertEqual((payload['truncated'], len(payload['items'])), (True, 10))
+
+    def test_repeat_is_served_from_the_tile_cache(self):
+        first = self.client.get(self.url.format(10))
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url.format(10))
+        self.assertEqual(second.content, first.content)
+
+    def test_new_location_refreshes_cached_tiles_after_commit(self):
+        self.counted(10)
+        with self.captureOnCommitCallbacks(execute=True):
+            MagicalLocation.objects.create(name='Quibbler office', latitude=51.5, longitude=-0.12, poi_type='MAGICAL_LANDMARK')
+        self.assertEqual(sum(row[1] for row in self.counted(10)['items']), 61)
+
+    def test_oversized_viewport_is_refused(self):
+        response = self.client.get('/game/magical-locations/clusters/?min_lat=-80&max_lat=80&min_lon=-170&max_lon=170&zoom=14')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+        with self.assertRaises(poi_clusters.ViewportTooLarge):
+            poi_clusters.viewport(40, 60, -20, 20, 12)
+        self.assertEqual(self.client.get(self.url.format(23)).status_code, 400)
+
+
+class MapTileTests(TestCase):
+    def setUp(self):
+        tile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tile_dir.cleanup)
+        settings_override = override_settings(TILE_CACHE_DIR=tile_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.location = MagicalLocation.objects.create(
+            name='Three Broomsticks', latitude=51.5, longitude=-0.12, poi_type='MAGICAL_LANDMARK'
+        )
+        self.quest = Quest.objects.create(title='Butterbeer run', description='Fetch a round.', target_location=self.location)
+        self.x, self.y = tiles.tile_for(51.5, -0.12, 14)
+        self.url = f'/game/tiles/14/{self.x}/{self.y}.json'
+
+    def test_tile_bounds_contain_their_points(self):
+        min_lat, max_lat, min_lon, max_lon = tiles.tile_bounds(14, self.x, self.y)
+        self.assertTrue(min_lat <= 51.5 <= max_lat and min_lon <= -0.12 <= max_lon)
+        self.assertEqual(tiles.tile_for(max_lat, min_lon, 14), (self.x, self.y))
+
+    def test_tile_lists_locations_and_quest_targets(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.TILE_HTTP_MAX_AGE}')
+        payload = response.json()
+        self.assertEqual([row[0] for row in payload['locations']], [self.location.pk])
+        self.assertEqual(payload['quests'], [[self.quest.pk, self.location.pk]])
+
+    def test_matching_etag_is_not_modified_without_queries(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+
+    def test_moving_a_location_invalidates_its_tile_after_commit(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.location.latitude = 48.85
+            self.location.save()
+            # Until the move commits the cached tile is still served.
+            self.assertEqual(self.client.get(self.url)['ETag'], etag)
+        response = self.client.get(self.url)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual((response.json()['locations'], response.json()['quests']), ([], []))
+
+    def test_zoom_outside_the_cached_range_is_not_found(self):
+        self.assertEqual(self.client.get('/game/tiles/3/1/1.json').status_code, 404)
+        self.assertEqual(self.client.get(f'/game/tiles/14/{2 ** 14}/0.json').status_code, 404)
+
+
+@skipUnless(connection.vendor == 'postgresql', "Query plans are only checked on PostgreSQL")
+class AccessPathIndexTests(TestCase):
+    """
+    The hot read queries can be answered from the indexes added for them.
+
+    Sequential scans are disabled for each EXPLAIN, so the planner falls back
+    to a seq scan only when no index fits the query.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('harry', 'harry@hogwarts.edu', 'alohomora')
+        self.profile = self.user.profile
+        location = MagicalLocation.objects.create(name='Ollivanders', latitude=51.51, longitude=-0.13, poi_type='MAGICAL_LANDMARK')
+        quest = Quest.objects.create(title='Wand', description='', target_location=location)
+        PlayerQuestProgress.objects.create(player=self.profile, quest=quest, status='IN_PROGRESS')
+        PlayerGPSTrace.objects.create(player=self.profile, latitude=51.51, longitude=-0.13, timestamp='2025-01-01T00:00:00Z')
+        MapReport.objects.create(reporter=self.user, latitude=51.51, longitude=-0.13, report_type='OBSTRUCTION')
+
+    def assertUsesIndex(self, queryset, *index_names):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertTrue(any(name in plan for name in index_names), f"None of {index_names} in plan:\n{plan}")
+
+    def test_player_quest_progress(self):
+        progress = PlayerQuestProgress.objects.filter(player=self.profile)
+        self.assertUsesIndex(
+            progress.filter(status='COMPLETED').order_by('-completed_at', '-id'), 'gm_progress_player_status_idx'
+        )
+        self.assertUsesIndex(
+            progress.exclude(status='COMPLETED').exclude(status='FAILED'), 'gm_progress_open_player_idx'
+        )
+
+    def test_active_locations_in_bbox(self):
+        self.assertUsesIndex(
+            MagicalLocation.objects.filter(is_active=True).in_bbox(51.5, 51.52, -0.14, -0.12),
+            'gm_location_active_latlon_idx', 'geohash',
+        )
+
+    def test_quests_for_level(self):
+        self.assertUsesIndex(Quest.objects.filter(is_active=True, min_player_level__lte=5), 'gm_quest_active_level_idx')
+
+    def test_map_reports_by_status(self):
+        self.assertUsesIndex(
+            MapReport.objects.filter(status='SUBMITTED').order_by('-timestamp'), 'gm_report_status_time_idx'
+        )
+
+    def test_player_gps_traces(self):
+        start = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+        self.assertUsesIndex(
+            PlayerGPSTrace.objects.filter(
+                player=self.profile, timestamp__gte=start, timestamp__lt=start + timedelta(days=1)
+            ).order_by('timestamp'),
+            'gm_trace_player_time_idx',
+        )
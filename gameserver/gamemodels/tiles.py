@@ -0,0 +1,184 @@
+# gamemodels/tiles.py
+# Lazily built z/x/y JSON tiles of MagicalLocations and quest targets, kept in
+# an in-process LRU backed by files on disk.
+import hashlib
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.renderers import JSONRenderer
+
+from .models import MagicalLocation, Quest
+
+LOCATION_FIELDS = ['id', 'latitude', 'longitude', 'poi_type', 'name']
+QUEST_FIELDS = ['id', 'target_location_id']
+MAX_MERCATOR_LAT = 85.0511287798
+
+
+def min_zoom():
+    return getattr(settings, 'TILE_MIN_ZOOM', 12)
+
+
+def max_zoom():
+    return getattr(settings, 'TILE_MAX_ZOOM', 18)
+
+
+def tile_bounds(z, x, y):
+    """
+    ``(min_lat, max_lat, min_lon, max_lon)`` of a Web Mercator tile.
+    """
+    n = 2 ** z
+    min_lon = x / n * 360.0 - 180.0
+    max_lon = (x + 1) / n * 360.0 - 180.0
+    max_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / n))))
+    min_lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / n))))
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def tile_for(latitude, longitude, z):
+    n = 2 ** z
+    latitude = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, latitude))
+    x = int((longitude + 180.0) / 360.0 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(latitude))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tiles_for_point(latitude, longitude):
+    """
+    Every cached (z, x, y) tile that contains the point.
+    """
+    return [(z, *tile_for(latitude, longitude, z)) for z in range(min_zoom(), max_zoom() + 1)]
+
+
+def build_tile(z, x, y):
+    """
+    Render one tile as JSON bytes.
+
+    Rows are lists described by ``fields``. Points on a shared edge belong to
+    the tile east/south of it, matching tile_for().
+    """
+    min_lat, max_lat, min_lon, max_lon = tile_bounds(z, x, y)
+    locations = MagicalLocation.objects.filter(
+        is_active=True,
+        latitude__gt=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lon, longitude__lt=max_lon,
+    ).in_bbox(min_lat, max_lat, min_lon, max_lon).order_by('id').values_list(*LOCATION_FIELDS)
+    locations = [list(row) for row in locations]
+    quests = Quest.objects.filter(
+        is_active=True, target_location_id__in=[row[0] for row in locations]
+    ).order_by('id').values_list(*QUEST_FIELDS)
+    return JSONRenderer().render({
+        'z': z, 'x': x, 'y': y,
+        'location_fields': LOCATION_FIELDS,
+        'locations': locations,
+        'quest_fields': QUEST_FIELDS,
+        'quests': [list(row) for row in quests],
+    })
+
+
+class TileCache:
+    """
+    LRU of rendered tiles in front of a directory of ``z/x/y.json`` files.
+
+    Memory entries remember the file's mtime and are dropped when the file is
+    gone or rewritten, so invalidate() from any process on the host clears
+    every worker's copy.
+    """
+
+    def __init__(self, directory, max_entries):
+        self.directory = str(directory)
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def path(self, z, x, y):
+        return os.path.join(self.directory, str(z), str(x), f'{y}.json')
+
+    def get(self, z, x, y):
+        """
+        Return ``(body, etag)``, rendering and storing the tile on a miss.
+        """
+        key = (z, x, y)
+        path = self.path(z, x, y)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and mtime is not None and entry[0] == mtime:
+                self.entries.move_to_end(key)
+                return entry[1], entry[2]
+
+        if mtime is not None:
+            with open(path, 'rb') as tile_file:
+                body = tile_file.read()
+        else:
+            body = build_tile(z, x, y)
+            mtime = self._write(path, body)
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+
+        with self.lock:
+            self.entries[key] = (mtime, body, etag)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return body, etag
+
+    def _write(self, path, body):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(body)
+        os.replace(tmp_path, path)
+        return os.stat(path).st_mtime_ns
+
+    def invalidate(self, z, x, y):
+        with self.lock:
+            self.entries.pop((z, x, y), None)
+        try:
+            os.remove(self.path(z, x, y))
+        except FileNotFoundError:
+            pass
+
+    def invalidate_point(self, latitude, longitude):
+        for tile in tiles_for_point(latitude, longitude):
+            self.invalidate(*tile)
+
+
+_tile_cache = None
+_tile_cache_lock = threading.Lock()
+
+
+def get_tile_cache():
+    global _tile_cache
+    with _tile_cache_lock:
+        if _tile_cache is None:
+            _tile_cache = TileCache(
+                getattr(settings, 'TILE_CACHE_DIR', settings.BASE_DIR / 'tile_cache'),
+                getattr(settings, 'TILE_MEMORY_CACHE_SIZE', 1024),
+            )
+    return _tile_cache
+
+
+def invalidate_points(points):
+    """
+    Drop every cached tile containing one of the ``(latitude, longitude)`` points.
+    """
+    tile_cache = get_tile_cache()
+    for latitude, longitude in points:
+        tile_cache.invalidate_point(latitude, longitude)
+
+
+@receiver(setting_changed)
+def reset_tile_cache(setting, **kwargs):
+    global _tile_cache
+    if setting in ('TILE_CACHE_DIR', 'TILE_MEMORY_CACHE_SIZE'):
+        with _tile_cache_lock:
+            _tile_cache = None
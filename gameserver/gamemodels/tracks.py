@@ -0,0 +1,190 @@
+# gamemodels/tracks.py
+# Rollup of raw PlayerGPSTrace rows into compact per-day segments.
+import math
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PlayerGPSTrace, PlayerGPSTraceSegment
+
+COORD_SCALE = 1e5  # Polyline precision, ~1.1m at the equator
+
+
+def encode_polyline(rows):
+    """
+    Encode rows of integers with the polyline algorithm, delta-encoding each column.
+    """
+    chunks = []
+    previous = None
+    for row in rows:
+        deltas = row if previous is None else [value - prev for value, prev in zip(row, previous)]
+        previous = row
+        for value in deltas:
+            value = ~(value << 1) if value < 0 else value << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+    return ''.join(chunks)
+
+
+def decode_polyline(encoded, width):
+    """
+    Decode a string produced by encode_polyline back into rows of ``width`` integers.
+    """
+    rows = []
+    current = [0] * width
+    index = column = 0
+    while index < len(encoded):
+        result = shift = 0
+        while True:
+            byte = ord(encoded[index]) - 63
+            index += 1
+            result |= (byte & 0x1f) << shift
+            shift += 5
+            if byte < 0x20:
+                break
+        current[column] += ~(result >> 1) if result & 1 else result >> 1
+        column += 1
+        if column == width:
+            rows.append(list(current))
+            column = 0
+    return rows
+
+
+def _offset_m(origin, point):
+    # Equirectangular projection is accurate enough at city scale.
+    x = math.radians(point[1] - origin[1]) * math.cos(math.radians((point[0] + origin[0]) / 2))
+    y = math.radians(point[0] - origin[0])
+    return x * 6371008.8, y * 6371008.8
+
+
+def _segment_distance_m(point, start, end):
+    px, py = _offset_m(start, point)
+    ex, ey = _offset_m(start, end)
+    length_sq = ex * ex + ey * ey
+    if length_sq == 0:
+        return math.hypot(px, py)
+    t = max(0.0, min(1.0, (px * ex + py * ey) / length_sq))
+    return math.hypot(px - t * ex, py - t * ey)
+
+
+def simplify(points, tolerance_m):
+    """
+    Douglas-Peucker simplification of (latitude, longitude, ...) points.
+
+    The first and last points are always kept.
+    """
+    if len(points) < 3 or tolerance_m <= 0:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        max_distance, index = 0.0, None
+        for i in range(first + 1, last):
+            distance = _segment_distance_m(points[i], points[first], points[last])
+            if distance > max_distance:
+                max_distance, index = distance, i
+        if index is not None and max_distance > tolerance_m:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def encode_segment_points(points):
+    start = points[0][2]
+    return encode_polyline([
+        [round(lat * COORD_SCALE), round(lon * COORD_SCALE), round((ts - start).total_seconds())]
+        for lat, lon, ts in points
+    ])
+
+
+def decode_segment_points(segment):
+    return [
+        (lat / COORD_SCALE, lon / COORD_SCALE, segment.start_time + timedelta(seconds=offset))
+        for lat, lon, offset in decode_polyline(segment.encoded_points, 3)
+    ]
+
+
+def rollup_cutoff(retention_days):
+    """
+    Midnight (UTC) ``retention_days`` ago; only whole days before it are rolled up.
+    """
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    return datetime.combine(today - timedelta(days=retention_days), time.min, tzinfo=dt_timezone.utc)
+
+
+def pending_rollups(cutoff):
+    """
+    Distinct (player_id, day) pairs that still have raw traces before ``cutoff``.
+    """
+    return (
+        PlayerGPSTrace.objects.filter(timestamp__lt=cutoff)
+        .annotate(day=TruncDate('timestamp', tzinfo=dt_timezone.utc))
+        .values_list('player_id', 'day')
+        .order_by('player_id', 'day')
+        .distinct()
+    )
+
+
+@transaction.atomic
+def rollup_day(player_id, day, tolerance_m):
+    """
+    Fold a player's raw traces for ``day`` into its segment and delete them.
+
+    Returns the number of raw rows removed. Late-arriving fixes are merged with
+    any segment already stored for that day.
+    """
+    day_start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    raw = PlayerGPSTrace.objects.select_for_update().filter(
+        player_id=player_id, timestamp__gte=day_start, timestamp__lt=day_start + timedelta(days=1)
+    ).order_by('timestamp')
+    rows = list(raw.values_list('id', 'latitude', 'longitude', 'timestamp'))
+    if not rows:
+        return 0
+
+    points = [(lat, lon, ts) for _, lat, lon, ts in rows]
+    segment = PlayerGPSTraceSegment.objects.select_for_update().filter(player_id=player_id, day=day).first()
+    raw_point_count = len(rows)
+    if segment:
+        points = sorted(decode_segment_points(segment) + points, key=lambda point: point[2])
+        raw_point_count += segment.raw_point_count
+    else:
+        segment = PlayerGPSTraceSegment(player_id=player_id, day=day)
+
+    points = simplify(points, tolerance_m)
+    segment.start_time = points[0][2]
+    segment.end_time = points[-1][2]
+    segment.point_count = len(points)
+    segment.raw_point_count = raw_point_count
+    segment.encoded_points = encode_segment_points(points)
+    segment.save()
+
+    PlayerGPSTrace.objects.filter(id__in=[row[0] for row in rows]).delete()
+    return len(rows)
+
+
+def player_history(player, start, end):
+    """
+    Stitch rolled-up segments and remaining raw traces into one ordered list.
+    """
+    points = []
+    segments = PlayerGPSTraceSegment.objects.filter(
+        player=player, start_time__lte=end, end_time__gte=start
+    ).order_by('day')
+    for segment in segments:
+        points.extend(point for point in decode_segment_points(segment) if start <= point[2] <= end)
+    raw = PlayerGPSTrace.objects.filter(
+        player=player, timestamp__gte=start, timestamp__lte=end
+    ).order_by('timestamp').values_list('latitude', 'longitude', 'timestamp')
+    points.extend(raw)
+    points.sort(key=lambda point: point[2])
+    return [
+        {'timestamp': ts, 'latitude': lat, 'longitude': lon}
+        for lat, lon, ts in points
+    ]
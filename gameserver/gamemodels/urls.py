@@ -1,14 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     UserDashboardView,
     PlayerProfileDetailView,
+    PlayerLocationUpdateView,
+    PresenceHeartbeatView,
+    OnlineNearbyView,
     UserCompletedQuestsView,
     UserActiveQuestsView,
     GameItemListView,
     PlayerInventoryListView,
     PlayerInventoryAddView,
+    PlayerInventoryBatchView,
     MagicalLocationListView,
     MagicalLocationDetailView,
+    MagicalLocationClusterView,
+    MapTileView,
     MagicalLocationSuggestView,
     QuestAvailableListView,
     QuestDetailView,
@@ -17,22 +24,46 @@ from .views import (
     QuestProgressUpdateView,
     QuestCompleteView,
     MapReportCreateView,
+    MapReportVerifyView,
+    MapReportClusterListView,
     PlayerGPSTraceCreateView,
+    PlayerGPSTraceBatchCreateView,
+    PlayerGPSTraceHistoryView,
     PlayerWandListCreateView,
     PlayerWandDetailView,
+    MetricsView,
 )
 
+if getattr(settings, 'GAME_ASYNC_VIEWS', False):
+    from .async_views import (
+        AsyncUserDashboardView as UserDashboardView,
+        AsyncPlayerProfileDetailView as PlayerProfileDetailView,
+        AsyncUserCompletedQuestsView as UserCompletedQuestsView,
+        AsyncUserActiveQuestsView as UserActiveQuestsView,
+        AsyncPlayerInventoryListView as PlayerInventoryListView,
+        AsyncMagicalLocationListView as MagicalLocationListView,
+        AsyncMagicalLocationDetailView as MagicalLocationDetailView,
+        AsyncQuestAvailableListView as QuestAvailableListView,
+        AsyncPlayerQuestListView as PlayerQuestListView,
+    )
+
 app_name = 'gamemodels'
 
 urlpatterns = [
     path('dashboard/', UserDashboardView.as_view(), name='user-dashboard'),
     path('profile/', PlayerProfileDetailView.as_view(), name='user-profile-detail'),
+    path('profile/location/', PlayerLocationUpdateView.as_view(), name='user-profile-location'),
+    path('presence/heartbeat/', PresenceHeartbeatView.as_view(), name='presence-heartbeat'),
+    path('presence/nearby/', OnlineNearbyView.as_view(), name='presence-nearby'),
     path('quests/completed/', UserCompletedQuestsView.as_view(), name='user-completed-quests'),
     path('quests/active/', UserActiveQuestsView.as_view(), name='user-active-quests'),
     path('items/', GameItemListView.as_view(), name='game-item-list'),
     path('inventory/me/', PlayerInventoryListView.as_view(), name='player-inventory-list'),
     path('inventory/me/add/', PlayerInventoryAddView.as_view(), name='player-inventory-add'),
+    path('inventory/me/batch/', PlayerInventoryBatchView.as_view(), name='player-inventory-batch'),
     path('magical-locations/', MagicalLocationListView.as_view(), name='magical-location-list'),
+    path('magical-locations/clusters/', MagicalLocationClusterView.as_view(), name='magical-location-clusters'),
+    path('tiles/<int:z>/<int:x>/<int:y>.json', MapTileView.as_view(), name='map-tile'),
     path('magical-locations/<int:pk>/', MagicalLocationDetailView.as_view(), name='magical-location-detail'),
     path('magical-locations/suggest/', MagicalLocationSuggestView.as_view(), name='magical-location-suggest'),
     path('quests/available/', QuestAvailableListView.as_view(), name='quest-available-list'),
@@ -42,7 +73,12 @@ urlpatterns = [
     path('quests/progress/<int:progress_id>/update/', QuestProgressUpdateView.as_view(), name='quest-progress-update'),
     path('quests/progress/<int:progress_id>/complete/', QuestCompleteView.as_view(), name='quest-complete'),
     path('map-reports/', MapReportCreateView.as_view(), name='map-report-create'),
+    path('map-reports/clusters/', MapReportClusterListView.as_view(), name='map-report-cluster-list'),
+    path('map-reports/<int:report_id>/verify/', MapReportVerifyView.as_view(), name='map-report-verify'),
     path('gps-traces/', PlayerGPSTraceCreateView.as_view(), name='gps-trace-create'),
+    path('gps-traces/batch/', PlayerGPSTraceBatchCreateView.as_view(), name='gps-trace-batch-create'),
+    path('gps-traces/history/', PlayerGPSTraceHistoryView.as_view(), name='gps-trace-history'),
     path('wands/me/', PlayerWandListCreateView.as_view(), name='player-wand-list-create'),
     path('wands/me/<int:pk>/', PlayerWandDetailView.as_view(), name='player-wand-detail'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
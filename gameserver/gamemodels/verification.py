@@ -0,0 +1,138 @@
+# gamemodels/verification.py
+# Running crowd-verification aggregates for MapReport.
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import caching
+from .models import OPEN_REPORT_STATUSES as OPEN_STATUSES
+from .models import MagicalLocation, MapReport, MapReportCluster, PlayerProfile, ReportVerification
+
+PRIOR_WEIGHT = 1.0  # Pseudo-votes on each side so a single verification cannot settle a report
+LEVEL_WEIGHT = 0.1  # Extra weight per player level above 1
+MAX_WEIGHT = 3.0
+
+# Verified reports of these types say the linked POI is wrong or unreachable.
+NEGATIVE_POI_REPORT_TYPES = {'POI_INACCURACY', 'OBSTRUCTION', 'ACCESS_ISSUE'}
+
+
+class VerificationError(Exception):
+    pass
+
+
+class OwnReport(VerificationError):
+    pass
+
+
+class ReportClosed(VerificationError):
+    pass
+
+
+class AlreadyVerified(VerificationError):
+    pass
+
+
+def verifier_weight(user):
+    level = PlayerProfile.objects.filter(user=user).values_list('level', flat=True).first() or 1
+    return min(1.0 + LEVEL_WEIGHT * (level - 1), MAX_WEIGHT)
+
+
+def confidence(agree_weight, disagree_weight):
+    return (agree_weight + PRIOR_WEIGHT) / (agree_weight + disagree_weight + 2 * PRIOR_WEIGHT)
+
+
+def record_verification(verification, sign=1):
+    """
+    Fold one verification into its report's counts, weights and confidence.
+
+    ``sign=-1`` takes a deleted verification back out. Everything is a single
+    F() UPDATE on the report row, followed by a status check; open reports
+    whose confidence crosses a threshold are closed.
+    """
+    weight = sign * verification.weight
+    if verification.agrees_with_report:
+        agree, disagree = weight, 0.0
+        counts = {'agree_count': F('agree_count') + sign}
+    else:
+        agree, disagree = 0.0, weight
+        counts = {'disagree_count': F('disagree_count') + sign}
+    # SET expressions read the row as it was before the UPDATE.
+    updated = MapReport.objects.filter(pk=verification.map_report_id).update(
+        agree_weight=F('agree_weight') + agree,
+        disagree_weight=F('disagree_weight') + disagree,
+        confidence_score=(F('agree_weight') + agree + PRIOR_WEIGHT)
+        / (F('agree_weight') + F('disagree_weight') + agree + disagree + 2 * PRIOR_WEIGHT),
+        **counts,
+    )
+    if updated and sign > 0:
+        settle_report(verification.map_report_id)
+
+
+def settle_report(report_id):
+    """
+    Close an open report once enough verifications push it past a threshold.
+
+    The transition is a conditional UPDATE, so concurrent verifications close
+    a report (and move its POI's score) exactly once. Open reports in the
+    same cluster are closed along with it. Returns the new status or None.
+    """
+    report = MapReport.objects.filter(pk=report_id).values(
+        'status', 'agree_count', 'disagree_count', 'confidence_score', 'related_poi_id', 'report_type', 'cluster_id'
+    ).first()
+    if report is None or report['status'] not in OPEN_STATUSES:
+        return None
+    if report['agree_count'] + report['disagree_count'] < getattr(settings, 'MAP_REPORT_MIN_VERIFICATIONS', 3):
+        return None
+
+    if report['confidence_score'] >= getattr(settings, 'MAP_REPORT_VERIFY_THRESHOLD', 0.8):
+        new_status = 'VERIFIED'
+    elif report['confidence_score'] <= getattr(settings, 'MAP_REPORT_REJECT_THRESHOLD', 0.2):
+        new_status = 'REJECTED'
+    else:
+        return None
+
+    now = timezone.now()
+    closed = MapReport.objects.filter(pk=report_id, status__in=OPEN_STATUSES).update(
+        status=new_status, resolved_at=now
+    )
+    if closed and report['cluster_id']:
+        # The rest of the cluster reports the same thing, so it is settled with it.
+        MapReportCluster.objects.filter(pk=report['cluster_id'], status__in=OPEN_STATUSES).update(status=new_status)
+        MapReport.objects.filter(cluster_id=report['cluster_id'], status__in=OPEN_STATUSES).update(
+            status=new_status, resolved_at=now
+        )
+    if closed and new_status == 'VERIFIED' and report['related_poi_id']:
+        delta = -1 if report['report_type'] in NEGATIVE_POI_REPORT_TYPES else 1
+        MagicalLocation.objects.filter(pk=report['related_poi_id']).update(
+            verification_score=F('verification_score') + delta
+        )
+        # update() skips post_save, so refresh the cached location and quest payloads once committed.
+        transaction.on_commit(partial(caching.bump_version, 'locations'))
+        transaction.on_commit(partial(caching.bump_version, 'quests'))
+    return new_status if closed else None
+
+
+def verify_report(report_id, user, agrees_with_report, comment=None):
+    """
+    Record ``user``'s verdict on a report; the post_save handler updates the aggregates.
+
+    Raises MapReport.DoesNotExist, OwnReport, ReportClosed or AlreadyVerified.
+    """
+    with transaction.atomic():
+        report = MapReport.objects.get(pk=report_id)
+        if report.reporter_id == user.pk:
+            raise OwnReport()
+        if report.status not in OPEN_STATUSES:
+            raise ReportClosed()
+        try:
+            with transaction.atomic():
+                ReportVerification.objects.create(
+                    map_report=report, verifier=user, agrees_with_report=agrees_with_report,
+                    comment=comment, weight=verifier_weight(user),
+                )
+        except IntegrityError:
+            raise AlreadyVerified()
+    return MapReport.objects.select_related('reporter', 'related_poi__discovered_by').get(pk=report_id)
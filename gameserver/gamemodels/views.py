@@ -1,111 +1,180 @@
 from rest_framework import generics, status, views as drf_views
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.conf import settings
+from datetime import timedelta
+import math
+from . import caching, metrics, poi_clusters, presence, quest_catalogue, report_clusters, services, tiles, tracks, verification
+from auth_app.authentication import IsMetricsScraper, MetricsTokenAuthentication
+from .catalogue import CatalogueCacheMixin
+from .fast_reads import ValuesReadMixin
 from .models import (
     PlayerProfile, Wand, PlayerQuestProgress, Quest, GameItem, PlayerInventory,
-    MagicalLocation, MapReport, PlayerGPSTrace, PlayerWand
+    MagicalLocation, MapReport, MapReportCluster, PlayerGPSTrace, PlayerWand
 )
 from .serializers import (
-    PlayerProfileSerializer, DashboardSerializer, PlayerQuestProgressSerializer,
+    PlayerProfileSerializer, DashboardSerializer, PlayerQuestProgressSerializer, trim_fields,
     GameItemSerializer, PlayerInventorySerializer, MagicalLocationSerializer,
-    QuestSerializer, MapReportSerializer, PlayerGPSTraceSerializer, PlayerWandSerializer
+    QuestSerializer, MapReportSerializer, PlayerGPSTraceSerializer, PlayerWandSerializer,
+    PlayerGPSTraceBatchSerializer, PlayerGPSTracePointSerializer, InventoryBatchSerializer,
+    PlayerLocationSerializer, ReportVerificationSerializer, MapReportClusterSerializer,
+    GameItemValuesSerializer, MagicalLocationValuesSerializer, PlayerQuestProgressValuesSerializer
 )
 
 
 class PlayerWandListCreateView(generics.ListCreateAPIView):
     serializer_class = PlayerWandSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = None # A player only owns a handful of wands; the client expects a bare list
 
     def get_queryset(self):
-        player_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
-        return PlayerWand.objects.filter(player=player_profile).select_related('wand')
+        return PlayerWand.objects.filter(player=self.request.player)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
-        player_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
-        context['player'] = player_profile
+        context['player'] = self.request.player
         return context
 
     def perform_create(self, serializer):
-        player_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
-        serializer.save(player=player_profile)
+        serializer.save(player=self.request.player)
 
 class PlayerWandDetailView(generics.RetrieveDestroyAPIView):
     serializer_class = PlayerWandSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        player_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
-        return PlayerWand.objects.filter(player=player_profile)
+        return PlayerWand.objects.filter(player=self.request.player)
 
 class UserDashboardView(drf_views.APIView):
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
 
     def get(self, request, *args, **kwargs):
-        try:
-            profile = request.user.profile
-        except PlayerProfile.DoesNotExist:
-            profile, created = PlayerProfile.objects.get_or_create(user=request.user)
-            if created:
-                print(f"Profile created on-the-fly for user {request.user.username} in DashboardView")
-        serializer = DashboardSerializer(profile, context={'request': request})
-        return Response(serializer.data)
+        profile = request.player
+        data = caching.get_dashboard(profile.pk)
+        if data is None:
+            profile = PlayerProfile.objects.with_dashboard_stats().get(pk=profile.pk)
+            # Built without the request so the cached snapshot is never trimmed by ?fields=.
+            data = DashboardSerializer(profile).data
+            caching.set_dashboard(profile.pk, data)
+        return Response(trim_fields(data, request))
 
 class PlayerProfileDetailView(generics.RetrieveUpdateAPIView):
     serializer_class = PlayerProfileSerializer
     permission_classes = [IsAuthenticated]
 
     def get_object(self):
+        return self.request.player
+
+class PlayerLocationUpdateView(drf_views.APIView):
+    """
+    Lightweight position updates; only the coordinates are written to the profile row.
+    """
+    permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+
+    def post(self, request, *args, **kwargs):
+        serializer = PlayerLocationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        outcome = services.update_location(request.player, **serializer.validated_data)
+        return Response({'status': outcome}, status=status.HTTP_200_OK)
+
+class PresenceHeartbeatView(drf_views.APIView):
+    """
+    Keeps the player online; the position is optional and only goes to the presence store.
+    """
+    permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+
+    def post(self, request, *args, **kwargs):
+        latitude = longitude = None
+        if request.data:
+            serializer = PlayerLocationSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            latitude, longitude = serializer.validated_data['latitude'], serializer.validated_data['longitude']
+        presence.heartbeat(request.player.pk, request.player.user.username, latitude, longitude)
+        services.write_pending_location(request.player)
+        return Response({'online_for': presence.presence_ttl()}, status=status.HTTP_200_OK)
+
+class OnlineNearbyView(drf_views.APIView):
+    permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+
+    def get(self, request, *args, **kwargs):
+        profile = request.player
+        default_radius = getattr(settings, 'PRESENCE_NEARBY_RADIUS_M', 500)
         try:
-            return self.request.user.profile
-        except PlayerProfile.DoesNotExist:
-            profile, created = PlayerProfile.objects.get_or_create(user=self.request.user)
-            if created:
-                print(f"Profile created on-the-fly for user {request.user.username} in PlayerProfileDetailView")
-            return profile
-
-class UserCompletedQuestsView(generics.ListAPIView):
+            radius = float(request.query_params.get('radius', default_radius))
+        except ValueError:
+            return Response({'error': 'radius must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        if not math.isfinite(radius) or radius <= 0:
+            return Response({'error': 'radius must be a positive number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        record = presence.get_presence(profile.pk) or {}
+        latitude, longitude = profile.current_latitude, profile.current_longitude
+        if record.get('latitude') is not None:
+            latitude, longitude = record['latitude'], record['longitude']
+        if latitude is None or longitude is None:
+            return Response({'error': 'Player position is unknown'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(presence.online_near(latitude, longitude, radius, exclude=profile.pk))
+
+class UserCompletedQuestsView(ValuesReadMixin, generics.ListAPIView):
     serializer_class = PlayerQuestProgressSerializer
+    values_serializer_class = PlayerQuestProgressValuesSerializer
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+    cursor_ordering = ('-completed_at', '-id')
 
     def get_queryset(self):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
+        # Cursors cannot point at a NULL completed_at; id breaks ties between equal timestamps.
+        user_profile = self.request.player
         return PlayerQuestProgress.objects.filter(
-            player=user_profile, status='COMPLETED'
-        ).select_related('quest').order_by('-completed_at')
+            player=user_profile, status='COMPLETED', completed_at__isnull=False
+        ).order_by('-completed_at', '-id')
 
-class UserActiveQuestsView(generics.ListAPIView):
+class UserActiveQuestsView(ValuesReadMixin, generics.ListAPIView):
     serializer_class = PlayerQuestProgressSerializer
+    values_serializer_class = PlayerQuestProgressValuesSerializer
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+    pagination_class = None # Bounded set, ordered by quest title which a cursor cannot key on
 
     def get_queryset(self):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
+        user_profile = self.request.player
         return PlayerQuestProgress.objects.filter(
             player=user_profile
-        ).exclude(status='COMPLETED').exclude(status='FAILED').select_related('quest').order_by('quest__title')
+        ).exclude(status='COMPLETED').exclude(status='FAILED').order_by('quest__title')
 
-class GameItemListView(generics.ListAPIView):
+class GameItemListView(ValuesReadMixin, CatalogueCacheMixin, generics.ListAPIView):
     serializer_class = GameItemSerializer
+    values_serializer_class = GameItemValuesSerializer
+    catalogue_names = ('items',)
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+    cursor_ordering = 'id'
     queryset = GameItem.objects.all()
 
 class PlayerInventoryListView(generics.ListAPIView):
     serializer_class = PlayerInventorySerializer
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+    cursor_ordering = 'id'
 
     def get_queryset(self):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
-        return PlayerInventory.objects.filter(player=user_profile).select_related('item')
+        user_profile = self.request.player
+        return PlayerInventory.objects.filter(player=user_profile)
 
 class PlayerInventoryAddView(drf_views.APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
+        user_profile = self.request.player
         item_id = request.data.get('item_id')
         quantity = request.data.get('quantity', 1)
         
@@ -127,9 +196,28 @@ class PlayerInventoryAddView(drf_views.APIView):
         serializer = PlayerInventorySerializer(inventory_item)
         return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
-class MagicalLocationListView(generics.ListAPIView):
+class PlayerInventoryBatchView(drf_views.APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = InventoryBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            rows = services.apply_inventory_deltas(self.request.player.pk, serializer.get_deltas())
+        except services.UnknownItems as e:
+            return Response({'error': 'Item not found', 'item_ids': e.item_ids}, status=status.HTTP_404_NOT_FOUND)
+        except services.InsufficientQuantity as e:
+            return Response({'error': 'Insufficient quantity', 'item_ids': e.item_ids}, status=status.HTTP_400_BAD_REQUEST)
+        except services.QuantityTooLarge as e:
+            return Response({'error': 'Quantity too large', 'item_ids': e.item_ids}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(PlayerInventorySerializer(rows, many=True).data, status=status.HTTP_200_OK)
+
+class MagicalLocationListView(ValuesReadMixin, generics.ListAPIView):
     serializer_class = MagicalLocationSerializer
+    values_serializer_class = MagicalLocationValuesSerializer
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+    cursor_ordering = 'id'
 
     def get_queryset(self):
         queryset = MagicalLocation.objects.filter(is_active=True)
@@ -142,17 +230,76 @@ class MagicalLocationListView(generics.ListAPIView):
             try:
                 min_lat, max_lat = float(min_lat), float(max_lat)
                 min_lon, max_lon = float(min_lon), float(max_lon)
-                queryset = queryset.filter(
-                    latitude__range=(min_lat, max_lat),
-                    longitude__range=(min_lon, max_lon)
-                )
+                queryset = queryset.in_bbox(min_lat, max_lat, min_lon, max_lon)
             except ValueError:
                 pass
         return queryset
 
-class MagicalLocationDetailView(generics.RetrieveAPIView):
+class MagicalLocationClusterView(drf_views.APIView):
+    """
+    Compact map payload for a viewport: grid clusters when zoomed out, point tuples when zoomed in.
+    """
+    permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            bounds = [float(params[name]) for name in ('min_lat', 'max_lat', 'min_lon', 'max_lon')]
+            zoom = int(params['zoom'])
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'min_lat, max_lat, min_lon, max_lon and zoom are required numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 <= zoom <= 22:
+            return Response({'error': 'zoom must be between 0 and 22'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            return Response(poi_clusters.viewport(*bounds, zoom))
+        except poi_clusters.ViewportTooLarge:
+            return Response({'error': 'Viewport is too large for this zoom level'}, status=status.HTTP_400_BAD_REQUEST)
+
+class MapTileView(drf_views.APIView):
+    """
+    ``tiles/<z>/<x>/<y>.json``: locations and quest targets in one Web Mercator tile.
+
+    Tiles hold no per-player data, so they skip authentication and can be
+    cached by browsers and CDNs; the ETag changes when a location in the tile does.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, z, x, y, *args, **kwargs):
+        if not tiles.min_zoom() <= z <= tiles.max_zoom() or x >= 2 ** z or y >= 2 ** z:
+            raise Http404("No such tile.")
+        body, etag = tiles.get_tile_cache().get(z, x, y)
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and etag in parse_etags(if_none_match):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = f"public, max-age={getattr(settings, 'TILE_HTTP_MAX_AGE', 60)}"
+        return response
+
+class MetricsView(drf_views.APIView):
+    """
+    ``metrics/``: this process's request metrics in the Prometheus text format.
+
+    Scrapers send ``Authorization: Bearer <METRICS_TOKEN>``; staff can read
+    it with their usual token. Every worker process keeps its own figures.
+    """
+    authentication_classes = [MetricsTokenAuthentication, *drf_views.APIView.authentication_classes]
+    permission_classes = [IsMetricsScraper | IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+class MagicalLocationDetailView(CatalogueCacheMixin, generics.RetrieveAPIView):
     serializer_class = MagicalLocationSerializer
+    catalogue_names = ('locations',)
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
     queryset = MagicalLocation.objects.filter(is_active=True)
 
 class MagicalLocationSuggestView(drf_views.APIView):
@@ -164,55 +311,51 @@ class MagicalLocationSuggestView(drf_views.APIView):
         data['report_type'] = 'NEW_POI_SUGGESTION'
         serializer = MapReportSerializer(data=data)
         if serializer.is_valid():
-            serializer.save()
+            report_clusters.save_report(serializer, reporter=request.user)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class QuestAvailableListView(generics.ListAPIView):
     serializer_class = QuestSerializer
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+    cursor_ordering = 'id'
 
     def get_queryset(self):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
-        completed_quests = PlayerQuestProgress.objects.filter(
-            player=user_profile, status='COMPLETED'
-        ).values_list('quest__id', flat=True)
-        queryset = Quest.objects.filter(
+        user_profile = self.request.player
+        if user_profile.current_latitude is not None and user_profile.current_longitude is not None:
+            return Quest.objects.filter(
+                id__in=quest_catalogue.available_quest_ids(user_profile), is_active=True
+            )
+        completed_quests = quest_catalogue.completed_quest_ids(user_profile.pk)
+        return Quest.objects.filter(
             is_active=True,
             min_player_level__lte=user_profile.level
         ).exclude(id__in=completed_quests)
-        user_lat = user_profile.current_latitude
-        user_lon = user_profile.current_longitude
-        if user_lat and user_lon:
-            min_lat = user_lat - 0.1
-            max_lat = user_lat + 0.1
-            min_lon = user_lon - 0.1
-            max_lon = user_lon + 0.1
-            queryset = queryset.filter(
-                Q(target_location__isnull=True) |
-                Q(target_location__latitude__range=(min_lat, max_lat),
-                  target_location__longitude__range=(min_lon, max_lon))
-            )
-        return queryset
 
-class QuestDetailView(generics.RetrieveAPIView):
+class QuestDetailView(CatalogueCacheMixin, generics.RetrieveAPIView):
     serializer_class = QuestSerializer
+    catalogue_names = ('quests', 'items')
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
     queryset = Quest.objects.filter(is_active=True)
 
-class PlayerQuestListView(generics.ListAPIView):
+class PlayerQuestListView(ValuesReadMixin, generics.ListAPIView):
     serializer_class = PlayerQuestProgressSerializer
+    values_serializer_class = PlayerQuestProgressValuesSerializer
     permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+    cursor_ordering = 'id'
 
     def get_queryset(self):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
-        return PlayerQuestProgress.objects.filter(player=user_profile).select_related('quest')
+        user_profile = self.request.player
+        return PlayerQuestProgress.objects.filter(player=user_profile)
 
 class QuestAcceptView(drf_views.APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, quest_id, *args, **kwargs):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
+        user_profile = self.request.player
         try:
             quest = Quest.objects.get(id=quest_id, is_active=True)
         except Quest.DoesNotExist:
@@ -236,7 +379,7 @@ class QuestProgressUpdateView(drf_views.APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, progress_id, *args, **kwargs):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
+        user_profile = self.request.player
         try:
             progress = PlayerQuestProgress.objects.get(id=progress_id, player=user_profile)
         except PlayerQuestProgress.DoesNotExist:
@@ -262,30 +405,15 @@ class QuestCompleteView(drf_views.APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, progress_id, *args, **kwargs):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key and len(idempotency_key) > 64:
+            return Response({'error': 'Idempotency-Key must be at most 64 characters'}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            progress = PlayerQuestProgress.objects.get(id=progress_id, player=user_profile)
+            progress, _ = services.complete_quest(self.request.player, progress_id, idempotency_key)
         except PlayerQuestProgress.DoesNotExist:
             return Response({'error': 'Quest progress not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        if progress.status == 'COMPLETED':
+        except services.QuestAlreadyCompleted:
             return Response({'error': 'Quest already completed'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        user_profile.xp += progress.quest.xp_reward
-        user_profile.level = user_profile.xp // 1000 + 1
-        user_profile.save()
-        
-        if progress.quest.item_reward:
-            inventory_item, created = PlayerInventory.objects.get_or_create(
-                player=user_profile, item=progress.quest.item_reward, defaults={'quantity': 1}
-            )
-            if not created:
-                inventory_item.quantity += 1
-                inventory_item.save()
-        
-        progress.status = 'COMPLETED'
-        progress.completed_at = timezone.now()
-        progress.save()
         return Response(PlayerQuestProgressSerializer(progress).data, status=status.HTTP_200_OK)
 
 class MapReportCreateView(generics.CreateAPIView):
@@ -293,16 +421,114 @@ class MapReportCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
 
     def perform_create(self, serializer):
-        serializer.save(reporter=self.request.user)
+        report_clusters.save_report(serializer, reporter=self.request.user)
+
+class MapReportClusterListView(generics.ListAPIView):
+    """
+    Review queue of report clusters for moderators, open ones by default.
+    """
+    serializer_class = MapReportClusterSerializer
+    permission_classes = [IsAdminUser]
+    cursor_ordering = '-id'
+
+    def get_queryset(self):
+        params = self.request.query_params
+        queryset = MapReportCluster.objects.all()
+        if params.get('status'):
+            queryset = queryset.filter(status=params['status'])
+        else:
+            queryset = queryset.filter(status__in=verification.OPEN_STATUSES)
+        if params.get('report_type'):
+            queryset = queryset.filter(report_type=params['report_type'])
+        return queryset
+
+class MapReportVerifyView(drf_views.APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, report_id, *args, **kwargs):
+        serializer = ReportVerificationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            report = verification.verify_report(report_id, request.user, **serializer.validated_data)
+        except MapReport.DoesNotExist:
+            return Response({'error': 'Map report not found'}, status=status.HTTP_404_NOT_FOUND)
+        except verification.OwnReport:
+            return Response({'error': 'You cannot verify your own report'}, status=status.HTTP_400_BAD_REQUEST)
+        except verification.ReportClosed:
+            return Response({'error': 'Map report is already closed'}, status=status.HTTP_400_BAD_REQUEST)
+        except verification.AlreadyVerified:
+            return Response({'error': 'You have already verified this report'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(MapReportSerializer(report).data, status=status.HTTP_201_CREATED)
 
 class PlayerGPSTraceCreateView(generics.ListCreateAPIView):
     serializer_class = PlayerGPSTraceSerializer
     permission_classes = [IsAuthenticated]
+    cursor_ordering = 'timestamp'
 
     def get_queryset(self):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
+        user_profile = self.request.player
         return PlayerGPSTrace.objects.filter(player=user_profile).order_by('timestamp')
 
     def perform_create(self, serializer):
-        user_profile, _ = PlayerProfile.objects.get_or_create(user=self.request.user)
-        serializer.save(player=user_profile, timestamp=timezone.now())
\ No newline at end of file
+        user_profile = self.request.player
+        serializer.save(player=user_profile, timestamp=timezone.now())
+
+class PlayerGPSTraceBatchCreateView(drf_views.APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = PlayerGPSTraceBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        points = serializer.validated_data['points']
+
+        user_profile = self.request.player
+        PlayerGPSTrace.objects.bulk_create([
+            PlayerGPSTrace(player=user_profile, timestamp=point['timestamp'],
+                           latitude=point['latitude'], longitude=point['longitude'])
+            for point in points
+        ])
+
+        latest = max(points, key=lambda point: point['timestamp'])
+        PlayerProfile.objects.filter(pk=user_profile.pk).update(
+            current_latitude=latest['latitude'],
+            current_longitude=latest['longitude'],
+        )
+        caching.invalidate_dashboard(user_profile.pk)
+        presence.heartbeat(user_profile.pk, user_profile.user.username, latest['latitude'], latest['longitude'])
+        return Response({
+            'created': len(points),
+            'latest': PlayerGPSTracePointSerializer(latest).data,
+        }, status=status.HTTP_201_CREATED)
+
+class PlayerGPSTraceHistoryView(drf_views.APIView):
+    permission_classes = [IsAuthenticated]
+    requires_orm_user = False
+
+    def get(self, request, *args, **kwargs):
+        end = request.query_params.get('end')
+        start = request.query_params.get('start')
+        max_days = getattr(settings, 'GPS_TRACE_HISTORY_MAX_DAYS', 31)
+        try:
+            end = parse_datetime(end) if end else timezone.now()
+            default_days = min(getattr(settings, 'GPS_TRACE_HISTORY_DEFAULT_DAYS', 7), max_days)
+            start = parse_datetime(start) if start else end - timedelta(days=default_days)
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({'error': 'start and end must be ISO 8601 datetimes'}, status=status.HTTP_400_BAD_REQUEST)
+        if timezone.is_naive(start):
+            start = timezone.make_aware(start)
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end)
+        if start > end:
+            return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+        if end - start > timedelta(days=max_days):
+            return Response({'error': f'The window may span at most {max_days} days'}, status=status.HTTP_400_BAD_REQUEST)
+
+        user_profile = self.request.player
+        points = tracks.player_history(user_profile, start, end)
+        return Response({
+            'start': start,
+            'end': end,
+            'points': PlayerGPSTracePointSerializer(points, many=True).data,
+        })